@@ -2,9 +2,17 @@ from fastapi.applications import FastAPI
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.middleware import UserContextMiddleware
+from app.core.responses import FastJSONResponse
 from app.config import settings
 from app.routers.router import router
+from app.controllers.health_controller import health_controller
 from app.db.database import DBSession
+from app.utils.security import password_hasher
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.services.guest_service import guest_service
+from app.services.room_service import room_service
+from app.services.action_log_writer import action_log_writer
+from app.services.action_log_retention_service import action_log_retention_service
 
 def create_app() -> FastAPI:
     app: FastAPI = FastAPI(
@@ -12,6 +20,7 @@ def create_app() -> FastAPI:
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
+        default_response_class=FastJSONResponse,
     )
 
     app.add_middleware(
@@ -20,9 +29,18 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
     app.add_middleware(UserContextMiddleware)
     app.add_event_handler(event_type="startup", func=DBSession._init_db)
+    app.add_event_handler(event_type="startup", func=guest_service.build_name_index)
+    app.add_event_handler(event_type="startup", func=room_service.load_availability)
+    app.add_event_handler(event_type="startup", func=action_log_retention_service.ensure_partitions)
+    app.add_event_handler(event_type="startup", func=action_log_writer.start)
+    app.add_event_handler(event_type="shutdown", func=action_log_writer.stop)
+    app.add_event_handler(event_type="shutdown", func=DBSession._close_pools)
+    app.add_event_handler(event_type="shutdown", func=password_hasher.shutdown)
     app.include_router(router=router, prefix=settings.API_PREFIX + "/v1")
+    app.include_router(router=health_controller.router, prefix="/health", tags=["Мониторинг"])
     return app
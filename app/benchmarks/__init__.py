@@ -0,0 +1,3 @@
+"""
+Замеры производительности, которые запускаются вручную (``python -m app.benchmarks.<модуль>``).
+"""
@@ -0,0 +1,119 @@
+"""
+Скорость сериализации ответов JSON: JSONResponse (json.dumps) и
+FastJSONResponse (orjson).
+
+Запуск::
+
+    python -m app.benchmarks.json_responses [--rows 1000] [--repeat 50]
+
+Для каждого списка (как в ответе соответствующего маршрута) строится
+страница из rows записей и повторно сериализуется так же, как это делает
+FastAPI: проверка по модели ответа (serialize_response) и кодирование тела
+(render). Печатаются размер ответа и пропускная способность в МБ/с -
+отдельно для кодирования тела и для всего пути. База данных не нужна.
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import FastJSONResponse, orjson
+from app.models.checkin import CheckInWithDetails
+from app.models.payment import PaymentMethod, PaymentStatus, RoomPaymentWithDetails
+
+NOW = datetime(2026, 1, 15, 12, 30, tzinfo=timezone.utc)
+
+
+def _check_ins(rows: int) -> List[CheckInWithDetails]:
+    return [
+        CheckInWithDetails(
+            id=i, guest_id=i, room_id=i % 40 + 1,
+            check_in_date=date(2026, 1, 1) + timedelta(days=i % 30),
+            check_out_date=date(2026, 2, 1) + timedelta(days=i % 30),
+            status="Активно", created_at=NOW, updated_at=NOW,
+            guest_passport=f"4510-{i:06d}", guest_full_name="Иванов Иван Иванович",
+            room_number=f"Л{i % 40 + 100}", room_type="Люкс", price_per_night=4500.0,
+        )
+        for i in range(rows)
+    ]
+
+
+def _room_payments(rows: int) -> List[RoomPaymentWithDetails]:
+    return [
+        RoomPaymentWithDetails(
+            id=i, check_in_id=i, days_count=i % 14 + 1, amount=Decimal("4500.00") * (i % 14 + 1),
+            payment_method=PaymentMethod.CARD, status=PaymentStatus.PAID, payment_date=NOW,
+            guest_passport=f"4510-{i:06d}", guest_full_name="Иванов Иван Иванович",
+            room_number=f"Л{i % 40 + 100}", check_in_date=NOW, check_out_date=NOW,
+        )
+        for i in range(rows)
+    ]
+
+
+def _revenue_by_room(rows: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "room_number": f"Л{i + 100}", "room_type": "Люкс",
+            "total_revenue": Decimal("1234567.89") + i, "payments_count": 120 + i,
+            "avg_payment": Decimal("10288.0657500000000000"), "total_days_sold": 300 + i,
+        }
+        for i in range(rows)
+    ]
+
+
+ENDPOINTS: Dict[str, Tuple[Any, Callable[[int], list]]] = {
+    "GET /check-ins/": (List[CheckInWithDetails], _check_ins),
+    "GET /payments/room": (List[RoomPaymentWithDetails], _room_payments),
+    "GET /payments/revenue/rooms": (List[Dict[Any, Any]], _revenue_by_room),
+}
+
+
+async def _measure(response_class, field, content: list, repeat: int) -> Tuple[int, float, float]:
+    """Размер тела и время (с) на одну сериализацию: только render и весь путь."""
+    prepared = await serialize_response(field=field, response_content=content)
+    body = response_class(prepared).body
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        response_class(prepared)
+    render_seconds = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        response_class(await serialize_response(field=field, response_content=content))
+    total_seconds = (time.perf_counter() - started) / repeat
+    return len(body), render_seconds, total_seconds
+
+
+async def run(rows: int, repeat: int) -> None:
+    encoder = f"orjson {orjson.__version__}" if orjson is not None else "json (orjson не установлен)"
+    print(f"Страница: {rows} записей, повторов: {repeat}; FastJSONResponse: {encoder}")
+    print(f"{'маршрут':<28} {'ответ':<17} {'байт':>9} {'render МБ/с':>12} {'всего МБ/с':>11}")
+
+    for endpoint, (response_type, build) in ENDPOINTS.items():
+        field = create_response_field(name="response", type_=response_type)
+        content = build(rows)
+        for response_class in (JSONResponse, FastJSONResponse):
+            size, render_seconds, total_seconds = await _measure(response_class, field, content, repeat)
+            print(
+                f"{endpoint:<28} {response_class.__name__:<17} {size:>9} "
+                f"{size / render_seconds / 1e6:>12.1f} {size / total_seconds / 1e6:>11.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение скорости сериализации ответов JSON")
+    parser.add_argument("--rows", type=int, default=1000, help="Записей на странице")
+    parser.add_argument("--repeat", type=int, default=50, help="Число повторов замера")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
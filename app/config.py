@@ -15,6 +15,8 @@ class Settings(BaseSettings):
     
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "secret")
     JWT_EXPIRE_MS: int = 60 * 60 * 24 * 7
+
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
     
     CORS_ORIGINS: list[str] = [
         "http://localhost",
@@ -28,6 +30,26 @@ class Settings(BaseSettings):
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "root")
 
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_MAX_LIFETIME: float = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+    DB_POOL_MAX_IDLE: float = float(os.getenv("DB_POOL_MAX_IDLE", "600"))
+
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "1024"))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "60"))
+
+    AVAILABILITY_REFRESH_SECONDS: float = float(os.getenv("AVAILABILITY_REFRESH_SECONDS", "60"))
+    GUEST_INDEX_REFRESH_SECONDS: float = float(os.getenv("GUEST_INDEX_REFRESH_SECONDS", "60"))
+
+    ACTION_LOG_BATCH_SIZE: int = int(os.getenv("ACTION_LOG_BATCH_SIZE", "500"))
+    ACTION_LOG_FLUSH_SECONDS: float = float(os.getenv("ACTION_LOG_FLUSH_SECONDS", "1"))
+    ACTION_LOG_MAX_PENDING: int = int(os.getenv("ACTION_LOG_MAX_PENDING", "10000"))
+    ACTION_LOG_BACKPRESSURE_SECONDS: float = float(os.getenv("ACTION_LOG_BACKPRESSURE_SECONDS", "2"))
+    ACTION_LOG_PARTITIONS_AHEAD: int = int(os.getenv("ACTION_LOG_PARTITIONS_AHEAD", "2"))
+    ACTION_LOG_RETENTION_MONTHS: int = int(os.getenv("ACTION_LOG_RETENTION_MONTHS", "12"))
+    ACTION_LOG_ARCHIVE_DIR: str = os.getenv("ACTION_LOG_ARCHIVE_DIR", "archive/action_logs")
+
     class Config:
         case_sensitive: bool = True
         env_file: str = ".env"
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime, date
 
 from app.models.action_log import (
-    ActionLogWithUser, ActionLogFilter, ActionLogSummary, ActionType
+    ActionLogWithUser, ActionLogFilter, ActionLogSummary, ActionLogDailySummary,
+    ActionLogExportFormat, ActionType
 )
 from app.services.action_log_service import action_log_service
-from app.core.auth import require_admin, get_current_user
+from app.services.action_log_retention_service import action_log_retention_service
+from app.core.auth import require_admin, get_current_user, can_export_logs
 from app.models.auth import UserInfo
+from app.utils.pagination import InvalidCursorError, set_next_cursor
 
 
 class ActionLogController:
@@ -23,6 +27,13 @@ class ActionLogController:
             response_model=List[ActionLogWithUser],
             dependencies=[Depends(require_admin)]
         )
+        self.router.add_api_route(
+            "/export", 
+            self.export_action_logs, 
+            methods=["GET"],
+            response_class=StreamingResponse,
+            dependencies=[Depends(can_export_logs)]
+        )
         self.router.add_api_route(
             "/summary", 
             self.get_user_summary, 
@@ -30,15 +41,29 @@ class ActionLogController:
             response_model=List[ActionLogSummary],
             dependencies=[Depends(require_admin)]
         )
+        self.router.add_api_route(
+            "/summary/daily", 
+            self.get_user_daily_summary, 
+            methods=["GET"], 
+            response_model=List[ActionLogDailySummary],
+            dependencies=[Depends(require_admin)]
+        )
         self.router.add_api_route(
             "/stats", 
             self.get_system_stats, 
             methods=["GET"],
             dependencies=[Depends(require_admin)]
         )
+        self.router.add_api_route(
+            "/partitions", 
+            self.get_partitions, 
+            methods=["GET"],
+            dependencies=[Depends(require_admin)]
+        )
 
     async def get_action_logs(
         self,
+        response: Response,
         user_id: Optional[int] = Query(None, description="ID пользователя для фильтрации"),
         username: Optional[str] = Query(None, description="Имя пользователя для поиска"),
         action_type: Optional[ActionType] = Query(None, description="Тип действия"),
@@ -47,6 +72,7 @@ class ActionLogController:
         date_to: Optional[date] = Query(None, description="Конечная дата (YYYY-MM-DD)"),
         limit: int = Query(100, ge=1, le=1000, description="Количество записей"),
         offset: int = Query(0, ge=0, description="Смещение"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor предыдущего ответа); с курсором offset не применяется"),
         current_user: UserInfo = Depends(require_admin)
     ) -> List[ActionLogWithUser]:
         """
@@ -58,6 +84,9 @@ class ActionLogController:
         - Типу действия
         - Таблице
         - Диапазону дат
+
+        Для перехода к следующей странице передайте cursor из заголовка
+        X-Next-Cursor предыдущего ответа.
         """
         try:
             date_from_dt = datetime.combine(date_from, datetime.min.time()) if date_from else None
@@ -71,18 +100,60 @@ class ActionLogController:
                 date_from=date_from_dt,
                 date_to=date_to_dt,
                 limit=limit,
-                offset=offset
+                offset=offset,
+                cursor=cursor
             )
             
-            logs = action_log_service.get_logs_with_filters(filters)
+            logs = await action_log_service.get_logs_with_filters(filters)
+            set_next_cursor(response, action_log_service.list_keyset, logs, limit)
             return logs
             
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Ошибка при получении журнала событий: {str(e)}"
             )
 
+    async def export_action_logs(
+        self,
+        user_id: Optional[int] = Query(None, description="ID пользователя для фильтрации"),
+        username: Optional[str] = Query(None, description="Имя пользователя для поиска"),
+        action_type: Optional[ActionType] = Query(None, description="Тип действия"),
+        table_name: Optional[str] = Query(None, description="Название таблицы"),
+        date_from: Optional[date] = Query(None, description="Начальная дата (YYYY-MM-DD)"),
+        date_to: Optional[date] = Query(None, description="Конечная дата (YYYY-MM-DD)"),
+        format: ActionLogExportFormat = Query(ActionLogExportFormat.NDJSON, description="Формат: ndjson или csv"),
+        gzip: bool = Query(False, description="Сжать выгрузку (gzip)")
+    ) -> StreamingResponse:
+        """
+        Выгрузка журнала событий в файл (NDJSON или CSV).
+        Требуется право export_action_logs.
+        
+        Фильтры - как у списка событий, но без ограничения числа записей:
+        журнал передается по частям по мере чтения из базы данных, в порядке
+        времени события. NDJSON - одна JSON-запись на строку.
+        """
+        filters = ActionLogFilter(
+            user_id=user_id,
+            username=username,
+            action_type=action_type,
+            table_name=table_name,
+            date_from=datetime.combine(date_from, datetime.min.time()) if date_from else None,
+            date_to=datetime.combine(date_to, datetime.max.time()) if date_to else None
+        )
+        media_type = "application/x-ndjson" if format == ActionLogExportFormat.NDJSON else "text/csv; charset=utf-8"
+        filename = f"action_logs.{format.value}"
+        if gzip:
+            media_type, filename = "application/gzip", filename + ".gz"
+
+        return StreamingResponse(
+            action_log_service.export_logs(filters, format, compress=gzip),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
     async def get_user_summary(
         self,
         date_from: Optional[date] = Query(None, description="Начальная дата периода"),
@@ -94,7 +165,7 @@ class ActionLogController:
         Показывает статистику активности сотрудников за период.
         """
         try:
-            summary = action_log_service.get_user_actions_summary(
+            summary = await action_log_service.get_user_actions_summary(
                 date_from=date_from,
                 date_to=date_to
             )
@@ -106,6 +177,30 @@ class ActionLogController:
                 detail=f"Ошибка при получении сводки по пользователям: {str(e)}"
             )
 
+    async def get_user_daily_summary(
+        self,
+        date_from: Optional[date] = Query(None, description="Начальная дата периода"),
+        date_to: Optional[date] = Query(None, description="Конечная дата периода"),
+        current_user: UserInfo = Depends(require_admin)
+    ) -> List[ActionLogDailySummary]:
+        """
+        Получение активности сотрудников по дням.
+        Одна строка на день и пользователя: число действий всего и по типам.
+        Для длинных периодов, где полный журнал не нужен.
+        """
+        try:
+            summary = await action_log_service.get_user_daily_activity(
+                date_from=date_from,
+                date_to=date_to
+            )
+            return summary
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Ошибка при получении активности по дням: {str(e)}"
+            )
+
     async def get_system_stats(
         self,
         date_from: Optional[date] = Query(None, description="Начальная дата периода"),
@@ -117,7 +212,7 @@ class ActionLogController:
         Показывает количество действий по типам, активность по дням и т.д.
         """
         try:
-            stats = action_log_service.get_system_activity_stats(
+            stats = await action_log_service.get_system_activity_stats(
                 date_from=date_from,
                 date_to=date_to
             )
@@ -129,5 +224,20 @@ class ActionLogController:
                 detail=f"Ошибка при получении статистики системы: {str(e)}"
             )
 
+    async def get_partitions(self) -> List[dict]:
+        """
+        Секции журнала действий по месяцам.
+        Для каждой секции - имя, месяц и оценка числа строк. Секции старше
+        срока хранения выгружаются в архив заданием app.jobs.action_log_retention.
+        """
+        try:
+            return await action_log_retention_service.get_partitions()
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Ошибка при получении секций журнала: {str(e)}"
+            )
+
 
 action_log_controller = ActionLogController()
\ No newline at end of file
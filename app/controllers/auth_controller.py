@@ -28,7 +28,7 @@ class AuthController:
         Возвращает JWT токен для доступа к защищенным эндпоинтам.
         """
         try:
-            user = auth_service.authenticate_user(login_data.username, login_data.password)
+            user = await auth_service.authenticate_user(login_data.username, login_data.password)
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,7 +36,7 @@ class AuthController:
                     headers={"WWW-Authenticate": "Bearer"},
                 )
             
-            token_data = auth_service.create_access_token_for_user(user)
+            token_data = await auth_service.create_access_token_for_user(user)
             
             
             return TokenResponse(**token_data)
@@ -97,7 +97,7 @@ class AuthController:
         Требует валидный JWT токен в заголовке Authorization.
         """
         try:
-            success = auth_service.change_password(
+            success = await auth_service.change_password(
                 user_id=current_user.id,
                 current_password=password_data.current_password,
                 new_password=password_data.new_password
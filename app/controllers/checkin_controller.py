@@ -1,13 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from typing import List, Optional
 from datetime import date
 
 from app.models.checkin import (
     CheckIn, CheckInCreate, CheckInUpdate, CheckInWithDetails,
-    CheckOutRequest, CurrentGuestView, CheckInStatus
+    CheckOutRequest, CurrentGuestView, CheckInStatus,
+    BulkCheckInRequest, BulkCheckInResponse, BulkCheckOutRequest, BulkCheckOutSummary
 )
 from app.services.checkin_service import checkin_service
 from app.models.action_log import ActionType
+from app.utils.pagination import InvalidCursorError, set_next_cursor
 
 
 class CheckInController:
@@ -18,6 +20,8 @@ class CheckInController:
     def setup_routes(self):
         self.router.add_api_route("/check-in", self.check_in_guest, methods=["POST"], response_model=CheckIn)
         self.router.add_api_route("/check-out", self.check_out_guest, methods=["POST"], response_model=CheckIn)
+        self.router.add_api_route("/bulk-check-in", self.bulk_check_in, methods=["POST"], response_model=BulkCheckInResponse)
+        self.router.add_api_route("/bulk-check-out", self.bulk_check_out, methods=["POST"], response_model=BulkCheckOutSummary)
         
         self.router.add_api_route("/", self.get_all_check_ins, methods=["GET"], response_model=List[CheckInWithDetails])
         self.router.add_api_route("/{check_in_id}", self.get_check_in, methods=["GET"], response_model=CheckInWithDetails)
@@ -33,7 +37,8 @@ class CheckInController:
         self, 
         guest_id: int, 
         room_id: int, 
-        check_in_date: Optional[date] = None
+        check_in_date: Optional[date] = None,
+        check_out_date: Optional[date] = None
     ) -> CheckIn:
         """
         Поселение постояльца в номер.
@@ -41,15 +46,50 @@ class CheckInController:
         - **guest_id**: ID постояльца
         - **room_id**: ID номера
         - **check_in_date**: Дата заселения (по умолчанию - сегодня)
+        - **check_out_date**: Плановая дата выезда; по ней заселение закрывает
+          групповое выселение (/bulk-check-out)
         """
         try:
-            check_in = checkin_service.check_in_guest(guest_id, room_id, check_in_date)
+            check_in = await checkin_service.check_in_guest(guest_id, room_id, check_in_date, check_out_date)
             return check_in 
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при заселении постояльца")
 
+    async def bulk_check_in(self, request: BulkCheckInRequest) -> BulkCheckInResponse:
+        """
+        Групповое заселение постояльцев (до 500 пар за запрос).
+
+        - **items**: Список пар guest_id / room_id
+        - **check_in_date**: Дата заселения (по умолчанию - сегодня)
+        - **check_out_date**: Плановая дата выезда группы
+
+        Пары, не прошедшие проверку, не заселяются; для каждой пары в ответе
+        возвращается заселение или причина отказа.
+        """
+        try:
+            return await checkin_service.bulk_check_in(request)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при групповом заселении")
+
+    async def bulk_check_out(self, request: BulkCheckOutRequest) -> BulkCheckOutSummary:
+        """
+        Выселение всех постояльцев, у которых дата выезда наступила.
+
+        - **check_out_date**: Дата (по умолчанию - сегодня); закрываются активные
+          заселения с плановой датой выезда не позже нее, дата становится
+          фактической датой выезда. Заселения без плановой даты выезда
+          не закрываются
+
+        В журнал действий добавляется одна сводная запись. То же действие
+        выполняет задание ``python -m app.jobs.checkout``.
+        """
+        try:
+            return await checkin_service.bulk_check_out(request)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при выселении постояльцев")
+
     async def check_out_guest(self, check_out_request: CheckOutRequest) -> CheckIn:
         """
         Выселение постояльца.
@@ -58,8 +98,8 @@ class CheckInController:
         - **check_out_date**: Дата выселения (по умолчанию - сегодня)
         """
         try:
-            check_in = checkin_service.check_out_guest(check_out_request)
-            # TODO: Добавить логирование действия
+            check_in = await checkin_service.check_out_guest(check_out_request)
+            # Изменение журналируется триггером log_changes (m0002).
             return check_in
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -68,11 +108,13 @@ class CheckInController:
 
     async def get_all_check_ins(
         self,
+        response: Response,
         status_filter: Optional[CheckInStatus] = Query(None, alias="status", description="Фильтр по статусу заселения"),
         date_from: Optional[date] = Query(None, description="Фильтр от даты"),
         date_to: Optional[date] = Query(None, description="Фильтр до даты"),
         skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
-        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей")
+        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor предыдущего ответа); с курсором skip не применяется")
     ) -> List[CheckInWithDetails]:
         """
         Получение списка всех заселений с фильтрацией.
@@ -82,16 +124,22 @@ class CheckInController:
         - **date_to**: Фильтр до даты заселения
         - **skip**: Количество записей для пропуска (пагинация)
         - **limit**: Максимальное количество записей
+        - **cursor**: Курсор следующей страницы; курсор для продолжения списка
+          возвращается в заголовке X-Next-Cursor; с курсором skip не применяется
         """
         try:
-            check_ins = checkin_service.get_all_check_ins(
+            check_ins = await checkin_service.get_all_check_ins(
                 status=status_filter,
                 date_from=date_from,
                 date_to=date_to,
                 skip=skip,
-                limit=limit
+                limit=limit,
+                cursor=cursor
             )
+            set_next_cursor(response, checkin_service.list_keyset, check_ins, limit)
             return check_ins
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении списка заселений")
 
@@ -102,7 +150,7 @@ class CheckInController:
         - **check_in_id**: ID заселения
         """
         try:
-            check_in = checkin_service.get_with_details(check_in_id)
+            check_in = await checkin_service.get_with_details(check_in_id)
             if not check_in:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Заселение не найдено")
             return check_in
@@ -119,7 +167,7 @@ class CheckInController:
         - **check_in_data**: Данные для обновления
         """
         try:
-            check_in = checkin_service.update(check_in_id, check_in_data)
+            check_in = await checkin_service.update(check_in_id, check_in_data)
             if not check_in:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Заселение не найдено")
             return check_in
@@ -137,7 +185,7 @@ class CheckInController:
         - **check_in_id**: ID заселения
         """
         try:
-            check_in = checkin_service.cancel_check_in(check_in_id)
+            check_in = await checkin_service.cancel_check_in(check_in_id)
             if not check_in:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Заселение не найдено")
             return check_in
@@ -154,7 +202,7 @@ class CheckInController:
         с подробной информацией о номерах и предыдущих заселениях.
         """
         try:
-            guests = checkin_service.get_current_guests()
+            guests = await checkin_service.get_current_guests()
             return guests
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении списка текущих гостей")
@@ -166,7 +214,7 @@ class CheckInController:
         - **guest_id**: ID постояльца
         """
         try:
-            check_ins = checkin_service.get_guest_check_ins(guest_id)
+            check_ins = await checkin_service.get_guest_check_ins(guest_id)
             return check_ins
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении истории заселений постояльца")
@@ -178,7 +226,7 @@ class CheckInController:
         - **room_id**: ID номера
         """
         try:
-            check_ins = checkin_service.get_room_check_ins(room_id)
+            check_ins = await checkin_service.get_room_check_ins(room_id)
             return check_ins
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении истории заселений номера")
@@ -201,7 +249,7 @@ class CheckInController:
         - Среднюю продолжительность проживания
         """
         try:
-            stats = checkin_service.get_occupancy_statistics(date_from, date_to)
+            stats = await checkin_service.get_occupancy_statistics(date_from, date_to)
             return stats
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении статистики")
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from typing import List, Optional
 from datetime import date
 
 from app.models.guest import (
-    Guest, GuestCreate, GuestUpdate, GuestSearchResult, GuestWithRoom
+    Guest, GuestAutocompleteItem, GuestCreate, GuestUpdate, GuestSearchResult, GuestWithRoom
 )
 from app.services.guest_service import guest_service
 from app.models.action_log import ActionType
+from app.utils.pagination import InvalidCursorError, set_next_cursor
 
 
 class GuestController:
@@ -17,12 +18,14 @@ class GuestController:
     def setup_routes(self):
         self.router.add_api_route("/", self.create_guest, methods=["POST"], response_model=Guest)
         self.router.add_api_route("/", self.get_guests, methods=["GET"], response_model=List[Guest])
+        self.router.add_api_route("/autocomplete", self.autocomplete, methods=["GET"], response_model=List[GuestAutocompleteItem])
         self.router.add_api_route("/{guest_id}", self.get_guest, methods=["GET"], response_model=Guest)
         self.router.add_api_route("/{guest_id}", self.update_guest, methods=["PUT"], response_model=Guest)
         self.router.add_api_route("/{guest_id}", self.delete_guest, methods=["DELETE"])
         
         self.router.add_api_route("/search/passport/{passport_number}", self.search_by_passport, methods=["GET"], response_model=GuestWithRoom)
         self.router.add_api_route("/search/name", self.search_by_name, methods=["GET"], response_model=List[GuestSearchResult])
+        self.router.add_api_route("/search/translit", self.search_transliterated, methods=["GET"], response_model=List[GuestSearchResult])
         self.router.add_api_route("/filter", self.filter_guests, methods=["GET"], response_model=List[GuestSearchResult])
         
         self.router.add_api_route("/current", self.get_current_guests, methods=["GET"], response_model=List[GuestWithRoom])
@@ -44,7 +47,7 @@ class GuestController:
         - **how_heard_about_us**: Откуда узнал о гостинице (опционально)
         """
         try:
-            guest = guest_service.create(guest_data)
+            guest = await guest_service.create(guest_data)
             return guest
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -53,18 +56,25 @@ class GuestController:
 
     async def get_guests(
         self, 
+        response: Response,
         skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
-        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей")
+        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor предыдущего ответа); с курсором skip не применяется")
     ) -> List[Guest]:
         """
         Просмотр всех зарегистрированных постояльцев.
         
         - **skip**: Количество записей для пропуска (пагинация)
         - **limit**: Максимальное количество записей
+        - **cursor**: Курсор следующей страницы; курсор для продолжения списка
+          возвращается в заголовке X-Next-Cursor; с курсором skip не применяется
         """
         try:
-            guests = guest_service.get_all(skip=skip, limit=limit)
+            guests = await guest_service.get_all(skip=skip, limit=limit, cursor=cursor)
+            set_next_cursor(response, guest_service.list_keyset, guests, limit)
             return guests
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении списка постояльцев")
 
@@ -75,7 +85,7 @@ class GuestController:
         - **guest_id**: ID постояльца
         """
         try:
-            guest = guest_service.get_by_id(guest_id)
+            guest = await guest_service.get_by_id(guest_id)
             if not guest:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Постоялец не найден")
             return guest
@@ -92,10 +102,10 @@ class GuestController:
         - **guest_data**: Данные для обновления
         """
         try:
-            guest = guest_service.update(guest_id, guest_data)
+            guest = await guest_service.update(guest_id, guest_data)
             if not guest:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Постоялец не найден")
-            # TODO: Добавить логирование действия
+            # Изменение журналируется триггером log_changes (m0002).
             return guest
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -111,10 +121,10 @@ class GuestController:
         - **guest_id**: ID постояльца
         """
         try:
-            success = guest_service.delete(guest_id)
+            success = await guest_service.delete(guest_id)
             if not success:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Постоялец не найден")
-            # TODO: Добавить логирование действия
+            # Изменение журналируется триггером log_changes (m0002).
             return {"message": "Постоялец успешно удален"}
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -131,7 +141,7 @@ class GuestController:
         - **passport_number**: Номер паспорта в формате NNNN-NNNNNN
         """
         try:
-            guest = guest_service.get_by_passport(passport_number)
+            guest = await guest_service.get_by_passport(passport_number)
             if not guest:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Постоялец с указанным паспортом не найден")
             return guest
@@ -144,7 +154,9 @@ class GuestController:
         self,
         last_name: Optional[str] = Query(None, description="Фамилия"),
         first_name: Optional[str] = Query(None, description="Имя"), 
-        middle_name: Optional[str] = Query(None, description="Отчество")
+        middle_name: Optional[str] = Query(None, description="Отчество"),
+        fuzzy: bool = Query(False, description="Нечеткий поиск с сортировкой по сходству"),
+        limit: Optional[int] = Query(None, ge=1, le=200, description="Максимальное количество записей")
     ) -> List[GuestSearchResult]:
         """
         Поиск постояльца по ФИО.
@@ -153,16 +165,58 @@ class GuestController:
         - **last_name**: Фамилия (частичное совпадение)
         - **first_name**: Имя (частичное совпадение)
         - **middle_name**: Отчество (частичное совпадение)
+        - **fuzzy**: Искать похожие написания (опечатки); в ответе заполняется поле similarity
+        - **limit**: Максимальное количество записей (по умолчанию: обычный поиск -
+          без ограничения, нечеткий - 50)
         """
         if not any([last_name, first_name, middle_name]):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Необходимо указать хотя бы одно поле для поиска")
         
         try:
-            guests = guest_service.search_by_name(last_name, first_name, middle_name)
+            guests = await guest_service.search_by_name(last_name, first_name, middle_name, fuzzy, limit)
             return guests
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при поиске постояльцев")
 
+    async def search_transliterated(
+        self,
+        q: str = Query(..., min_length=1, description="ФИО или его часть кириллицей или латиницей"),
+        phonetic: bool = Query(False, description="Учитывать похожее звучание"),
+        limit: int = Query(50, ge=1, le=200, description="Максимальное количество записей")
+    ) -> List[GuestSearchResult]:
+        """
+        Поиск постояльца по ФИО независимо от алфавита: "Ivanov" находит "Иванов".
+
+        - **q**: ФИО или его часть (каждое слово - частичное совпадение)
+        - **phonetic**: Находить также похожие по звучанию написания ("Cvetkova" - "Цветкова")
+        - **limit**: Максимальное количество записей
+        """
+        if not q.split():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Необходимо указать хотя бы одно поле для поиска")
+
+        try:
+            return await guest_service.search_transliterated(q, phonetic, limit)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при поиске постояльцев")
+
+    async def autocomplete(
+        self,
+        q: str = Query(..., min_length=1, description="Начало фамилии, имени или номера паспорта"),
+        limit: int = Query(10, ge=1, le=50, description="Максимальное количество подсказок")
+    ) -> List[GuestAutocompleteItem]:
+        """
+        Подсказки при вводе ФИО или паспорта на стойке регистрации.
+        Обслуживается из индекса в памяти; индекс перечитывается из базы
+        данных раз в GUEST_INDEX_REFRESH_SECONDS секунд.
+
+        - **q**: Начало фамилии, имени или номера паспорта (несколько слов - все должны совпасть)
+        - **limit**: Максимальное количество подсказок
+        """
+        try:
+            return await guest_service.autocomplete(q, limit)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при поиске постояльцев")
+
     async def filter_guests(
         self,
         room_number: Optional[str] = Query(None, description="Номер гостиничного номера"),
@@ -184,7 +238,7 @@ class GuestController:
         - **limit**: Пагинация - максимальное количество записей
         """
         try:
-            guests = guest_service.filter_guests(
+            guests = await guest_service.filter_guests(
                 room_number=room_number,
                 check_in_date=check_in_date,
                 passport_number=passport_number,
@@ -202,7 +256,7 @@ class GuestController:
         Возвращает постояльцев, которые в данный момент заселены в номера.
         """
         try:
-            guests = guest_service.get_current_guests()
+            guests = await guest_service.get_current_guests()
             return guests
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении списка текущих постояльцев")
@@ -217,7 +271,7 @@ class GuestController:
         - Статистику по источникам информации о гостинице
         """
         try:
-            stats = guest_service.get_guest_statistics()
+            stats = await guest_service.get_guest_statistics()
             return stats
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении статистики")
@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends
+
+from app.core.auth import require_admin
+from app.core.middleware import route_latency_ms
+from app.db.database import DBSession
+from app.services.action_log_writer import action_log_writer
+from app.services.auth_service import auth_service
+from app.services.guest_service import guest_service
+from app.services.room_service import room_service
+from app.utils.security import password_hasher
+
+
+class HealthController:
+    def __init__(self):
+        self.router = APIRouter()
+        self.setup_routes()
+
+    def setup_routes(self):
+        # Без аутентификации доступна только проверка доступности (liveness);
+        # метрики нагрузки - только администраторам.
+        admin_only = [Depends(require_admin)]
+        self.router.add_api_route("", self.health, methods=["GET"])
+        self.router.add_api_route("/db", self.get_db_pool_stats, methods=["GET"], dependencies=admin_only)
+        self.router.add_api_route("/cache", self.get_cache_stats, methods=["GET"], dependencies=admin_only)
+        self.router.add_api_route("/routes", self.get_route_latency, methods=["GET"], dependencies=admin_only)
+        self.router.add_api_route("/password-hashing", self.get_password_hashing_stats, methods=["GET"], dependencies=admin_only)
+        self.router.add_api_route("/guest-index", self.get_guest_index_stats, methods=["GET"], dependencies=admin_only)
+        self.router.add_api_route("/availability", self.get_availability_stats, methods=["GET"], dependencies=admin_only)
+        self.router.add_api_route("/action-log", self.get_action_log_writer_stats, methods=["GET"], dependencies=admin_only)
+
+    async def health(self):
+        """
+        Проверка доступности сервиса.
+        """
+        return {"status": "ok"}
+
+    async def get_db_pool_stats(self):
+        """
+        Статистика пулов соединений с базой данных.
+
+        Для каждого пула (sync/async) возвращает:
+        - Размер пула, занятые и свободные соединения
+        - Количество ожидающих запросов
+        - Количество выдач соединений и неудачных попыток
+        - Гистограмму времени ожидания соединения (мс)
+        """
+        return DBSession.get_pool_stats()
+
+    async def get_cache_stats(self):
+        """
+        Статистика кеша пользователей (роль и права для аутентификации).
+
+        Возвращает размер кеша, число попаданий и промахов,
+        вытеснений и долю попаданий.
+        """
+        return {"users": auth_service.get_cache_stats()}
+
+    async def get_route_latency(self):
+        """
+        Время обработки запросов по маршрутам.
+
+        Ключ - метод и шаблон пути маршрута (например, ``GET /api/v1/guests/{guest_id}``),
+        значение - гистограмма времени ответа (мс) с p50/p95/p99.
+        Запросы, не сопоставленные ни одному маршруту, собираются под ``<unmatched>``.
+        """
+        return route_latency_ms.snapshot()
+
+    async def get_password_hashing_stats(self):
+        """
+        Статистика пула хеширования паролей.
+
+        Возвращает число потоков, запросов в работе и в очереди,
+        количество пересчитанных при входе хешей, а также гистограммы
+        ожидания в очереди и времени вычисления хеша (мс).
+        """
+        return password_hasher.stats()
+
+    async def get_guest_index_stats(self):
+        """
+        Состояние индекса автодополнения постояльцев.
+
+        Возвращает признак готовности, число постояльцев и ключей,
+        время построения индекса и гистограмму времени поиска (мс).
+        """
+        return guest_service.get_name_index_stats()
+
+    async def get_availability_stats(self):
+        """
+        Состояние индекса занятости номеров.
+
+        Возвращает число номеров и активных заселений, давность последней
+        загрузки из базы данных и гистограмму времени ответа (мс).
+        """
+        return room_service.get_availability_stats()
+
+    async def get_action_log_writer_stats(self):
+        """
+        Состояние фоновой записи журнала действий.
+
+        Возвращает число записей в буфере и его предел, число записанных
+        записей и неудачных пачек, количество ожиданий из-за заполненного
+        буфера и отброшенных записей, гистограмму времени записи пачки (мс).
+        """
+        return action_log_writer.stats()
+
+
+health_controller = HealthController()
+router = health_controller.router
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException,  Query, status
+from fastapi import APIRouter, Depends, HTTPException,  Query, Response, status
 from typing import Any, List, Optional
 from datetime import date
 
@@ -7,7 +7,11 @@ from app.models.payment import (
     ServicePayment, ServicePaymentCreate, ServicePaymentWithDetails,
     PaymentStatus, PaymentSummary
 )
+from app.models.action_log import ActionType
+from app.services.action_log_service import action_log_service
 from app.services.payment_service import payment_service
+from app.core.auth import require_admin
+from app.utils.pagination import InvalidCursorError, set_next_cursor
 
 
 
@@ -32,10 +36,16 @@ class PaymentController:
         
         self.router.add_api_route("/summary", self.get_payment_summary, methods=["GET"], response_model=PaymentSummary)
         self.router.add_api_route("/revenue/rooms", self.get_revenue_by_room, methods=["GET"])
+        self.router.add_api_route(
+            "/revenue/rebuild",
+            self.rebuild_revenue_rollup,
+            methods=["POST"],
+            dependencies=[Depends(require_admin)]
+        )
 
     async def create_room_payment(self, payment_data: RoomPaymentCreate) -> RoomPayment:
         try:
-            payment = payment_service.create_room_payment(payment_data)
+            payment = await payment_service.create_room_payment(payment_data)
             return payment
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -56,8 +66,10 @@ class PaymentController:
         - **status**: Статус платежа
         """
         try:
-            payment = payment_service.create_service_payment(payment_data)
-            # TODO: Добавить логирование действия
+            payment = await payment_service.create_service_payment(payment_data)
+            await action_log_service.log_action(
+                ActionType.PAYMENT, "service_payments", payment.id, new_values=payment.model_dump(mode="json")
+            )
             return payment
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -66,11 +78,13 @@ class PaymentController:
 
     async def get_room_payments(
         self,
+        response: Response,
         status_filter: Optional[PaymentStatus] = Query(None, alias="status", description="Фильтр по статусу платежа"),
         date_from: Optional[date] = Query(None, description="Фильтр от даты"),
         date_to: Optional[date] = Query(None, description="Фильтр до даты"),
         skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
-        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей")
+        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor предыдущего ответа); с курсором skip не применяется")
     ) -> List[RoomPaymentWithDetails]:
         """
         Получение всех платежей за номера с фильтрацией.
@@ -80,26 +94,34 @@ class PaymentController:
         - **date_to**: Фильтр до даты платежа
         - **skip**: Количество записей для пропуска (пагинация)
         - **limit**: Максимальное количество записей
+        - **cursor**: Курсор следующей страницы; курсор для продолжения списка
+          возвращается в заголовке X-Next-Cursor; с курсором skip не применяется
         """
         try:
-            payments = payment_service.get_all_room_payments(
+            payments = await payment_service.get_all_room_payments(
                 status=status_filter,
                 date_from=date_from,
                 date_to=date_to,
                 skip=skip,
-                limit=limit
+                limit=limit,
+                cursor=cursor
             )
+            set_next_cursor(response, payment_service.room_payments_keyset, payments, limit)
             return payments
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении платежей за номера")
 
     async def get_service_payments(
         self,
+        response: Response,
         status_filter: Optional[PaymentStatus] = Query(None, alias="status", description="Фильтр по статусу платежа"),
         date_from: Optional[date] = Query(None, description="Фильтр от даты"),
         date_to: Optional[date] = Query(None, description="Фильтр до даты"),
         skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
-        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей")
+        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor предыдущего ответа); с курсором skip не применяется")
     ) -> List[ServicePaymentWithDetails]:
         """
         Получение всех платежей за услуги с фильтрацией.
@@ -109,16 +131,22 @@ class PaymentController:
         - **date_to**: Фильтр до даты платежа
         - **skip**: Количество записей для пропуска (пагинация)
         - **limit**: Максимальное количество записей
+        - **cursor**: Курсор следующей страницы; курсор для продолжения списка
+          возвращается в заголовке X-Next-Cursor; с курсором skip не применяется
         """
         try:
-            payments = payment_service.get_all_service_payments(
+            payments = await payment_service.get_all_service_payments(
                 status=status_filter,
                 date_from=date_from,
                 date_to=date_to,
                 skip=skip,
-                limit=limit
+                limit=limit,
+                cursor=cursor
             )
+            set_next_cursor(response, payment_service.service_payments_keyset, payments, limit)
             return payments
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении платежей за услуги")
 
@@ -129,7 +157,7 @@ class PaymentController:
         - **payment_id**: ID платежа
         """
         try:
-            payment = payment_service.get_room_payment_with_details(payment_id)
+            payment = await payment_service.get_room_payment_with_details(payment_id)
             if not payment:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Платеж не найден")
             return payment
@@ -145,7 +173,7 @@ class PaymentController:
         - **payment_id**: ID платежа
         """
         try:
-            payment = payment_service.get_service_payment_with_details(payment_id)
+            payment = await payment_service.get_service_payment_with_details(payment_id)
             if not payment:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Платеж не найден")
             return payment
@@ -162,10 +190,10 @@ class PaymentController:
         - **new_status**: Новый статус платежа
         """
         try:
-            payment = payment_service.update_room_payment_status(payment_id, new_status)
+            payment = await payment_service.update_room_payment_status(payment_id, new_status)
             if not payment:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Платеж не найден")
-            # TODO: Добавить логирование действия
+            # Изменение журналируется триггером log_changes (m0002).
             return payment
         except HTTPException:
             raise
@@ -180,10 +208,12 @@ class PaymentController:
         - **new_status**: Новый статус платежа
         """
         try:
-            payment = payment_service.update_service_payment_status(payment_id, new_status)
+            payment = await payment_service.update_service_payment_status(payment_id, new_status)
             if not payment:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Платеж не найден")
-            # TODO: Добавить логирование действия
+            await action_log_service.log_action(
+                ActionType.PAYMENT, "service_payments", payment_id, new_values={"status": new_status.value}
+            )
             return payment
         except HTTPException:
             raise
@@ -197,7 +227,7 @@ class PaymentController:
         - **check_in_id**: ID заселения
         """
         try:
-            payments = payment_service.get_room_payments_by_check_in(check_in_id)
+            payments = await payment_service.get_room_payments_by_check_in(check_in_id)
             return payments
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении платежей за заселение")
@@ -209,7 +239,7 @@ class PaymentController:
         - **guest_id**: ID гостя
         """
         try:
-            payments = payment_service.get_service_payments_by_guest(guest_id)
+            payments = await payment_service.get_service_payments_by_guest(guest_id)
             return payments
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении платежей гостя")
@@ -231,7 +261,7 @@ class PaymentController:
         - Средние суммы платежей
         """
         try:
-            summary = payment_service.get_payment_summary(date_from, date_to)
+            summary = await payment_service.get_payment_summary(date_from, date_to)
             return summary
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении сводки платежей")
@@ -251,10 +281,24 @@ class PaymentController:
         Возвращает доходы по каждому номеру с количеством платежей и проданными днями.
         """
         try:
-            revenue_data: List[dict[Any, Any]] = payment_service.get_revenue_by_room(date_from, date_to)
+            revenue_data: List[dict[Any, Any]] = await payment_service.get_revenue_by_room(date_from, date_to)
             return revenue_data
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении отчета по доходам")
 
+    async def rebuild_revenue_rollup(self) -> dict[str, Any]:
+        """
+        Полный пересчет дневных итогов выручки (revenue_daily).
+        
+        Итоги обновляются триггерами при каждом изменении платежей; пересчет
+        нужен после ручной правки данных или восстановления из резервной копии.
+        
+        Возвращает число строк итогов и диапазон дней.
+        """
+        try:
+            return await payment_service.rebuild_revenue_rollup()
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при пересчете итогов выручки")
+
 
 router = PaymentController().router
\ No newline at end of file
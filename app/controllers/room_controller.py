@@ -1,12 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from typing import List, Optional
 from datetime import date
 
 from app.models.room import (
-    Room, RoomCreate, RoomUpdate, RoomType, RoomWithType, RoomAvailability
+    Room, RoomCreate, RoomUpdate, RoomType, RoomWithType, RoomAvailability, AvailabilityCalendar
 )
 from app.services.room_service import room_service
 from app.models.action_log import ActionType
+from app.utils.pagination import InvalidCursorError, set_next_cursor
 
 
 class RoomController:
@@ -20,18 +21,19 @@ class RoomController:
         
         self.router.add_api_route("/", self.create_room, methods=["POST"], response_model=Room)
         self.router.add_api_route("/", self.get_rooms, methods=["GET"], response_model=List[RoomWithType])
+        self.router.add_api_route("/available", self.get_available_rooms, methods=["GET"], response_model=List[RoomAvailability])
+        self.router.add_api_route("/calendar", self.get_availability_calendar, methods=["GET"], response_model=AvailabilityCalendar)
         self.router.add_api_route("/{room_id}", self.get_room, methods=["GET"], response_model=Room)
         self.router.add_api_route("/{room_id}", self.update_room, methods=["PUT"], response_model=Room)
         self.router.add_api_route("/{room_id}", self.delete_room, methods=["DELETE"])
         
-        self.router.add_api_route("/available", self.get_available_rooms, methods=["GET"], response_model=List[RoomAvailability])
         self.router.add_api_route("/number/{room_number}", self.get_room_by_number, methods=["GET"], response_model=Room)
         self.router.add_api_route("/{room_id}/availability", self.set_room_availability, methods=["PATCH"], response_model=Room)
         self.router.add_api_route("/statistics", self.get_room_statistics, methods=["GET"])
 
     async def create_room_type(self, code: str, name: str, description: Optional[str] = None) -> RoomType:
         try:
-            room_type = room_service.create_room_type(code, name, description)
+            room_type = await room_service.create_room_type(code, name, description)
             return room_type
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -40,14 +42,14 @@ class RoomController:
 
     async def get_room_types(self) -> List[RoomType]:
         try:
-            room_types = room_service.get_room_types()
+            room_types = await room_service.get_room_types()
             return room_types
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении типов номеров")
 
     async def create_room(self, room_data: RoomCreate) -> Room:
         try:
-            room = room_service.create_room(room_data)
+            room = await room_service.create_room(room_data)
             return room
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -56,18 +58,23 @@ class RoomController:
 
     async def get_rooms(
         self, 
+        response: Response,
         skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
-        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей")
+        limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor предыдущего ответа); с курсором skip не применяется")
     ) -> List[RoomWithType]:
         try:
-            rooms = room_service.get_all(skip=skip, limit=limit)
+            rooms = await room_service.get_all(skip=skip, limit=limit, cursor=cursor)
+            set_next_cursor(response, room_service.list_keyset, rooms, limit)
             return rooms
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении списка номеров")
 
     async def get_room(self, room_id: int) -> Room:
         try:
-            room = room_service.get_by_id(room_id)
+            room = await room_service.get_by_id(room_id)
             if not room:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Номер не найден")
             return room
@@ -78,7 +85,7 @@ class RoomController:
 
     async def get_room_by_number(self, room_number: str) -> Room:
         try:
-            room = room_service.get_by_number(room_number)
+            room = await room_service.get_by_number(room_number)
             if not room:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Номер не найден")
             return room
@@ -89,7 +96,7 @@ class RoomController:
 
     async def update_room(self, room_id: int, room_data: RoomUpdate) -> Room:
         try:
-            room = room_service.update(room_id, room_data)
+            room = await room_service.update(room_id, room_data)
             if not room:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Номер не найден")
             return room
@@ -102,7 +109,7 @@ class RoomController:
 
     async def delete_room(self, room_id: int):
         try:
-            success = room_service.delete(room_id)
+            success = await room_service.delete(room_id)
             if not success:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Номер не найден")
             return {"message": "Номер успешно удален"}
@@ -122,16 +129,35 @@ class RoomController:
             if check_in_date and check_out_date and check_in_date >= check_out_date:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Дата заселения должна быть раньше даты выселения")
             
-            rooms = room_service.get_available_rooms(check_in_date, check_out_date)
+            rooms = await room_service.get_available_rooms(check_in_date, check_out_date)
             return rooms
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении доступных номеров")
 
+    async def get_availability_calendar(
+        self,
+        date_from: Optional[date] = Query(None, description="Первый день периода (по умолчанию - сегодня)"),
+        days: int = Query(30, ge=1, le=366, description="Количество дней")
+    ) -> AvailabilityCalendar:
+        """
+        Шахматка занятости: все номера по дням периода.
+
+        Для каждого номера возвращаются интервалы [start, end) с одинаковым
+        состоянием (Свободен, Частично занят, Занят, Недоступен) и числом проживающих.
+
+        - **date_from**: Первый день периода (по умолчанию - сегодня)
+        - **days**: Количество дней (до 366)
+        """
+        try:
+            return await room_service.get_availability_calendar(date_from or date.today(), days)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при построении шахматки")
+
     async def set_room_availability(self, room_id: int, is_available: bool) -> Room:
         try:
-            room = room_service.set_availability(room_id, is_available)
+            room = await room_service.set_availability(room_id, is_available)
             if not room:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Номер не найден")
             
@@ -144,7 +170,7 @@ class RoomController:
 
     async def get_room_statistics(self):
         try:
-            stats = room_service.get_room_statistics()
+            stats = await room_service.get_room_statistics()
             return stats
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении статистики")
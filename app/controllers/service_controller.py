@@ -34,7 +34,7 @@ class ServiceController:
 
     async def create_service_type(self, service_type_data: ServiceTypeCreate) -> ServiceType:
         try:
-            service_type = service_service.create_service_type(service_type_data)
+            service_type = await service_service.create_service_type(service_type_data)
             return service_type
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -43,14 +43,14 @@ class ServiceController:
 
     async def get_service_types(self) -> List[ServiceType]:
         try:
-            service_types = service_service.get_service_types()
+            service_types = await service_service.get_service_types()
             return service_types
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении типов услуг")
 
     async def update_service_type(self, type_id: int, service_type_data: ServiceTypeUpdate) -> ServiceType:
         try:
-            service_type = service_service.update_service_type(type_id, service_type_data)
+            service_type = await service_service.update_service_type(type_id, service_type_data)
             if not service_type:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Тип услуги не найден")
             return service_type
@@ -63,7 +63,7 @@ class ServiceController:
 
     async def delete_service_type(self, type_id: int):
         try:
-            success = service_service.delete_service_type(type_id)
+            success = await service_service.delete_service_type(type_id)
             if not success:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Тип услуги не найден")
             return {"message": "Тип услуги успешно удален"}
@@ -76,7 +76,7 @@ class ServiceController:
 
     async def create_service(self, service_data: ServiceCreate) -> Service:
         try:
-            service = service_service.create_service(service_data)
+            service = await service_service.create_service(service_data)
             return service
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -91,7 +91,7 @@ class ServiceController:
         limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей")
     ) -> List[ServiceWithType]:
         try:
-            services = service_service.get_all_services(
+            services = await service_service.get_all_services(
                 type_id=type_id,
                 is_available=is_available,
                 skip=skip,
@@ -103,7 +103,7 @@ class ServiceController:
 
     async def get_service(self, service_id: int) -> ServiceWithType:
         try:
-            service = service_service.get_service_with_type(service_id)
+            service = await service_service.get_service_with_type(service_id)
             if not service:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Услуга не найдена")
             return service
@@ -114,7 +114,7 @@ class ServiceController:
 
     async def update_service(self, service_id: int, service_data: ServiceUpdate) -> Service:
         try:
-            service = service_service.update(service_id, service_data)
+            service = await service_service.update(service_id, service_data)
             if not service:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Услуга не найдена")
             return service
@@ -127,7 +127,7 @@ class ServiceController:
 
     async def delete_service(self, service_id: int):
         try:
-            success = service_service.delete(service_id)
+            success = await service_service.delete(service_id)
             if not success:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Услуга не найдена")
             return {"message": "Услуга успешно удалена"}
@@ -140,14 +140,14 @@ class ServiceController:
 
     async def get_services_by_type(self, type_name: str) -> List[ServiceWithType]:
         try:
-            services = service_service.get_services_by_type(type_name)
+            services = await service_service.get_services_by_type(type_name)
             return services
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении услуг по типу")
 
     async def set_service_availability(self, service_id: int, is_available: bool) -> Service:
         try:
-            service = service_service.set_availability(service_id, is_available)
+            service = await service_service.set_availability(service_id, is_available)
             if not service:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Услуга не найдена")
             
@@ -164,7 +164,7 @@ class ServiceController:
         date_to: Optional[date] = Query(None, description="Статистика до даты")
     ) -> List[ServiceUsageStats]:
         try:
-            stats = service_service.get_service_usage_stats(date_from, date_to)
+            stats = await service_service.get_service_usage_stats(date_from, date_to)
             return stats
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении статистики использования")
@@ -175,7 +175,7 @@ class ServiceController:
         date_to: Optional[date] = Query(None, description="Период отчета до даты")
     ) -> List[ServiceRevenueReport]:
         try:
-            report = service_service.get_service_revenue_report(date_from, date_to)
+            report = await service_service.get_service_revenue_report(date_from, date_to)
             return report
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при формировании отчета по услугам")
@@ -185,7 +185,7 @@ class ServiceController:
         limit: int = Query(10, ge=1, le=50, description="Количество услуг в топе")
     ):
         try:
-            popular_services = service_service.get_popular_services(limit)
+            popular_services = await service_service.get_popular_services(limit)
             return popular_services
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении популярных услуг")
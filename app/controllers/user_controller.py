@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, status
 from typing import List
 
-from app.models.user import User, UserCreate, UserUpdate, UserInDB
+from app.models.user import UserCreate, UserUpdate, UserInDB
 from app.models.auth import CreateUserRequest, UserInfo
 from app.services.user_service import user_service
 from app.core.auth import require_admin, get_current_user
@@ -26,7 +26,7 @@ class UserController:
         current_user: UserInfo = Depends(require_admin)
     ) -> UserInDB:
         try:
-            user = user_service.create(
+            user = await user_service.create(
                 username=user_data.username,
                 password=user_data.password,
                 role_id=user_data.role_id,
@@ -45,7 +45,7 @@ class UserController:
         current_user: UserInfo = Depends(require_admin)
     ) -> List[UserInDB]:
         try:
-            users = user_service.get_all(skip=skip, limit=limit)
+            users = await user_service.get_all(skip=skip, limit=limit)
             return users
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка при получении списка пользователей")
@@ -56,7 +56,7 @@ class UserController:
         current_user: UserInfo = Depends(require_admin)
     ) -> UserInDB:
         try:
-            user = user_service.get_by_id(user_id)
+            user = await user_service.get_by_id(user_id)
             if not user:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден")
             return user
@@ -72,7 +72,7 @@ class UserController:
         current_user: UserInfo = Depends(require_admin)
     ) -> UserInDB:
         try:
-            user = user_service.update(user_id, **user_data.dict(exclude_unset=True))
+            user = await user_service.update(user_id, **user_data.dict(exclude_unset=True))
             if not user:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден")
             return user
@@ -95,7 +95,7 @@ class UserController:
                     detail="Нельзя удалить самого себя"
                 )
             
-            success = user_service.delete(user_id)
+            success = await user_service.delete(user_id)
             if not success:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден")
             return {"message": "Пользователь успешно удален"}
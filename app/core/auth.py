@@ -1,5 +1,5 @@
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.models.auth import UserInfo, Permissions
@@ -7,10 +7,29 @@ from app.services.auth_service import auth_service
 
 security = HTTPBearer()
 
+
+async def resolve_request_user(request: Request, token: str) -> Optional[UserInfo]:
+    """
+    Пользователь запроса по токену.
+
+    Токен проверяется и пользователь загружается один раз за запрос:
+    результат сохраняется в request.state и используется повторно
+    middleware и всеми зависимостями авторизации.
+    """
+    if getattr(request.state, "auth_token", None) == token:
+        return request.state.user
+
+    user = await auth_service.get_current_user_from_token(token)
+    request.state.auth_token = token
+    request.state.user = user
+    return user
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> UserInfo:
-    user = auth_service.get_current_user_from_token(credentials.credentials)
+    user = await resolve_request_user(request, credentials.credentials)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -21,16 +40,17 @@ async def get_current_user(
 
 
 async def get_current_user_from_token(token: str) -> Optional[UserInfo]:
-    return auth_service.get_current_user_from_token(token)
+    return await auth_service.get_current_user_from_token(token)
 
 
 async def get_optional_user(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[UserInfo]:
     if not credentials:
         return None
     
-    return auth_service.get_current_user_from_token(credentials.credentials)
+    return await resolve_request_user(request, credentials.credentials)
 
 
 def require_permission(permission: str):
@@ -86,4 +106,8 @@ async def can_generate_reports(current_user: UserInfo = Depends(require_permissi
 
 
 async def can_view_logs(current_user: UserInfo = Depends(require_permission(Permissions.READ_ACTION_LOGS))):
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def can_export_logs(current_user: UserInfo = Depends(require_permission(Permissions.EXPORT_ACTION_LOGS))):
+    return current_user
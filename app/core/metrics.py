@@ -0,0 +1,96 @@
+"""
+Простые внутрипроцессные метрики: счетчики и гистограммы.
+"""
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, Iterable, Optional
+
+DEFAULT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (значения в миллисекундах)."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_MS_BUCKETS) -> None:
+        self.buckets: tuple = tuple(sorted(buckets))
+        self._counts: list[int] = [0] * (len(self.buckets) + 1)
+        self._count: int = 0
+        self._sum: float = 0.0
+        self._max: float = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counts = list(self._counts)
+            count, total, maximum = self._count, self._sum, self._max
+
+        buckets = {f"le_{bound:g}": counts[i] for i, bound in enumerate(self.buckets)}
+        buckets["le_inf"] = counts[-1]
+        return {
+            "count": count,
+            "sum": round(total, 3),
+            "avg": round(total / count, 3) if count else 0.0,
+            "max": round(maximum, 3),
+            "p50": self._quantile(counts, count, 0.5),
+            "p95": self._quantile(counts, count, 0.95),
+            "p99": self._quantile(counts, count, 0.99),
+            "buckets": buckets,
+        }
+
+    def _quantile(self, counts: list[int], count: int, q: float) -> Optional[float]:
+        """Верхняя граница корзины, в которую попадает квантиль q."""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+
+class Counter:
+    """Потокобезопасный счетчик."""
+
+    def __init__(self) -> None:
+        self._value: int = 0
+        self._lock = Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class HistogramFamily:
+    """Набор гистограмм, различающихся меткой (например, маршрутом запроса)."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_MS_BUCKETS) -> None:
+        self.buckets: tuple = tuple(buckets)
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = Lock()
+
+    def labels(self, label: str) -> Histogram:
+        histogram = self._histograms.get(label)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(label, Histogram(self.buckets))
+        return histogram
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {label: histogram.snapshot() for label, histogram in sorted(histograms.items())}
@@ -1,42 +1,101 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.services.action_log_service import action_log_service
-from app.services.auth_service import auth_service
 import logging
+import time
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.core.auth import resolve_request_user
+from app.core.metrics import HistogramFamily
+from app.db.database import UnitOfWork, current_user_id
 
 logger = logging.getLogger(__name__)
 
+route_latency_ms = HistogramFamily()
+
+
+class UserContextMiddleware:
+    """
+    Контекст запроса: единица работы с БД и текущий пользователь.
+
+    Все обращения к БД в рамках запроса идут через одно соединение и одну
+    транзакцию. Транзакция фиксируется (или откатывается при статусе >= 400)
+    в момент отправки заголовков ответа, до передачи тела. ID пользователя
+    передается в транзакцию (app.current_user_id) вместе с первым запросом
+    обработчика. Найденный пользователь сохраняется в request.state, и
+    зависимости авторизации не проверяют токен повторно.
+
+    Время обработки каждого запроса записывается в гистограмму его маршрута
+    (route_latency_ms).
+    """
+
+    skip_paths: frozenset = frozenset(
+        prefix + path
+        for prefix in ("", settings.API_PREFIX, settings.API_PREFIX + "/v1")
+        for path in ("/docs", "/redoc", "/openapi.json", "/health", "/auth/login")
+    )
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    @classmethod
+    def _is_skipped(cls, path: str) -> bool:
+        """Совпадает ли путь или один из его префиксов (по сегментам) с skip_paths."""
+        if path in cls.skip_paths:
+            return True
+
+        index = path.find("/", 1)
+        while index != -1:
+            if path[:index] in cls.skip_paths:
+                return True
+            index = path.find("/", index + 1)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        try:
+            async with UnitOfWork() as unit_of_work:
+                async def send_wrapper(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        await unit_of_work.finish(failed=message["status"] >= 400)
+                    await send(message)
+
+                user_id = await self._resolve_user_id(scope)
+                if user_id is None:
+                    await self.app(scope, receive, send_wrapper)
+                    return
+
+                context_token = current_user_id.set(user_id)
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    current_user_id.reset(context_token)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path_format", None) or "<unmatched>"
+            route_latency_ms.labels(f"{scope['method']} {route_path}").observe(
+                (time.perf_counter() - started) * 1000
+            )
+
+    async def _resolve_user_id(self, scope: Scope):
+        if self._is_skipped(scope["path"]):
+            return None
+
+        auth_header = Headers(scope=scope).get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return None
 
-class UserContextMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        skip_paths = ["/docs", "/redoc", "/openapi.json", "/health", "/auth/login"]
-        
-        if any(request.url.path.startswith(path) for path in skip_paths):
-            return await call_next(request)
-        
-        auth_header = request.headers.get("Authorization")
-        user_id = None
-        
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            try:
-                user_info = auth_service.get_current_user_from_token(token)
-                if user_info:
-                    user_id = user_info.id
-            except Exception as e:
-                logger.warning(f"Не удалось получить информацию о пользователе из токена: {e}")
-        
-        if user_id:
-            try:
-                action_log_service.set_current_user_context(user_id)
-            except Exception as e:
-                logger.error(f"Ошибка при установке контекста пользователя: {e}")
-        
-        response = await call_next(request)
-        
+        token = auth_header.split(" ")[1]
         try:
-            action_log_service.clear_user_context()
+            user_info = await resolve_request_user(Request(scope), token)
+            if user_info:
+                return user_info.id
         except Exception as e:
-            logger.error(f"Ошибка при очистке контекста пользователя: {e}")
-        
-        return response
\ No newline at end of file
+            logger.warning(f"Не удалось получить информацию о пользователе из токена: {e}")
+        return None
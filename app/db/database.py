@@ -1,32 +1,86 @@
-from typing import Any
-from app.models.user import User
-from psycopg2.pool import SimpleConnectionPool
-from psycopg2.extras import RealDictCursor
-from psycopg2 import pool
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
+from app.models.user import UserInDB
+from psycopg import Pipeline
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
 from app.config import settings
+from app.core.metrics import Counter, Histogram
+
+
+class PoolMetrics:
+    """Статистика выдачи соединений из пула."""
+
+    def __init__(self) -> None:
+        self.wait_ms = Histogram()
+        self.checkouts = Counter()
+        self.checkout_failures = Counter()
+
+    def report(self, pool: Optional[ConnectionPool | AsyncConnectionPool]) -> dict:
+        stats = pool.get_stats() if pool is not None else {}
+        size = stats.get("pool_size", 0)
+        idle = stats.get("pool_available", 0)
+        return {
+            "max_size": settings.DB_POOL_MAX_SIZE,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": stats.get("requests_waiting", 0),
+            "checkouts": self.checkouts.value,
+            "checkout_failures": self.checkout_failures.value,
+            "connections_lost": stats.get("connections_lost", 0),
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
 
 class DBSession:
-    _pool: SimpleConnectionPool = None
+    """
+    Сессия работы с базой данных.
+
+    Поддерживает два режима:
+    - ``with DBSession() as db`` - блокирующий, для скриптов и утилит;
+    - ``async with DBSession() as db`` - асинхронный, для обработчиков запросов.
+
+    В обоих случаях возвращается курсор, строки которого - словари.
+    Асинхронные сессии внутри одной единицы работы (UnitOfWork) делят
+    одно соединение и одну транзакцию.
+    Соединения выдаются из ограниченного пула: при его исчерпании запрос
+    ждет свободное соединение не дольше DB_POOL_TIMEOUT секунд.
+    """
+    _pool: ConnectionPool = None
+    _pool_lock: threading.Lock = threading.Lock()
+    _pool_metrics: PoolMetrics = PoolMetrics()
+    _async_pool: AsyncConnectionPool = None
+    _async_pool_lock: asyncio.Lock = asyncio.Lock()
+    _async_pool_metrics: PoolMetrics = PoolMetrics()
 
     def __init__(self, autocommit=True) -> None:
-        if DBSession._pool is None:
-            self._init_pool()
         self.autocommit: bool = autocommit
         self.conn = None
         self.cursor = None
+        self._own_unit_of_work: Optional[UnitOfWork] = None
 
     @classmethod
-    def _init_db(cls) -> None:
-        with DBSession() as db:
+    async def _init_db(cls) -> None:
+        from app.db.migrations import run_migrations
+        await run_migrations()
+
+        await cls._init_async_pool()
+
+        async with DBSession() as db:
             if db is None:
                 raise Exception("Подключние к базе данных не было осуществлено")
-                
-            db.execute("SELECT 1 FROM users WHERE username = %s", ("admin",))
 
-            if not db.fetchone():
+            await db.execute("SELECT 1 FROM users WHERE username = %s", ("admin",))
+
+            if not await db.fetchone():
                 from app.services import user_service
 
-                test_user: User = user_service.create(
+                test_user: UserInDB = await user_service.create(
                     username="admin",
                     password="root",
                     role_id=1,
@@ -35,36 +89,88 @@ class DBSession:
 
                 print("✅ Администратор создан: ", test_user.username)
 
+    @classmethod
+    def _conninfo(cls) -> str:
+        return make_conninfo(
+            dbname=settings.DB_NAME,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            host=settings.DB_HOST,
+            port=settings.DB_PORT
+        )
+
+    @classmethod
+    def _pool_options(cls) -> dict:
+        return {
+            "conninfo": cls._conninfo(),
+            "min_size": settings.DB_POOL_MIN_SIZE,
+            "max_size": settings.DB_POOL_MAX_SIZE,
+            "timeout": settings.DB_POOL_TIMEOUT,
+            "max_lifetime": settings.DB_POOL_MAX_LIFETIME,
+            "max_idle": settings.DB_POOL_MAX_IDLE,
+            "kwargs": {"row_factory": dict_row},
+            "open": False,
+        }
+
     @classmethod
     def _init_pool(cls) -> None:
-        try:
-            cls._pool = pool.SimpleConnectionPool(
-                minconn=1,
-                maxconn=10,
-                dbname=settings.DB_NAME,
-                user=settings.DB_USER,
-                password=settings.DB_PASSWORD,
-                host=settings.DB_HOST,
-                port=settings.DB_PORT
-            )
-            
-            conn = cls._pool.getconn()
+        with cls._pool_lock:
+            if cls._pool is not None:
+                return
+
             try:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT 1")
-                    print("✅ Подключение к базе данных успешно")
-            finally:
-                cls._pool.putconn(conn)
-        except Exception as e:
-            print(f"❌ Ошибка подключения к БД: {e}")
-            raise
+                sync_pool = ConnectionPool(check=ConnectionPool.check_connection, **cls._pool_options())
+                sync_pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT)
+                cls._pool = sync_pool
+                print("✅ Подключение к базе данных успешно")
+            except Exception as e:
+                print(f"❌ Ошибка подключения к БД: {e}")
+                raise
+
+    @classmethod
+    async def _init_async_pool(cls) -> None:
+        async with cls._async_pool_lock:
+            if cls._async_pool is not None:
+                return
+
+            try:
+                async_pool = AsyncConnectionPool(check=AsyncConnectionPool.check_connection, **cls._pool_options())
+                await async_pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT)
+                cls._async_pool = async_pool
+                print("✅ Асинхронное подключение к базе данных успешно")
+            except Exception as e:
+                print(f"❌ Ошибка подключения к БД: {e}")
+                raise
+
+    @classmethod
+    async def _close_pools(cls) -> None:
+        if cls._async_pool is not None:
+            await cls._async_pool.close()
+            cls._async_pool = None
+
+    @classmethod
+    def get_pool_stats(cls) -> dict:
+        return {
+            "sync": cls._pool_metrics.report(cls._pool),
+            "async": cls._async_pool_metrics.report(cls._async_pool),
+        }
 
     def __enter__(self) -> Any | None:
         if DBSession._pool is None:
-            raise Exception("Подключние к базе данных не было осуществлено")
+            self._init_pool()
+
+        metrics = DBSession._pool_metrics
+        started = time.perf_counter()
+        try:
+            self.conn = DBSession._pool.getconn()
+        except Exception:
+            metrics.checkout_failures.inc()
+            raise
+        finally:
+            metrics.wait_ms.observe((time.perf_counter() - started) * 1000)
+        metrics.checkouts.inc()
 
-        self.conn = DBSession._pool.getconn()
-        self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+        self.cursor = self.conn.cursor()
         return self.cursor
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -87,10 +193,238 @@ class DBSession:
             if self.conn and DBSession._pool:
                 DBSession._pool.putconn(self.conn)
 
+    @classmethod
+    async def _getconn_async(cls):
+        if cls._async_pool is None:
+            await cls._init_async_pool()
+
+        metrics = cls._async_pool_metrics
+        started = time.perf_counter()
+        try:
+            conn = await cls._async_pool.getconn()
+        except Exception:
+            metrics.checkout_failures.inc()
+            raise
+        finally:
+            metrics.wait_ms.observe((time.perf_counter() - started) * 1000)
+        metrics.checkouts.inc()
+        return conn
+
+    @classmethod
+    async def _putconn_async(cls, conn) -> None:
+        if cls._async_pool:
+            await cls._async_pool.putconn(conn)
+
+    async def __aenter__(self) -> Any | None:
+        unit_of_work = _unit_of_work.get()
+        if unit_of_work is None:
+            # Вне запроса сессия сама открывает единицу работы, чтобы вложенные
+            # вызовы сервисов использовали то же соединение.
+            unit_of_work = self._own_unit_of_work = UnitOfWork()
+            await unit_of_work.__aenter__()
+
+        try:
+            self.conn = await unit_of_work.get_connection()
+        except Exception as e:
+            if self._own_unit_of_work is not None:
+                await self._own_unit_of_work.__aexit__(type(e), e, e.__traceback__)
+            raise
+
+        self.cursor = SessionCursor(self.conn.cursor(), unit_of_work)
+        return self.cursor
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.conn is None:
+            raise Exception("Подключние к базе данных не было установлено")
+
+        try:
+            if self.cursor:
+                await self.cursor.close()
+        finally:
+            if self._own_unit_of_work is not None:
+                if not self.autocommit:
+                    self._own_unit_of_work.set_rollback_only()
+                await self._own_unit_of_work.__aexit__(exc_type, exc_val, exc_tb)
+
+
+class UnitOfWork:
+    """
+    Единица работы: одно соединение и одна транзакция.
+
+    Пока единица работы активна (в текущем контексте), все ``async with DBSession()``
+    используют ее соединение и не фиксируют транзакцию сами. Соединение берется
+    из пула при первом обращении к БД, фиксация выполняется один раз на выходе.
+    """
+
+    def __init__(self) -> None:
+        self.conn = None
+        self.rollback_only: bool = False
+        self._token = None
+        self._applied_user_id: Optional[int] = None
+        self._after_commit: List[Callable[[], None]] = []
+        self._after_rollback: List[Callable[[], None]] = []
+
+    async def get_connection(self):
+        if self.conn is None:
+            self.conn = await DBSession._getconn_async()
+        return self.conn
+
+    def set_rollback_only(self) -> None:
+        self.rollback_only = True
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Выполнить callback после фиксации транзакции (при откате - не выполнять)."""
+        self._after_commit.append(callback)
+
+    def after_rollback(self, callback: Callable[[], None]) -> None:
+        """Выполнить callback после отката транзакции (при фиксации - не выполнять)."""
+        self._after_rollback.append(callback)
+
+    def pending_user_context(self) -> Optional[tuple]:
+        """
+        Запрос установки app.current_user_id для триггеров аудита, если
+        пользователь текущего контекста еще не передан в эту транзакцию.
+        """
+        user_id = current_user_id.get()
+        if user_id == self._applied_user_id:
+            return None
+
+        self._applied_user_id = user_id
+        return (
+            "SELECT set_config('app.current_user_id', %s, true)",
+            (str(user_id) if user_id is not None else "",)
+        )
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self._token = _unit_of_work.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        _unit_of_work.reset(self._token)
+        await self.finish(failed=exc_type is not None)
+
+    async def finish(self, failed: bool = False) -> None:
+        """
+        Фиксирует (или откатывает) транзакцию и возвращает соединение в пул,
+        не дожидаясь выхода из единицы работы. Если после этого снова
+        понадобится БД, будет взято новое соединение.
+        """
+        callbacks, self._after_commit = self._after_commit, []
+        rollback_callbacks, self._after_rollback = self._after_rollback, []
+        committed = not failed and not self.rollback_only
+        if self.conn is not None:
+            try:
+                if committed:
+                    await self.conn.commit()
+                else:
+                    await self.conn.rollback()
+            except Exception as e:
+                print(f"❌ Ошибка транзакции: {e}")
+                await self.conn.rollback()
+                for callback in rollback_callbacks:
+                    callback()
+                raise
+            finally:
+                await DBSession._putconn_async(self.conn)
+                self.conn = None
+                self._applied_user_id = None
+
+        for callback in callbacks if committed else rollback_callbacks:
+            callback()
+
+    async def release(self) -> None:
+        """
+        Возвращает соединение в пул, не завершая единицу работы: транзакция
+        откатывается, следующее обращение к БД возьмет соединение заново и
+        начнет новую транзакцию, которая будет зафиксирована на выходе.
+        Допустимо, только пока единица работы лишь читала данные.
+        """
+        if self._after_commit:
+            raise RuntimeError("Нельзя освободить соединение единицы работы с незафиксированными изменениями")
+        if self.conn is not None:
+            try:
+                await self.conn.rollback()
+            finally:
+                await DBSession._putconn_async(self.conn)
+                self.conn = None
+                self._applied_user_id = None
+
+
+class SessionCursor:
+    """
+    Курсор асинхронной сессии.
+
+    Если в транзакцию еще не передан текущий пользователь, set_config
+    отправляется в одном пакете (pipeline) с очередным запросом, без
+    отдельного обмена с сервером.
+    """
+
+    def __init__(self, cursor, unit_of_work: UnitOfWork) -> None:
+        self._cursor = cursor
+        self._unit_of_work = unit_of_work
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    async def execute(self, query, params=None, **kwargs) -> "SessionCursor":
+        user_context = self._unit_of_work.pending_user_context()
+        if user_context is None:
+            await self._cursor.execute(query, params, **kwargs)
+            return self
+
+        conn = self._cursor.connection
+        if Pipeline.is_supported():
+            async with conn.pipeline():
+                await conn.execute(*user_context)
+                await self._cursor.execute(query, params, **kwargs)
+        else:
+            await conn.execute(*user_context)
+            await self._cursor.execute(query, params, **kwargs)
+        return self
+
+
+_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar("unit_of_work", default=None)
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """
+    Откладывает callback до фиксации текущей единицы работы, чтобы
+    внутрипроцессные структуры (кеши, индексы) не видели изменений,
+    которые затем будут отменены. Вне единицы работы выполняет сразу.
+    """
+    unit_of_work = _unit_of_work.get()
+    if unit_of_work is None:
+        callback()
+    else:
+        unit_of_work.after_commit(callback)
+
+def on_rollback(callback: Callable[[], None]) -> None:
+    """
+    Выполняет callback, если текущая единица работы будет откачена
+    (например, чтобы освободить резерв, сделанный до фиксации). Вне
+    единицы работы откатывать нечего, callback не выполняется.
+    """
+    unit_of_work = _unit_of_work.get()
+    if unit_of_work is not None:
+        unit_of_work.after_rollback(callback)
+
+async def release_connection() -> None:
+    """
+    Возвращает соединение текущей единицы работы в пул без фиксации
+    (UnitOfWork.release). Вызывается после чтения и перед долгой работой
+    без БД (например, хешированием пароля), чтобы запрос не удерживал
+    соединение; изменения после этого фиксируются, как обычно, одной
+    транзакцией на выходе из единицы работы.
+    """
+    unit_of_work = _unit_of_work.get()
+    if unit_of_work is not None:
+        await unit_of_work.release()
+
 import atexit
 
 def cleanup_db_pool():
     if hasattr(DBSession, '_pool') and DBSession._pool is not None:
-        DBSession._pool.closeall()
+        DBSession._pool.close()
 
 atexit.register(cleanup_db_pool)
@@ -0,0 +1,117 @@
+"""
+Версионные миграции схемы базы данных.
+
+Каждая миграция - модуль ``mNNNN_<название>.py`` со списком SQL-запросов
+STATEMENTS. Примененные версии записываются в таблицу schema_migrations,
+поэтому запуск идемпотентен: при старте приложения выполняются только
+новые миграции. Одновременный запуск нескольких процессов приложения
+сериализуется advisory-блокировкой.
+
+Миграция выполняется в одной транзакции, если в модуле не указано
+``TRANSACTIONAL = False`` (например, для CREATE INDEX CONCURRENTLY) -
+тогда запросы выполняются по одному в режиме autocommit и должны быть
+идемпотентны сами по себе. Прерванный CREATE INDEX CONCURRENTLY оставляет
+недействительный (INVALID) индекс, который IF NOT EXISTS при повторном
+запуске пропустил бы: такой индекс удаляется и строится заново, а версия
+записывается, только если индекс действителен.
+"""
+import re
+from types import ModuleType
+from typing import List, Optional
+
+from psycopg import AsyncConnection, sql
+
+from app.db.database import DBSession
+from app.db.migrations import (
+    m0001_initial_schema,
+    m0002_audit_triggers,
+    m0003_views,
+    m0004_performance_indexes,
+    m0005_guest_name_trigram,
+    m0006_guest_name_translit,
+    m0007_grouped_audit,
+    m0008_revenue_daily,
+    m0009_action_logs_partitioned,
+    m0010_guests_created_at_not_null,
+)
+
+MIGRATIONS: List[ModuleType] = [
+    m0001_initial_schema,
+    m0002_audit_triggers,
+    m0003_views,
+    m0004_performance_indexes,
+    m0005_guest_name_trigram,
+    m0006_guest_name_translit,
+    m0007_grouped_audit,
+    m0008_revenue_daily,
+    m0009_action_logs_partitioned,
+    m0010_guests_created_at_not_null,
+]
+
+# Ключ advisory-блокировки миграций (произвольная константа приложения).
+MIGRATIONS_LOCK_ID = 724011
+
+CONCURRENT_INDEX = re.compile(
+    r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE
+)
+
+
+def _version(migration: ModuleType) -> str:
+    return migration.__name__.rsplit(".", 1)[-1]
+
+
+async def _index_is_valid(conn: AsyncConnection, name: str) -> Optional[bool]:
+    """pg_index.indisvalid индекса или None, если индекса нет."""
+    cursor = await conn.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", (name,))
+    row = await cursor.fetchone()
+    return row[0] if row else None
+
+
+async def _execute_autocommit(conn: AsyncConnection, statement: str) -> None:
+    """Запрос нетранзакционной миграции; CREATE INDEX CONCURRENTLY - с проверкой индекса."""
+    match = CONCURRENT_INDEX.match(statement)
+    if match is None:
+        await conn.execute(statement)
+        return
+
+    name = match.group(1)
+    if await _index_is_valid(conn, name) is False:
+        await conn.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(name)))
+    await conn.execute(statement)
+    if not await _index_is_valid(conn, name):
+        raise RuntimeError(f"Индекс {name} не построен (INVALID), миграция не записана")
+
+
+async def run_migrations() -> None:
+    """Применяет к базе данных все еще не примененные миграции по порядку."""
+    async with await AsyncConnection.connect(DBSession._conninfo(), autocommit=True) as conn:
+        await conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_ID,))
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version VARCHAR(100) PRIMARY KEY,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor = await conn.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in await cursor.fetchall()}
+
+            for migration in MIGRATIONS:
+                version = _version(migration)
+                if version in applied:
+                    continue
+
+                if getattr(migration, "TRANSACTIONAL", True):
+                    async with conn.transaction():
+                        for statement in migration.STATEMENTS:
+                            await conn.execute(statement)
+                        await conn.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+                else:
+                    for statement in migration.STATEMENTS:
+                        await _execute_autocommit(conn, statement)
+                    await conn.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+
+                print(f"✅ Применена миграция {version}")
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_ID,))
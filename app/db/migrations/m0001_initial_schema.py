@@ -0,0 +1,168 @@
+"""
+Исходная схема: таблицы, ограничения и справочник ролей.
+
+Таблицы создаются с IF NOT EXISTS, поэтому миграция применима и к уже
+развернутой базе (она просто фиксирует ее версию).
+"""
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS roles (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(50) NOT NULL UNIQUE,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS permissions (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS role_permissions (
+        role_id INTEGER NOT NULL REFERENCES roles(id) ON DELETE CASCADE,
+        permission_id INTEGER NOT NULL,
+        PRIMARY KEY (role_id, permission_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(50) NOT NULL UNIQUE,
+        hashed_password VARCHAR(255) NOT NULL,
+        full_name VARCHAR(255) NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        role_id INTEGER REFERENCES roles(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS guests (
+        id SERIAL PRIMARY KEY,
+        passport_number VARCHAR(12) NOT NULL UNIQUE,
+        last_name VARCHAR(100) NOT NULL,
+        first_name VARCHAR(100) NOT NULL,
+        middle_name VARCHAR(100) NOT NULL,
+        birth_year INTEGER NOT NULL,
+        gender VARCHAR(1) NOT NULL,
+        registration_address TEXT NOT NULL,
+        phone VARCHAR(20),
+        purpose_of_visit TEXT,
+        how_heard_about_us TEXT,
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT guests_birth_year_check CHECK (birth_year > 1900 AND birth_year <= EXTRACT(YEAR FROM CURRENT_DATE)),
+        CONSTRAINT guests_passport_number_check CHECK (passport_number ~ '^\\d{4}-\\d{6}$')
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS guest_documents (
+        id SERIAL PRIMARY KEY,
+        guest_id INTEGER REFERENCES guests(id) ON DELETE CASCADE,
+        document_type VARCHAR(50) NOT NULL,
+        file_url TEXT NOT NULL,
+        file_name VARCHAR(255) NOT NULL,
+        file_size INTEGER,
+        mime_type VARCHAR(100),
+        upload_date TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS room_types (
+        id SERIAL PRIMARY KEY,
+        code VARCHAR(1) NOT NULL UNIQUE,
+        name VARCHAR(50) NOT NULL,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rooms (
+        id SERIAL PRIMARY KEY,
+        room_number VARCHAR(4) NOT NULL UNIQUE,
+        type_id INTEGER REFERENCES room_types(id) ON DELETE RESTRICT,
+        capacity INTEGER NOT NULL CHECK (capacity > 0),
+        room_count INTEGER NOT NULL CHECK (room_count > 0),
+        price_per_night NUMERIC(10,2) NOT NULL CHECK (price_per_night > 0),
+        has_bathroom BOOLEAN NOT NULL,
+        equipment TEXT,
+        is_available BOOLEAN DEFAULT true,
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS check_ins (
+        id SERIAL PRIMARY KEY,
+        guest_id INTEGER REFERENCES guests(id) ON DELETE CASCADE,
+        room_id INTEGER REFERENCES rooms(id) ON DELETE CASCADE,
+        check_in_date DATE NOT NULL,
+        check_out_date DATE,
+        status VARCHAR(20) NOT NULL DEFAULT 'Активно',
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT check_ins_check CHECK (check_out_date IS NULL OR check_out_date >= check_in_date)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS room_payments (
+        id SERIAL PRIMARY KEY,
+        check_in_id INTEGER REFERENCES check_ins(id) ON DELETE CASCADE,
+        payment_date TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        days_count INTEGER NOT NULL CHECK (days_count > 0),
+        amount NUMERIC(10,2) NOT NULL CHECK (amount > 0),
+        payment_method VARCHAR(50) NOT NULL,
+        status VARCHAR(20) NOT NULL DEFAULT 'Оплачено'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS service_types (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS services (
+        id SERIAL PRIMARY KEY,
+        type_id INTEGER REFERENCES service_types(id) ON DELETE SET NULL,
+        name VARCHAR(100) NOT NULL,
+        description TEXT,
+        price NUMERIC(10,2) NOT NULL CHECK (price >= 0),
+        is_available BOOLEAN DEFAULT true
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS service_payments (
+        id SERIAL PRIMARY KEY,
+        guest_id INTEGER REFERENCES guests(id) ON DELETE SET NULL,
+        service_id INTEGER REFERENCES services(id) ON DELETE SET NULL,
+        payment_date TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        amount NUMERIC(10,2) NOT NULL CHECK (amount > 0),
+        quantity INTEGER NOT NULL DEFAULT 1 CHECK (quantity > 0),
+        payment_method VARCHAR(50) NOT NULL,
+        status VARCHAR(20) NOT NULL DEFAULT 'Оплачено'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS action_logs (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+        action_type VARCHAR(100) NOT NULL,
+        table_name VARCHAR(50),
+        record_id INTEGER,
+        old_values JSONB,
+        new_values JSONB,
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    INSERT INTO roles (id, name) VALUES
+        (1, 'Администратор'),
+        (2, 'Менеджер'),
+        (3, 'Директор')
+    ON CONFLICT DO NOTHING
+    """,
+    "SELECT setval(pg_get_serial_sequence('roles', 'id'), (SELECT MAX(id) FROM roles))",
+]
@@ -0,0 +1,68 @@
+"""
+Журналирование изменений триггерами.
+
+log_changes() пишет в action_logs каждое изменение отслеживаемых таблиц;
+пользователь берется из app.current_user_id, который приложение
+устанавливает в транзакции запроса.
+"""
+
+STATEMENTS = [
+    """
+    CREATE OR REPLACE FUNCTION log_changes() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+    DECLARE
+        v_user_id INTEGER;
+        v_old_data JSONB;
+        v_new_data JSONB;
+        v_action TEXT;
+    BEGIN
+        BEGIN
+            v_user_id := current_setting('app.current_user_id', true)::INTEGER;
+        EXCEPTION WHEN OTHERS THEN
+            v_user_id := NULL;
+        END;
+
+        IF TG_OP = 'DELETE' THEN
+            v_action := 'DELETE';
+            v_old_data := to_jsonb(OLD);
+            v_new_data := NULL;
+        ELSIF TG_OP = 'INSERT' THEN
+            v_action := 'INSERT';
+            v_old_data := NULL;
+            v_new_data := to_jsonb(NEW);
+        ELSIF TG_OP = 'UPDATE' THEN
+            v_action := 'UPDATE';
+            v_old_data := to_jsonb(OLD);
+            v_new_data := to_jsonb(NEW);
+        END IF;
+
+        INSERT INTO action_logs (
+            user_id,
+            action_type,
+            table_name,
+            record_id,
+            old_values,
+            new_values
+        ) VALUES (
+            v_user_id,
+            v_action || ' ' || TG_TABLE_NAME,
+            TG_TABLE_NAME,
+            COALESCE((OLD).id::TEXT, (NEW).id::TEXT)::INTEGER,
+            v_old_data,
+            v_new_data
+        );
+
+        RETURN NULL;
+    END;
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS log_check_ins_changes ON check_ins",
+    "CREATE TRIGGER log_check_ins_changes AFTER INSERT OR DELETE OR UPDATE ON check_ins FOR EACH ROW EXECUTE FUNCTION log_changes()",
+    "DROP TRIGGER IF EXISTS log_guests_changes ON guests",
+    "CREATE TRIGGER log_guests_changes AFTER INSERT OR DELETE OR UPDATE ON guests FOR EACH ROW EXECUTE FUNCTION log_changes()",
+    "DROP TRIGGER IF EXISTS log_payments_changes ON room_payments",
+    "CREATE TRIGGER log_payments_changes AFTER INSERT OR DELETE OR UPDATE ON room_payments FOR EACH ROW EXECUTE FUNCTION log_changes()",
+    "DROP TRIGGER IF EXISTS log_rooms_changes ON rooms",
+    "CREATE TRIGGER log_rooms_changes AFTER INSERT OR DELETE OR UPDATE ON rooms FOR EACH ROW EXECUTE FUNCTION log_changes()",
+]
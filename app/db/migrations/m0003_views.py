@@ -0,0 +1,100 @@
+"""
+Представления, которые используют сервисы постояльцев и заселений.
+
+Статусы заселения сравниваются со значениями CheckInStatus
+('Активно', 'Завершено'). Новые столбцы добавляются только в конец
+списка, чтобы CREATE OR REPLACE VIEW применялся к уже существующим
+представлениям.
+"""
+
+STATEMENTS = [
+    """
+    CREATE OR REPLACE VIEW view_current_guests AS
+    SELECT g.id,
+           g.passport_number,
+           g.last_name || ' ' || g.first_name || ' ' || COALESCE(g.middle_name, '') AS full_name,
+           r.room_number,
+           rt.name AS room_type,
+           r.price_per_night,
+           ci.check_in_date,
+           ci.check_out_date,
+           (SELECT count(*)
+              FROM check_ins ci2
+             WHERE ci2.guest_id = g.id AND ci2.status = 'Завершено') AS previous_stays
+      FROM guests g
+      JOIN check_ins ci ON g.id = ci.guest_id
+      JOIN rooms r ON ci.room_id = r.id
+      JOIN room_types rt ON r.type_id = rt.id
+     WHERE ci.status = 'Активно'
+       AND (ci.check_out_date IS NULL OR ci.check_out_date >= CURRENT_DATE)
+    """,
+    """
+    CREATE OR REPLACE VIEW view_guest_by_name AS
+    SELECT g.id,
+           g.last_name,
+           g.first_name,
+           g.middle_name,
+           g.passport_number,
+           r.room_number,
+           ci.check_in_date,
+           ci.check_out_date,
+           g.phone,
+           ci.status AS booking_status
+      FROM guests g
+      LEFT JOIN check_ins ci ON g.id = ci.guest_id AND ci.status = 'Активно'
+      LEFT JOIN rooms r ON ci.room_id = r.id
+    """,
+    """
+    CREATE OR REPLACE VIEW view_guest_by_passport AS
+    SELECT g.id,
+           g.passport_number,
+           g.last_name,
+           g.first_name,
+           g.middle_name,
+           g.birth_year,
+           g.gender,
+           g.registration_address,
+           g.phone,
+           g.purpose_of_visit,
+           g.how_heard_about_us,
+           r.room_number,
+           rt.name AS room_type,
+           ci.check_in_date,
+           ci.check_out_date,
+           ci.status AS booking_status,
+           g.created_at,
+           g.updated_at
+      FROM guests g
+      LEFT JOIN check_ins ci ON g.id = ci.guest_id AND ci.status = 'Активно'
+      LEFT JOIN rooms r ON ci.room_id = r.id
+      LEFT JOIN room_types rt ON r.type_id = rt.id
+    """,
+    """
+    CREATE OR REPLACE VIEW view_guest_documents AS
+    SELECT g.id AS guest_id,
+           g.passport_number,
+           g.last_name || ' ' || g.first_name AS guest_name,
+           gd.document_type,
+           gd.file_name,
+           gd.file_url,
+           gd.upload_date
+      FROM guests g
+      JOIN guest_documents gd ON g.id = gd.guest_id
+    """,
+    """
+    CREATE OR REPLACE VIEW view_guest_search AS
+    SELECT g.id,
+           g.passport_number,
+           g.last_name,
+           g.first_name,
+           g.middle_name,
+           g.phone,
+           r.room_number,
+           ci.status AS booking_status,
+           ci.check_in_date,
+           ci.check_out_date
+      FROM guests g
+      LEFT JOIN check_ins ci ON g.id = ci.guest_id
+      LEFT JOIN rooms r ON ci.room_id = r.id
+    """,
+]
@@ -0,0 +1,33 @@
+"""
+Индексы для горячих запросов.
+
+- check_ins (room_id, status), (guest_id, status): занятость номера,
+  текущее заселение постояльца, представления view_*;
+- room_payments (check_in_id): платежи заселения и соединения в отчетах;
+- service_payments (guest_id, payment_date): платежи постояльца по датам;
+- (столбец даты, id) для room_payments, service_payments, action_logs,
+  check_ins и guests: фильтры по диапазону дат (date_range_conditions)
+  и постраничная выборка по ключу (app.utils.pagination).
+
+Индексы строятся с CONCURRENTLY, чтобы не блокировать запись в таблицы,
+поэтому миграция выполняется вне транзакции.
+"""
+
+TRANSACTIONAL = False
+
+INDEXES = (
+    ("idx_check_ins_room_id_status", "check_ins (room_id, status)"),
+    ("idx_check_ins_guest_id_status", "check_ins (guest_id, status)"),
+    ("idx_check_ins_check_in_date", "check_ins (check_in_date, id)"),
+    ("idx_room_payments_check_in_id", "room_payments (check_in_id)"),
+    ("idx_room_payments_payment_date", "room_payments (payment_date, id)"),
+    ("idx_service_payments_guest_id_payment_date", "service_payments (guest_id, payment_date)"),
+    ("idx_service_payments_payment_date", "service_payments (payment_date, id)"),
+    ("idx_action_logs_created_at", "action_logs (created_at, id)"),
+    ("idx_guests_created_at", "guests (created_at, id)"),
+)
+
+STATEMENTS = [
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"
+    for name, definition in INDEXES
+]
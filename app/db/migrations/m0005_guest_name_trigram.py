@@ -0,0 +1,20 @@
+"""
+Триграммные индексы для поиска постояльцев по ФИО.
+
+GIN-индексы pg_trgm по LOWER(...) ускоряют и поиск подстроки
+(LIKE '%...%'), и нечеткий поиск с оператором <% (GuestService.search_by_name).
+Требуется расширение pg_trgm (входит в стандартную поставку PostgreSQL, contrib).
+"""
+
+TRANSACTIONAL = False
+
+INDEXES = (
+    ("idx_guests_last_name_trgm", "guests USING gin (LOWER(last_name) gin_trgm_ops)"),
+    ("idx_guests_first_name_trgm", "guests USING gin (LOWER(first_name) gin_trgm_ops)"),
+    ("idx_guests_middle_name_trgm", "guests USING gin (LOWER(middle_name) gin_trgm_ops)"),
+)
+
+STATEMENTS = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"
+    for name, definition in INDEXES
+]
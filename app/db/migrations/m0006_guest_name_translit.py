@@ -0,0 +1,94 @@
+"""
+Ключи поиска постояльцев независимо от алфавита (кириллица/латиница).
+
+- guest_translit(text): транслитерация кириллицы в латиницу (как в
+  загранпаспорте) и сведение вариантов латинского написания
+  (y/j -> i, kh -> h, w -> v, ph -> f, x -> ks), нижний регистр;
+- guest_phonetic(text): фонетические коды слов - без гласных (кроме
+  первой буквы), с объединением звонких и глухих согласных.
+
+Столбцы guests.name_translit и guests.name_phonetic вычисляются
+базой данных при записи (GENERATED ... STORED) и индексируются:
+триграммный GIN-индекс для подстроки и GIN по массиву кодов.
+Запросы проходят через те же функции, поэтому "Ivanov" и "Иванов"
+дают одинаковый ключ.
+"""
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    r"""
+    CREATE OR REPLACE FUNCTION guest_translit(value TEXT) RETURNS TEXT
+        LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+        AS $$
+    DECLARE
+        result TEXT;
+    BEGIN
+        -- Регистр кириллицы приводится явно: lower() зависит от локали базы.
+        result := lower(translate(
+            COALESCE(value, ''),
+            'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ',
+            'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+        ));
+        result := replace(result, 'щ', 'shch');
+        result := replace(result, 'ж', 'zh');
+        result := replace(result, 'х', 'kh');
+        result := replace(result, 'ц', 'ts');
+        result := replace(result, 'ч', 'ch');
+        result := replace(result, 'ш', 'sh');
+        result := replace(result, 'ю', 'iu');
+        result := replace(result, 'я', 'ia');
+        result := replace(result, 'ъ', 'ie');
+        result := replace(result, 'ь', '');
+        result := translate(result, 'абвгдеёзийклмнопрстуфыэ', 'abvgdeeziiklmnoprstufye');
+
+        result := replace(result, 'kh', 'h');
+        result := replace(result, 'ph', 'f');
+        result := replace(result, 'x', 'ks');
+        result := translate(result, 'wyj', 'vii');
+        result := regexp_replace(result, '[^a-z0-9]+', ' ', 'g');
+        RETURN btrim(result);
+    END;
+    $$
+    """,
+    r"""
+    CREATE OR REPLACE FUNCTION guest_phonetic(value TEXT) RETURNS TEXT[]
+        LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+        AS $$
+    DECLARE
+        word TEXT;
+        code TEXT;
+        codes TEXT[] := '{}';
+    BEGIN
+        FOREACH word IN ARRAY regexp_split_to_array(guest_translit(value), ' ') LOOP
+            CONTINUE WHEN word = '';
+
+            code := regexp_replace(word, '(shch|sch|sh|zh)', 'S', 'g');
+            code := replace(code, 'ch', 'C');
+            code := regexp_replace(code, '(ts|tz|c)', 's', 'g');
+            code := replace(code, 'ck', 'k');
+            code := replace(code, 'q', 'k');
+            code := translate(code, 'bvgdz', 'pfkts');
+            code := replace(code, 'h', 'k');
+            code := CASE WHEN left(code, 1) IN ('a', 'e', 'i', 'o', 'u') THEN '0' ELSE '' END
+                    || regexp_replace(code, '[aeiou]', '', 'g');
+            code := regexp_replace(code, '(.)\1+', '\1', 'g');
+            IF NOT code = ANY(codes) THEN
+                codes := codes || code;
+            END IF;
+        END LOOP;
+        RETURN codes;
+    END;
+    $$
+    """,
+    """
+    ALTER TABLE guests ADD COLUMN IF NOT EXISTS name_translit TEXT
+        GENERATED ALWAYS AS (guest_translit(last_name || ' ' || first_name || ' ' || COALESCE(middle_name, ''))) STORED
+    """,
+    """
+    ALTER TABLE guests ADD COLUMN IF NOT EXISTS name_phonetic TEXT[]
+        GENERATED ALWAYS AS (guest_phonetic(last_name || ' ' || first_name || ' ' || COALESCE(middle_name, ''))) STORED
+    """,
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_guests_name_translit_trgm ON guests USING gin (name_translit gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_guests_name_phonetic ON guests USING gin (name_phonetic)",
+]
@@ -0,0 +1,65 @@
+"""
+Групповые записи журнала для пакетных операций.
+
+log_changes() не пишет построчные записи, если в транзакции установлен
+параметр app.skip_row_audit = 'on'. Пакетная операция (например,
+выселение всех постояльцев на дату) включает его на время своего
+запроса и сама добавляет одну сводную запись в action_logs.
+"""
+
+STATEMENTS = [
+    """
+    CREATE OR REPLACE FUNCTION log_changes() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+    DECLARE
+        v_user_id INTEGER;
+        v_old_data JSONB;
+        v_new_data JSONB;
+        v_action TEXT;
+    BEGIN
+        IF current_setting('app.skip_row_audit', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+
+        BEGIN
+            v_user_id := current_setting('app.current_user_id', true)::INTEGER;
+        EXCEPTION WHEN OTHERS THEN
+            v_user_id := NULL;
+        END;
+
+        IF TG_OP = 'DELETE' THEN
+            v_action := 'DELETE';
+            v_old_data := to_jsonb(OLD);
+            v_new_data := NULL;
+        ELSIF TG_OP = 'INSERT' THEN
+            v_action := 'INSERT';
+            v_old_data := NULL;
+            v_new_data := to_jsonb(NEW);
+        ELSIF TG_OP = 'UPDATE' THEN
+            v_action := 'UPDATE';
+            v_old_data := to_jsonb(OLD);
+            v_new_data := to_jsonb(NEW);
+        END IF;
+
+        INSERT INTO action_logs (
+            user_id,
+            action_type,
+            table_name,
+            record_id,
+            old_values,
+            new_values
+        ) VALUES (
+            v_user_id,
+            v_action || ' ' || TG_TABLE_NAME,
+            TG_TABLE_NAME,
+            COALESCE((OLD).id::TEXT, (NEW).id::TEXT)::INTEGER,
+            v_old_data,
+            v_new_data
+        );
+
+        RETURN NULL;
+    END;
+    $$
+    """,
+]
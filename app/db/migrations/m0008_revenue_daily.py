@@ -0,0 +1,182 @@
+"""
+Дневные итоги по платежам (revenue_daily).
+
+Строка - итог за день по источнику ('room' - проживание, 'service' -
+услуги), номеру, услуге, способу оплаты и статусу. Отсутствующий номер
+или услуга обозначается 0. Итоги поддерживаются триггерами:
+
+- room_payments, service_payments: изменение вычитает вклад старой строки
+  и добавляет вклад новой (создание, смена статуса, удаление);
+- check_ins: перед удалением заселения (в т.ч. каскадным при удалении
+  номера) вычитаются его платежи, при переносе в другой номер платежи
+  переносятся в итогах.
+
+revenue_daily_rebuild() пересчитывает таблицу целиком.
+"""
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS revenue_daily (
+        day DATE NOT NULL,
+        source VARCHAR(10) NOT NULL,
+        room_id INTEGER NOT NULL DEFAULT 0,
+        service_id INTEGER NOT NULL DEFAULT 0,
+        payment_method VARCHAR(50) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        amount NUMERIC(14,2) NOT NULL DEFAULT 0,
+        payments_count INTEGER NOT NULL DEFAULT 0,
+        days_sold INTEGER NOT NULL DEFAULT 0,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, source, room_id, service_id, payment_method, status)
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION revenue_daily_add(
+        p_day DATE, p_source TEXT, p_room_id INTEGER, p_service_id INTEGER,
+        p_method TEXT, p_status TEXT, p_amount NUMERIC, p_count INTEGER,
+        p_days INTEGER, p_quantity INTEGER
+    ) RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+    BEGIN
+        INSERT INTO revenue_daily AS d (
+            day, source, room_id, service_id, payment_method, status,
+            amount, payments_count, days_sold, quantity
+        ) VALUES (
+            p_day, p_source, COALESCE(p_room_id, 0), COALESCE(p_service_id, 0), p_method, p_status,
+            p_amount, p_count, p_days, p_quantity
+        )
+        ON CONFLICT (day, source, room_id, service_id, payment_method, status) DO UPDATE
+        SET amount = d.amount + EXCLUDED.amount,
+            payments_count = d.payments_count + EXCLUDED.payments_count,
+            days_sold = d.days_sold + EXCLUDED.days_sold,
+            quantity = d.quantity + EXCLUDED.quantity;
+
+        DELETE FROM revenue_daily
+         WHERE day = p_day AND source = p_source
+           AND room_id = COALESCE(p_room_id, 0) AND service_id = COALESCE(p_service_id, 0)
+           AND payment_method = p_method AND status = p_status
+           AND payments_count = 0;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION room_payments_rollup() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+    DECLARE
+        v_room_id INTEGER;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            SELECT room_id INTO v_room_id FROM check_ins WHERE id = OLD.check_in_id;
+            -- Платежи удаленного заселения уже вычтены триггером check_ins.
+            IF FOUND OR OLD.check_in_id IS NULL THEN
+                PERFORM revenue_daily_add(
+                    OLD.payment_date::date, 'room', v_room_id, 0, OLD.payment_method, OLD.status,
+                    -OLD.amount, -1, -OLD.days_count, 0
+                );
+            END IF;
+        END IF;
+
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT room_id INTO v_room_id FROM check_ins WHERE id = NEW.check_in_id;
+            PERFORM revenue_daily_add(
+                NEW.payment_date::date, 'room', v_room_id, 0, NEW.payment_method, NEW.status,
+                NEW.amount, 1, NEW.days_count, 0
+            );
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION service_payments_rollup() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM revenue_daily_add(
+                OLD.payment_date::date, 'service', 0, OLD.service_id, OLD.payment_method, OLD.status,
+                -OLD.amount, -1, 0, -OLD.quantity
+            );
+        END IF;
+
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM revenue_daily_add(
+                NEW.payment_date::date, 'service', 0, NEW.service_id, NEW.payment_method, NEW.status,
+                NEW.amount, 1, 0, NEW.quantity
+            );
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION check_ins_rollup() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+    DECLARE
+        v_payment RECORD;
+    BEGIN
+        FOR v_payment IN SELECT * FROM room_payments WHERE check_in_id = OLD.id LOOP
+            PERFORM revenue_daily_add(
+                v_payment.payment_date::date, 'room', OLD.room_id, 0, v_payment.payment_method, v_payment.status,
+                -v_payment.amount, -1, -v_payment.days_count, 0
+            );
+            IF TG_OP = 'UPDATE' THEN
+                PERFORM revenue_daily_add(
+                    v_payment.payment_date::date, 'room', NEW.room_id, 0, v_payment.payment_method, v_payment.status,
+                    v_payment.amount, 1, v_payment.days_count, 0
+                );
+            END IF;
+        END LOOP;
+
+        IF TG_OP = 'DELETE' THEN
+            RETURN OLD;
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION revenue_daily_rebuild() RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+    BEGIN
+        -- Запрещает изменение платежей до конца транзакции пересчета.
+        LOCK TABLE room_payments, service_payments, check_ins IN SHARE MODE;
+        DELETE FROM revenue_daily;
+
+        INSERT INTO revenue_daily (
+            day, source, room_id, service_id, payment_method, status,
+            amount, payments_count, days_sold, quantity
+        )
+        SELECT rp.payment_date::date, 'room', COALESCE(ci.room_id, 0), 0, rp.payment_method, rp.status,
+               SUM(rp.amount), COUNT(*), SUM(rp.days_count), 0
+          FROM room_payments rp
+          LEFT JOIN check_ins ci ON ci.id = rp.check_in_id
+         GROUP BY 1, 2, 3, 4, 5, 6
+        UNION ALL
+        SELECT sp.payment_date::date, 'service', 0, COALESCE(sp.service_id, 0), sp.payment_method, sp.status,
+               SUM(sp.amount), COUNT(*), 0, SUM(sp.quantity)
+          FROM service_payments sp
+         GROUP BY 1, 2, 3, 4, 5, 6;
+    END;
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS room_payments_rollup ON room_payments",
+    "CREATE TRIGGER room_payments_rollup AFTER INSERT OR DELETE OR UPDATE ON room_payments FOR EACH ROW EXECUTE FUNCTION room_payments_rollup()",
+    "DROP TRIGGER IF EXISTS service_payments_rollup ON service_payments",
+    "CREATE TRIGGER service_payments_rollup AFTER INSERT OR DELETE OR UPDATE ON service_payments FOR EACH ROW EXECUTE FUNCTION service_payments_rollup()",
+    "DROP TRIGGER IF EXISTS check_ins_rollup_delete ON check_ins",
+    "CREATE TRIGGER check_ins_rollup_delete BEFORE DELETE ON check_ins FOR EACH ROW EXECUTE FUNCTION check_ins_rollup()",
+    "DROP TRIGGER IF EXISTS check_ins_rollup_move ON check_ins",
+    """
+    CREATE TRIGGER check_ins_rollup_move AFTER UPDATE OF room_id ON check_ins
+        FOR EACH ROW WHEN (OLD.room_id IS DISTINCT FROM NEW.room_id)
+        EXECUTE FUNCTION check_ins_rollup()
+    """,
+    "SELECT revenue_daily_rebuild()",
+]
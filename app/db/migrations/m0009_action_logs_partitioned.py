@@ -0,0 +1,91 @@
+"""
+Секционирование action_logs по месяцам.
+
+Таблица пересоздается как секционированная по created_at (RANGE), данные
+переносятся. Секция месяца называется ``action_logs_ГГГГ_ММ``; строки вне
+созданных секций попадают в action_logs_default.
+
+- action_logs_create_partition(месяц): создает секцию месяца; строки
+  этого месяца из action_logs_default переносятся в нее;
+- action_logs_ensure_partitions(с, по): создает секции всех месяцев
+  диапазона.
+
+Секции на будущие месяцы создает приложение при старте и задание
+app.jobs.action_log_retention, оно же архивирует и удаляет устаревшие.
+Первичный ключ секционированной таблицы включает ключ секционирования:
+(id, created_at).
+"""
+
+STATEMENTS = [
+    "ALTER TABLE action_logs RENAME TO action_logs_legacy",
+    "ALTER TABLE action_logs_legacy RENAME CONSTRAINT action_logs_pkey TO action_logs_legacy_pkey",
+    "ALTER INDEX IF EXISTS idx_action_logs_created_at RENAME TO idx_action_logs_legacy_created_at",
+    "ALTER SEQUENCE action_logs_id_seq OWNED BY NONE",
+    """
+    CREATE TABLE action_logs (
+        id INTEGER NOT NULL DEFAULT nextval('action_logs_id_seq'),
+        user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+        action_type VARCHAR(100) NOT NULL,
+        table_name VARCHAR(50),
+        record_id INTEGER,
+        old_values JSONB,
+        new_values JSONB,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """,
+    "ALTER SEQUENCE action_logs_id_seq OWNED BY action_logs.id",
+    "CREATE INDEX idx_action_logs_created_at ON action_logs (created_at, id)",
+    "CREATE INDEX idx_action_logs_user_id_created_at ON action_logs (user_id, created_at)",
+    "CREATE TABLE action_logs_default PARTITION OF action_logs DEFAULT",
+    """
+    CREATE OR REPLACE FUNCTION action_logs_create_partition(p_month DATE) RETURNS TEXT
+        LANGUAGE plpgsql
+        AS $$
+    DECLARE
+        v_from DATE := date_trunc('month', p_month)::date;
+        v_to DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+        v_name TEXT := 'action_logs_' || to_char(p_month, 'YYYY_MM');
+    BEGIN
+        IF to_regclass(v_name) IS NOT NULL THEN
+            RETURN v_name;
+        END IF;
+
+        IF EXISTS (SELECT 1 FROM action_logs_default WHERE created_at >= v_from AND created_at < v_to) THEN
+            -- Секцию нельзя создать, пока ее строки лежат в секции по умолчанию.
+            EXECUTE format('CREATE TABLE %I (LIKE action_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM action_logs_default WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                v_from, v_to, v_name
+            );
+            EXECUTE format('ALTER TABLE action_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', v_name, v_from, v_to);
+        ELSE
+            EXECUTE format('CREATE TABLE %I PARTITION OF action_logs FOR VALUES FROM (%L) TO (%L)', v_name, v_from, v_to);
+        END IF;
+        RETURN v_name;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION action_logs_ensure_partitions(p_from DATE, p_to DATE) RETURNS SETOF TEXT
+        LANGUAGE sql
+        AS $$
+        SELECT action_logs_create_partition(month::date)
+          FROM generate_series(date_trunc('month', p_from), date_trunc('month', p_to), INTERVAL '1 month') AS month
+    $$
+    """,
+    """
+    SELECT action_logs_ensure_partitions(
+        COALESCE((SELECT MIN(created_at) FROM action_logs_legacy)::date, CURRENT_DATE),
+        (CURRENT_DATE + INTERVAL '2 months')::date
+    )
+    """,
+    """
+    INSERT INTO action_logs (id, user_id, action_type, table_name, record_id, old_values, new_values, created_at)
+    SELECT id, user_id, action_type, table_name, record_id, old_values, new_values,
+           COALESCE(created_at, CURRENT_TIMESTAMP)
+      FROM action_logs_legacy
+    """,
+    "DROP TABLE action_logs_legacy",
+]
@@ -0,0 +1,19 @@
+"""
+guests.created_at NOT NULL.
+
+Список постояльцев листается по ключу (created_at, id); строки с NULL в
+created_at не попадают ни в одно сравнение кортежей и выпадали бы из
+выборки по курсору. Пустые значения заполняются из updated_at (или
+текущим временем) без записей в журнал действий.
+"""
+
+STATEMENTS = [
+    "SELECT set_config('app.skip_row_audit', 'on', true)",
+    """
+    UPDATE guests
+    SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+    WHERE created_at IS NULL
+    """,
+    "ALTER TABLE guests ALTER COLUMN created_at SET NOT NULL",
+    "SELECT set_config('app.skip_row_audit', 'off', true)",
+]
@@ -0,0 +1,3 @@
+"""
+Задания, которые запускаются вне веб-приложения (cron, systemd timer).
+"""
@@ -0,0 +1,49 @@
+"""
+Обслуживание секций журнала действий (action_logs).
+
+Запуск::
+
+    python -m app.jobs.action_log_retention [--retention-months N] [--archive-dir ПУТЬ]
+
+Создает секции на ACTION_LOG_PARTITIONS_AHEAD месяцев вперед и переносит
+строки секции по умолчанию в секции их месяцев, затем выгружает секции старше срока хранения (по умолчанию
+ACTION_LOG_RETENTION_MONTHS полных месяцев) в ``<архив>/action_logs_ГГГГ_ММ.ndjson.gz``
+и удаляет их из базы данных. Пример для cron (ежедневно в 04:00)::
+
+    0 4 * * * cd /srv/hotel && python -m app.jobs.action_log_retention
+"""
+import argparse
+import asyncio
+
+from app.config import settings
+from app.db.database import DBSession
+from app.services.action_log_retention_service import action_log_retention_service
+
+
+async def run(retention_months: int, archive_dir: str) -> None:
+    try:
+        created = await action_log_retention_service.ensure_partitions()
+        print(f"✅ Секции журнала действий: {', '.join(created)}")
+
+        archived = await action_log_retention_service.archive_expired(retention_months, archive_dir)
+        for partition in archived:
+            print(f"✅ Секция {partition['name']} выгружена ({partition['rows']} записей): {partition['path']}")
+        if not archived:
+            print("✅ Устаревших секций нет")
+    finally:
+        await DBSession._close_pools()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Архивирование и удаление устаревших секций журнала действий")
+    parser.add_argument(
+        "--retention-months", type=int, default=settings.ACTION_LOG_RETENTION_MONTHS,
+        help="Срок хранения в полных месяцах"
+    )
+    parser.add_argument("--archive-dir", default=settings.ACTION_LOG_ARCHIVE_DIR, help="Каталог архива")
+    args = parser.parse_args()
+    asyncio.run(run(args.retention_months, args.archive_dir))
+
+
+if __name__ == "__main__":
+    main()
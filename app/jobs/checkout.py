@@ -0,0 +1,44 @@
+"""
+Выселение постояльцев на дату (конец дня).
+
+Запуск::
+
+    python -m app.jobs.checkout [--date ГГГГ-ММ-ДД]
+
+Закрывает все активные заселения с плановой датой выезда не позже
+указанной (по умолчанию - сегодня) и печатает сводку. Плановая дата выезда
+задается при заселении; заселения без нее задание не закрывает.
+
+Пример для cron (ежедневно в 12:05)::
+
+    5 12 * * * cd /srv/hotel && python -m app.jobs.checkout
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from app.db.database import DBSession
+from app.models.checkin import BulkCheckOutRequest
+from app.services.checkin_service import checkin_service
+
+
+async def run(check_out_date: date) -> None:
+    try:
+        summary = await checkin_service.bulk_check_out(BulkCheckOutRequest(check_out_date=check_out_date))
+        print(
+            f"✅ Выселение на {summary.check_out_date}: "
+            f"заселений - {summary.checked_out}, номеров - {summary.rooms}"
+        )
+    finally:
+        await DBSession._close_pools()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Выселение постояльцев с наступившей датой выезда")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today(), help="Дата выселения (ГГГГ-ММ-ДД)")
+    args = parser.parse_args()
+    asyncio.run(run(args.date))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Пересчет дневных итогов выручки (revenue_daily).
+
+Запуск::
+
+    python -m app.jobs.revenue_rollup
+
+Итоги поддерживаются триггерами при каждом изменении платежей; полный
+пересчет сверяет их с таблицами платежей, например раз в сутки ночью::
+
+    30 3 * * * cd /srv/hotel && python -m app.jobs.revenue_rollup
+"""
+import asyncio
+
+from app.db.database import DBSession
+from app.services.payment_service import payment_service
+
+
+async def run() -> None:
+    try:
+        result = await payment_service.rebuild_revenue_rollup()
+        print(
+            f"✅ Итоги выручки пересчитаны: строк - {result['rows']}, "
+            f"дни - {result['first_day']} .. {result['last_day']}"
+        )
+    finally:
+        await DBSession._close_pools()
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
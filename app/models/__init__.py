@@ -1,6 +1,5 @@
-# User and Role models
-from .user import User, UserCreate, UserUpdate, UserBase, UserInDB
-from .role import Role
+# User models
+from .user import UserCreate, UserUpdate, UserBase, UserInDB
 from .permission import (
     Permission, PermissionCreate, PermissionUpdate,
     RolePermission, RolePermissionCreate,
@@ -63,4 +62,3 @@ from .action_log import (
     ActionLogFilter, ActionLogSummary
 )
 
-__all__ = ['User', 'Role']
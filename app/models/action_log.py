@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 from enum import Enum
@@ -17,6 +17,11 @@ class ActionType(str, Enum):
     REPORT_GENERATE = "REPORT_GENERATE"
 
 
+class ActionLogExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class ActionLogBase(BaseModel):
     user_id: Optional[int] = None
     action_type: ActionType
@@ -53,6 +58,7 @@ class ActionLogFilter(BaseModel):
     date_to: Optional[datetime] = None
     limit: int = Field(default=100, ge=1, le=1000)
     offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None
 
 
 class ActionLogSummary(BaseModel):
@@ -64,4 +70,17 @@ class ActionLogSummary(BaseModel):
     last_action_date: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ActionLogDailySummary(BaseModel):
+    day: date
+    user_id: int
+    username: str
+    user_full_name: str
+    total_actions: int
+    actions_by_type: Dict[str, int]
+    last_action_date: datetime
+
+    class Config:
+        from_attributes = True
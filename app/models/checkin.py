@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 from enum import Enum
 
@@ -70,6 +70,53 @@ class CheckOutRequest(BaseModel):
         return v
 
 
+class BulkCheckInItem(BaseModel):
+    guest_id: int
+    room_id: int
+
+
+class BulkCheckInRequest(BaseModel):
+    items: List[BulkCheckInItem] = Field(..., min_length=1, max_length=500)
+    check_in_date: date = Field(default_factory=date.today)
+    check_out_date: Optional[date] = None
+
+    @validator('check_out_date')
+    def validate_checkout_after_checkin(cls, v, values):
+        if v and 'check_in_date' in values and v <= values['check_in_date']:
+            raise ValueError('Check-out date must be after check-in date')
+        return v
+
+
+class BulkCheckInResult(BaseModel):
+    guest_id: int
+    room_id: int
+    check_in: Optional[CheckIn] = None
+    error: Optional[str] = None
+
+
+class BulkCheckInResponse(BaseModel):
+    checked_in: int
+    failed: int
+    results: List[BulkCheckInResult]
+
+
+class BulkCheckOutRequest(BaseModel):
+    check_out_date: date = Field(default_factory=date.today)
+
+    @validator('check_out_date')
+    def validate_checkout_date_not_future(cls, v):
+        if v > date.today():
+            raise ValueError('Check-out date cannot be in the future')
+        return v
+
+
+class BulkCheckOutSummary(BaseModel):
+    check_out_date: date
+    checked_out: int
+    rooms: int
+    check_in_ids: List[int]
+
+
 class CurrentGuestView(BaseModel):
     id: int
     passport_number: str
@@ -71,6 +71,14 @@ class GuestWithRoom(Guest):
     booking_status: Optional[str] = None
 
 
+class GuestAutocompleteItem(BaseModel):
+    id: int
+    passport_number: str
+    last_name: str
+    first_name: str
+    middle_name: str
+
+
 class GuestSearchResult(BaseModel):
     id: int
     passport_number: str
@@ -82,6 +90,7 @@ class GuestSearchResult(BaseModel):
     booking_status: Optional[str]
     check_in_date: Optional[datetime]
     check_out_date: Optional[datetime]
+    similarity: Optional[float] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -4,6 +4,8 @@ from pydantic import BaseModel, Field
 from decimal import Decimal
 from enum import Enum
 
+from app.models.service import ServiceTypeName
+
 
 class PaymentStatus(str, Enum):
     PAID = "Оплачено"
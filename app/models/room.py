@@ -1,5 +1,6 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 from decimal import Decimal
 import re
@@ -87,6 +88,36 @@ class RoomAvailability(BaseModel):
     price_per_night: Decimal
     is_available: bool
     current_guest_count: int = 0
+    free_places: int = 0
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class RoomDayStatus(str, Enum):
+    FREE = "Свободен"
+    PARTIAL = "Частично занят"
+    OCCUPIED = "Занят"
+    MAINTENANCE = "Недоступен"
+
+
+class CalendarSpan(BaseModel):
+    """Подряд идущие дни [start, end) с одинаковым состоянием номера."""
+    start: date
+    end: date
+    status: RoomDayStatus
+    guests: int = 0
+
+
+class RoomCalendar(BaseModel):
+    room_id: int
+    room_number: str
+    type_name: Optional[str] = None
+    capacity: int
+    spans: List[CalendarSpan]
+
+
+class AvailabilityCalendar(BaseModel):
+    date_from: date
+    date_to: date
+    rooms: List[RoomCalendar]
@@ -0,0 +1,172 @@
+"""
+Секции журнала действий (action_logs): создание на будущие месяцы,
+архивирование и удаление устаревших.
+"""
+import asyncio
+import gzip
+import os
+import re
+from datetime import date
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from psycopg import sql
+
+from app.config import settings
+from app.db.database import DBSession
+
+PARTITION_NAME = re.compile(r"^action_logs_(\d{4})_(\d{2})$")
+# Объем строк, передаваемый в поток записи архива за один раз.
+ARCHIVE_CHUNK_BYTES = 1 << 20
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _open_archive(path: str) -> Tuple[BinaryIO, gzip.GzipFile]:
+    raw = open(path, "wb")
+    return raw, gzip.GzipFile(fileobj=raw, mode="wb")
+
+
+def _complete_archive(raw: BinaryIO, archive: gzip.GzipFile, temp_path: str, path: str) -> None:
+    """Дописывает архив на диск и переименовывает его в итоговое имя."""
+    try:
+        archive.close()
+        raw.flush()
+        os.fsync(raw.fileno())
+    finally:
+        raw.close()
+    os.replace(temp_path, path)
+
+
+def _discard_archive(raw: BinaryIO, archive: gzip.GzipFile, temp_path: str) -> None:
+    try:
+        archive.close()
+    finally:
+        raw.close()
+        os.remove(temp_path)
+
+
+class ActionLogRetentionService:
+    @classmethod
+    async def ensure_partitions(cls, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Создает секции с текущего месяца на months_ahead месяцев вперед, а
+        также секции месяцев, строки которых попали в action_logs_default
+        (action_logs_create_partition переносит их в секцию месяца), чтобы
+        они архивировались и удалялись вместе со своим месяцем.
+        """
+        if months_ahead is None:
+            months_ahead = settings.ACTION_LOG_PARTITIONS_AHEAD
+
+        async with DBSession() as db:
+            await db.execute("""
+                SELECT action_logs_create_partition(month::date) AS name
+                FROM (SELECT DISTINCT date_trunc('month', created_at) AS month FROM action_logs_default) AS months
+                ORDER BY month
+            """)
+            names = [row['name'] for row in await db.fetchall()]
+            await db.execute(
+                "SELECT action_logs_ensure_partitions(CURRENT_DATE, (CURRENT_DATE + make_interval(months => %s))::date) AS name",
+                (months_ahead,)
+            )
+            return names + [row['name'] for row in await db.fetchall() if row['name'] not in names]
+
+    @classmethod
+    async def get_partitions(cls) -> List[Dict[str, Any]]:
+        """Секции action_logs: имя, месяц (для секции по умолчанию - None) и число строк (оценка)."""
+        async with DBSession() as db:
+            await db.execute("""
+                SELECT c.relname AS name, GREATEST(c.reltuples, 0)::bigint AS estimated_rows
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'action_logs'::regclass
+                ORDER BY c.relname
+            """)
+            partitions = []
+            for row in await db.fetchall():
+                match = PARTITION_NAME.match(row['name'])
+                month = date(int(match.group(1)), int(match.group(2)), 1) if match else None
+                partitions.append({**row, "month": month})
+            return partitions
+
+    @classmethod
+    async def archive_expired(
+        cls,
+        retention_months: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        today: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Выгружает в архив и удаляет секции месяцев старше retention_months
+        полных месяцев до текущего. Строки секции по умолчанию предварительно
+        переносятся в секции своих месяцев (ensure_partitions). Возвращает
+        выгруженные секции.
+        """
+        if retention_months is None:
+            retention_months = settings.ACTION_LOG_RETENTION_MONTHS
+        if archive_dir is None:
+            archive_dir = settings.ACTION_LOG_ARCHIVE_DIR
+        if retention_months < 1:
+            raise ValueError("Срок хранения журнала действий - не меньше одного месяца")
+
+        cutoff = _add_months((today or date.today()).replace(day=1), -retention_months)
+        await cls.ensure_partitions()
+        expired = [
+            partition for partition in await cls.get_partitions()
+            if partition['month'] is not None and partition['month'] < cutoff
+        ]
+
+        await asyncio.to_thread(os.makedirs, archive_dir, exist_ok=True)
+        archived = []
+        for partition in expired:
+            path = os.path.join(archive_dir, f"{partition['name']}.ndjson.gz")
+            rows = await cls._archive_partition(partition['name'], path)
+            archived.append({"name": partition['name'], "month": partition['month'], "rows": rows, "path": path})
+        return archived
+
+    @classmethod
+    async def _archive_partition(cls, name: str, path: str) -> int:
+        """
+        Выгружает секцию в gzip-файл NDJSON (строка - JSON записи журнала),
+        затем отсоединяет и удаляет ее. Все выполняется в одной транзакции:
+        если выгрузка не удалась, секция остается на месте. Файл появляется
+        под итоговым именем только после полной записи на диск.
+
+        Запись и сжатие файла выполняются в потоке (asyncio.to_thread)
+        порциями по ARCHIVE_CHUNK_BYTES, чтобы не блокировать цикл событий.
+        """
+        table = sql.Identifier(name)
+        temp_path = path + ".tmp"
+        rows = 0
+        async with DBSession() as db:
+            await db.execute(sql.SQL("LOCK TABLE {} IN SHARE MODE").format(table))
+            raw, archive = await asyncio.to_thread(_open_archive, temp_path)
+            try:
+                chunk: List[bytes] = []
+                chunk_size = 0
+                query = sql.SQL("COPY (SELECT row_to_json(t)::text FROM {} t ORDER BY t.id) TO STDOUT").format(table)
+                async with db.copy(query) as copy:
+                    copy.set_types(["text"])
+                    async for (line,) in copy.rows():
+                        data = line.encode() + b"\n"
+                        chunk.append(data)
+                        chunk_size += len(data)
+                        rows += 1
+                        if chunk_size >= ARCHIVE_CHUNK_BYTES:
+                            await asyncio.to_thread(archive.write, b"".join(chunk))
+                            chunk, chunk_size = [], 0
+                if chunk:
+                    await asyncio.to_thread(archive.write, b"".join(chunk))
+            except BaseException:
+                await asyncio.to_thread(_discard_archive, raw, archive, temp_path)
+                raise
+            await asyncio.to_thread(_complete_archive, raw, archive, temp_path, path)
+
+            await db.execute(sql.SQL("ALTER TABLE action_logs DETACH PARTITION {}").format(table))
+            await db.execute(sql.SQL("DROP TABLE {}").format(table))
+        return rows
+
+
+action_log_retention_service = ActionLogRetentionService()
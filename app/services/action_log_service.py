@@ -1,16 +1,29 @@
-from typing import List, Optional, Dict, Any
+import csv
+import io
+import zlib
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime, date
+from psycopg.rows import tuple_row
 from app.models.action_log import (
     ActionLog, ActionLogCreate, ActionLogWithUser, 
-    ActionLogFilter, ActionLogSummary, ActionType
+    ActionLogFilter, ActionLogSummary, ActionLogDailySummary, ActionLogExportFormat, ActionType
 )
-from app.db.database import DBSession
+from app.db.database import DBSession, current_user_id
+from app.services.action_log_writer import action_log_writer
+from app.utils.db_utils import date_range_conditions
+from app.utils.pagination import Keyset
 
 
 class ActionLogService:
+    list_keyset: Keyset = Keyset(("al.created_at", "al.id"), (datetime, int), descending=True)
+    export_columns: Tuple[str, ...] = (
+        "id", "created_at", "user_id", "username", "action_type",
+        "table_name", "record_id", "old_values", "new_values"
+    )
+    export_batch_size: int = 2000
     
     @classmethod
-    def create_log(
+    async def create_log(
         cls, 
         user_id: Optional[int],
         action_type: ActionType,
@@ -19,7 +32,7 @@ class ActionLogService:
         old_values: Optional[Dict[str, Any]] = None,
         new_values: Optional[Dict[str, Any]] = None
     ) -> ActionLog:
-        with DBSession() as db:
+        async with DBSession() as db:
             log_data = ActionLogCreate(
                 user_id=user_id,
                 action_type=action_type,
@@ -29,7 +42,7 @@ class ActionLogService:
                 new_values=new_values
             )
             
-            db.execute(
+            await db.execute(
                 """
                 INSERT INTO action_logs (user_id, action_type, table_name, record_id, old_values, new_values)
                 VALUES (%s, %s, %s, %s, %s, %s)
@@ -40,38 +53,62 @@ class ActionLogService:
                     log_data.record_id, log_data.old_values, log_data.new_values
                 )
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return ActionLog(**result)
     
     @classmethod
-    def get_logs_with_filters(cls, filters: ActionLogFilter) -> List[ActionLogWithUser]:
-        with DBSession() as db:
-            conditions = []
-            params = []
-            
-            if filters.user_id:
-                conditions.append("al.user_id = %s")
-                params.append(filters.user_id)
-            
-            if filters.username:
-                conditions.append("LOWER(u.username) LIKE LOWER(%s)")
-                params.append(f"%{filters.username}%")
-            
-            if filters.action_type:
-                conditions.append("al.action_type = %s")
-                params.append(filters.action_type.value)
-            
-            if filters.table_name:
-                conditions.append("al.table_name = %s")
-                params.append(filters.table_name)
-            
-            if filters.date_from:
-                conditions.append("DATE(al.created_at) >= %s")
-                params.append(filters.date_from)
-            
-            if filters.date_to:
-                conditions.append("DATE(al.created_at) <= %s")
-                params.append(filters.date_to)
+    async def log_action(
+        cls,
+        action_type: ActionType,
+        table_name: Optional[str] = None,
+        record_id: Optional[int] = None,
+        old_values: Optional[Dict[str, Any]] = None,
+        new_values: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Журналирует действие текущего пользователя. Запись выполняется
+        фоновой задачей после фиксации транзакции запроса.
+        """
+        await action_log_writer.write(
+            current_user_id.get(), action_type, table_name, record_id, old_values, new_values
+        )
+
+    @staticmethod
+    def _filter_conditions(filters: ActionLogFilter) -> Tuple[List[str], list]:
+        """Условия WHERE по полям фильтра (без курсора) и их параметры."""
+        conditions = []
+        params = []
+        
+        if filters.user_id:
+            conditions.append("al.user_id = %s")
+            params.append(filters.user_id)
+        
+        if filters.username:
+            conditions.append("LOWER(u.username) LIKE LOWER(%s)")
+            params.append(f"%{filters.username}%")
+        
+        if filters.action_type:
+            conditions.append("al.action_type = %s")
+            params.append(filters.action_type.value)
+        
+        if filters.table_name:
+            conditions.append("al.table_name = %s")
+            params.append(filters.table_name)
+        
+        date_conditions, date_params = date_range_conditions("al.created_at", filters.date_from, filters.date_to)
+        conditions.extend(date_conditions)
+        params.extend(date_params)
+        return conditions, params
+
+    @classmethod
+    async def get_logs_with_filters(cls, filters: ActionLogFilter) -> List[ActionLogWithUser]:
+        async with DBSession() as db:
+            conditions, params = cls._filter_conditions(filters)
+
+            after_cursor, cursor_params = cls.list_keyset.condition(filters.cursor)
+            if after_cursor:
+                conditions.append(after_cursor)
+                params.extend(cursor_params)
             
             where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
             
@@ -85,98 +122,162 @@ class ActionLogService:
                 LEFT JOIN users u ON al.user_id = u.id
                 LEFT JOIN roles r ON u.role_id = r.id
                 {where_clause}
-                ORDER BY al.created_at DESC
+                ORDER BY {cls.list_keyset.order_by()}
                 LIMIT %s OFFSET %s
             """
             
-            params.extend([filters.limit, filters.offset])
-            db.execute(query, tuple(params))
-            results = db.fetchall()
+            params.extend([filters.limit, cls.list_keyset.offset(filters.cursor, filters.offset)])
+            await db.execute(query, tuple(params))
+            results = await db.fetchall()
             
             return [ActionLogWithUser(**row) for row in results]
     
     @classmethod
-    def get_user_actions_summary(
+    async def export_logs(
+        cls,
+        filters: ActionLogFilter,
+        export_format: ActionLogExportFormat,
+        compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Выгрузка журнала по фильтру (без limit/offset) в NDJSON или CSV
+        по частям, в порядке created_at, id.
+
+        Строки читаются именованным (серверным) курсором пачками по
+        export_batch_size, поэтому память не зависит от объема выгрузки.
+        Ответ передается уже после фиксации транзакции запроса, так что
+        курсор открывается на отдельном соединении из пула, вне единицы
+        работы. При compress части сжимаются в поток gzip.
+        """
+        conditions, params = cls._filter_conditions(filters)
+        where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+        query = f"""
+            SELECT al.id, al.created_at, al.user_id, u.username, al.action_type,
+                   al.table_name, al.record_id, al.old_values, al.new_values
+            FROM action_logs al
+            LEFT JOIN users u ON al.user_id = u.id
+            {where_clause}
+            ORDER BY al.created_at, al.id
+        """
+        if export_format == ActionLogExportFormat.NDJSON:
+            query = f"SELECT row_to_json(export)::text FROM ({query}) export"
+            encode = cls._encode_ndjson
+        else:
+            query = f"SELECT id, created_at, user_id, username, action_type, table_name, record_id, old_values::text, new_values::text FROM ({query}) export"
+            encode = cls._encode_csv
+
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+        if export_format == ActionLogExportFormat.CSV:
+            header = cls._encode_csv([cls.export_columns])
+            yield compressor.compress(header) if compressor else header
+
+        conn = await DBSession._getconn_async()
+        try:
+            async with conn.transaction():
+                async with conn.cursor(name="action_log_export", row_factory=tuple_row) as cursor:
+                    await cursor.execute(query, params)
+                    while rows := await cursor.fetchmany(cls.export_batch_size):
+                        chunk = encode(rows)
+                        if compressor:
+                            chunk = compressor.compress(chunk)
+                        if chunk:
+                            yield chunk
+        finally:
+            await DBSession._putconn_async(conn)
+
+        if compressor:
+            yield compressor.flush()
+
+    @staticmethod
+    def _encode_ndjson(rows: List[tuple]) -> bytes:
+        return "".join(line + "\n" for (line,) in rows).encode()
+
+    @staticmethod
+    def _encode_csv(rows: List[tuple]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    @classmethod
+    async def get_user_actions_summary(
         cls, 
         date_from: Optional[date] = None,
         date_to: Optional[date] = None
     ) -> List[ActionLogSummary]:
-        with DBSession() as db:
-            date_conditions = []
-            date_params = []
-            
-            if date_from:
-                date_conditions.append("DATE(al.created_at) >= %s")
-                date_params.append(date_from)
-            
-            if date_to:
-                date_conditions.append("DATE(al.created_at) <= %s")
-                date_params.append(date_to)
+        rows = await cls._get_user_activity(date_from, date_to, daily=False)
+        return [ActionLogSummary(**row) for row in rows]
+
+    @classmethod
+    async def get_user_daily_activity(
+        cls,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> List[ActionLogDailySummary]:
+        rows = await cls._get_user_activity(date_from, date_to, daily=True)
+        return [ActionLogDailySummary(**row) for row in rows]
+
+    @classmethod
+    async def _get_user_activity(
+        cls,
+        date_from: Optional[date],
+        date_to: Optional[date],
+        daily: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Действия пользователей за период (при daily - по дням) одним запросом:
+        сначала число действий каждого типа, затем одна строка на пользователя
+        (и день) с actions_by_type - JSON {тип действия: число}.
+        """
+        async with DBSession() as db:
+            date_conditions, date_params = date_range_conditions("al.created_at", date_from, date_to)
             
             date_where = "AND " + " AND ".join(date_conditions) if date_conditions else ""
+            day = "day, " if daily else ""
+            order_by = "day DESC, total_actions DESC" if daily else "total_actions DESC"
             
-            db.execute(f"""
+            await db.execute(f"""
+                WITH by_type AS (
+                    SELECT 
+                        {"al.created_at::date AS day," if daily else ""}
+                        al.user_id,
+                        al.action_type,
+                        COUNT(*) AS count,
+                        MAX(al.created_at) AS last_action_date
+                    FROM action_logs al
+                    WHERE al.user_id IS NOT NULL {date_where}
+                    GROUP BY {day}al.user_id, al.action_type
+                )
                 SELECT 
-                    u.id as user_id,
+                    {day}u.id as user_id,
                     u.username,
                     u.full_name as user_full_name,
-                    COUNT(al.id) as total_actions,
-                    MAX(al.created_at) as last_action_date
-                FROM users u
-                LEFT JOIN action_logs al ON u.id = al.user_id
-                WHERE u.id IS NOT NULL {date_where}
-                GROUP BY u.id, u.username, u.full_name
-                HAVING COUNT(al.id) > 0
-                ORDER BY total_actions DESC
+                    SUM(by_type.count)::int as total_actions,
+                    jsonb_object_agg(by_type.action_type, by_type.count) as actions_by_type,
+                    MAX(by_type.last_action_date) as last_action_date
+                FROM by_type
+                JOIN users u ON u.id = by_type.user_id
+                GROUP BY {day}u.id, u.username, u.full_name
+                ORDER BY {order_by}
             """, tuple(date_params))
             
-            results = db.fetchall()
-            summaries = []
-            
-            for row in results:
-                db.execute(f"""
-                    SELECT action_type, COUNT(*) as count
-                    FROM action_logs
-                    WHERE user_id = %s {date_where.replace('al.', '')}
-                    GROUP BY action_type
-                    ORDER BY count DESC
-                """, [row['user_id']] + date_params)
-                
-                actions_by_type = {action_row['action_type']: action_row['count'] 
-                                 for action_row in db.fetchall()}
-                
-                summaries.append(ActionLogSummary(
-                    user_id=row['user_id'],
-                    username=row['username'],
-                    user_full_name=row['user_full_name'],
-                    total_actions=row['total_actions'],
-                    actions_by_type=actions_by_type,
-                    last_action_date=row['last_action_date']
-                ))
-            
-            return summaries
+            results = []
+            for row in await db.fetchall():
+                actions = sorted(row['actions_by_type'].items(), key=lambda item: item[1], reverse=True)
+                results.append({**row, "actions_by_type": dict(actions)})
+            return results
     
     @classmethod
-    def get_system_activity_stats(
+    async def get_system_activity_stats(
         cls,
         date_from: Optional[date] = None,
         date_to: Optional[date] = None
     ) -> Dict[str, Any]:
-        with DBSession() as db:
-            date_conditions = []
-            date_params = []
-            
-            if date_from:
-                date_conditions.append("DATE(created_at) >= %s")
-                date_params.append(date_from)
-            
-            if date_to:
-                date_conditions.append("DATE(created_at) <= %s")
-                date_params.append(date_to)
+        async with DBSession() as db:
+            date_conditions, date_params = date_range_conditions("created_at", date_from, date_to)
             
             date_where = "WHERE " + " AND ".join(date_conditions) if date_conditions else ""
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT 
                     COUNT(*) as total_actions,
                     COUNT(DISTINCT user_id) as active_users,
@@ -187,9 +288,9 @@ class ActionLogService:
                 {date_where}
             """, tuple(date_params))
             
-            general_stats = db.fetchone()
+            general_stats = await db.fetchone()
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT action_type, COUNT(*) as count
                 FROM action_logs
                 {date_where}
@@ -197,9 +298,9 @@ class ActionLogService:
                 ORDER BY count DESC
             """, tuple(date_params))
             
-            actions_by_type = {row['action_type']: row['count'] for row in db.fetchall()}
+            actions_by_type = {row['action_type']: row['count'] for row in await db.fetchall()}
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT table_name, COUNT(*) as count
                 FROM action_logs
                 {date_where}
@@ -207,9 +308,9 @@ class ActionLogService:
                 ORDER BY count DESC
             """, tuple(date_params))
             
-            actions_by_table = {row['table_name']: row['count'] for row in db.fetchall()}
+            actions_by_table = {row['table_name']: row['count'] for row in await db.fetchall()}
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT 
                     DATE(created_at) as action_date,
                     COUNT(*) as daily_actions
@@ -220,7 +321,7 @@ class ActionLogService:
                 LIMIT 7
             """, tuple(date_params))
             
-            daily_activity = [dict(row) for row in db.fetchall()]
+            daily_activity = [dict(row) for row in await db.fetchall()]
             
             return {
                 "total_actions": general_stats['total_actions'] or 0,
@@ -232,16 +333,6 @@ class ActionLogService:
                 "actions_by_table": actions_by_table,
                 "daily_activity": daily_activity
             }
-    
-    @classmethod
-    def set_current_user_context(cls, user_id: int):
-        with DBSession() as db:
-            db.execute("SELECT set_config('app.current_user_id', %s, true)", (str(user_id),))
-    
-    @classmethod
-    def clear_user_context(cls):
-        with DBSession() as db:
-            db.execute("SELECT set_config('app.current_user_id', '', true)")
 
 
 action_log_service = ActionLogService()
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+Буферизованная запись журнала действий (action_logs).
+
+Записи копятся в памяти и пишутся фоновой задачей пачками через COPY:
+по достижении ACTION_LOG_BATCH_SIZE записей или раз в
+ACTION_LOG_FLUSH_SECONDS секунд. Обработчик запроса только добавляет
+запись в буфер и не ждет обмена с базой данных.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from psycopg.types.json import Jsonb
+
+from app.config import settings
+from app.core.metrics import Counter, Histogram
+from app.db.database import DBSession, on_commit, on_rollback
+from app.models.action_log import ActionType
+
+logger = logging.getLogger(__name__)
+
+_dumps = partial(json.dumps, ensure_ascii=False, default=str)
+
+
+def _jsonb(value: Optional[Dict[str, Any]]) -> Optional[Jsonb]:
+    return Jsonb(value, dumps=_dumps) if value is not None else None
+
+
+class ActionLogWriter:
+    """
+    Фоновая запись журнала действий пачками.
+
+    - Запись попадает в буфер после фиксации транзакции запроса (при
+      откате действие не журналируется), время действия фиксируется
+      в момент вызова.
+    - В лимит max_pending входят и записи еще не зафиксированных
+      транзакций. Если лимит исчерпан (база недоступна или не успевает),
+      вызов ждет освобождения места не дольше backpressure_timeout
+      секунд, после чего запись отбрасывается и учитывается в dropped.
+    - Неудачная пачка возвращается в начало буфера и пишется повторно.
+    - При остановке приложения буфер записывается полностью.
+
+    Пока фоновая задача не запущена (скрипты, задания), запись
+    выполняется сразу в текущей транзакции.
+    """
+
+    COPY_SQL = """
+        COPY action_logs (user_id, action_type, table_name, record_id, old_values, new_values, created_at)
+        FROM STDIN
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int, backpressure_timeout: float) -> None:
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.max_pending: int = max_pending
+        self.backpressure_timeout: float = backpressure_timeout
+        self._buffer: List[tuple] = []
+        # Записи транзакций, которые еще не зафиксированы и не откачены.
+        self._reserved: int = 0
+        self._task: Optional[asyncio.Task] = None
+        self._closing: bool = False
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._space_available: Optional[asyncio.Event] = None
+        self.written = Counter()
+        self.failures = Counter()
+        self.backpressure_waits = Counter()
+        self.dropped = Counter()
+        self.flush_ms = Histogram()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._flush_requested = asyncio.Event()
+            self._space_available = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу, дописав все записи буфера."""
+        if self._task is None:
+            return
+
+        self._closing = True
+        self._flush_requested.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+        if self._buffer:
+            logger.error("Не записано в журнал действий: %s", len(self._buffer))
+
+    async def write(
+        self,
+        user_id: Optional[int],
+        action_type: ActionType,
+        table_name: Optional[str] = None,
+        record_id: Optional[int] = None,
+        old_values: Optional[Dict[str, Any]] = None,
+        new_values: Optional[Dict[str, Any]] = None
+    ) -> None:
+        row = (
+            user_id, action_type.value, table_name, record_id,
+            _jsonb(old_values), _jsonb(new_values), datetime.now(timezone.utc)
+        )
+        if self._task is None:
+            await self._copy([row])
+            return
+
+        if not await self._reserve():
+            self.dropped.inc()
+            logger.warning("Буфер журнала действий заполнен, запись отброшена: %s", action_type.value)
+            return
+
+        on_commit(partial(self._append, row))
+        on_rollback(self._release)
+
+    async def _reserve(self) -> bool:
+        """Резервирует место в буфере; False - если место не освободилось за backpressure_timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.backpressure_timeout
+        while len(self._buffer) + self._reserved >= self.max_pending:
+            self.backpressure_waits.inc()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            self._space_available.clear()
+            self._flush_requested.set()
+            try:
+                await asyncio.wait_for(self._space_available.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        self._reserved += 1
+        return True
+
+    def _release(self) -> None:
+        self._reserved -= 1
+        self._space_available.set()
+
+    def _append(self, row: tuple) -> None:
+        self._reserved -= 1
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+        await self.flush()
+
+    async def flush(self) -> bool:
+        """Записывает буфер пачками. False - если запись пачки не удалась."""
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:len(batch)]
+
+            started = time.perf_counter()
+            try:
+                await self._copy(batch)
+            except Exception as e:
+                self.failures.inc()
+                self._buffer[:0] = batch
+                logger.error("Ошибка записи журнала действий: %s", e)
+                return False
+            finally:
+                self.flush_ms.observe((time.perf_counter() - started) * 1000)
+            self.written.inc(len(batch))
+            self._space_available.set()
+        return True
+
+    async def _copy(self, rows: List[tuple]) -> None:
+        async with DBSession() as db:
+            async with db.copy(self.COPY_SQL) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self._task is not None,
+            "pending": len(self._buffer),
+            "reserved": self._reserved,
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "written": self.written.value,
+            "failures": self.failures.value,
+            "backpressure_waits": self.backpressure_waits.value,
+            "dropped": self.dropped.value,
+            "flush_ms": self.flush_ms.snapshot(),
+        }
+
+
+action_log_writer = ActionLogWriter(
+    batch_size=settings.ACTION_LOG_BATCH_SIZE,
+    flush_interval=settings.ACTION_LOG_FLUSH_SECONDS,
+    max_pending=settings.ACTION_LOG_MAX_PENDING,
+    backpressure_timeout=settings.ACTION_LOG_BACKPRESSURE_SECONDS
+)
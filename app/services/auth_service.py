@@ -2,27 +2,40 @@ from typing import Optional
 from app.models.auth import UserInfo, ROLE_PERMISSIONS
 from app.models.user import UserInDB
 from app.services.user_service import user_service
-from app.utils.security import verify_password, create_access_token, verify_token
+from app.utils.security import password_hasher, create_access_token, verify_token
 from app.config import settings
-from app.db.database import DBSession
+from app.db.database import DBSession, on_commit, release_connection
+from app.utils.cache import TTLCache
 
 
 class AuthService:
+    _user_cache: TTLCache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
     
     @classmethod
-    def authenticate_user(cls, username: str, password: str) -> Optional[UserInDB]:
-        user = user_service.get_by_username(username)
+    async def authenticate_user(cls, username: str, password: str) -> Optional[UserInDB]:
+        user = await user_service.get_by_username(username)
         if not user:
             return None
-        
-        if not verify_password(password, user.hashed_password):
+
+        # Соединение не удерживается, пока пароль проверяется в пуле потоков.
+        await release_connection()
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+
+        if new_hash:
+            async with DBSession() as db:
+                await db.execute(
+                    "UPDATE users SET hashed_password = %s WHERE id = %s",
+                    (new_hash, user.id)
+                )
+            user.hashed_password = new_hash
             
         return user
     
     @classmethod
-    def create_access_token_for_user(cls, user: UserInDB) -> dict:
-        user_with_role = cls.get_user_with_role(user.id)
+    async def create_access_token_for_user(cls, user: UserInDB) -> dict:
+        user_with_role = await cls.get_user_with_role(user.id)
         if not user_with_role:
             raise ValueError("Не удалось получить данные о роли пользователя")
         
@@ -43,32 +56,52 @@ class AuthService:
         }
     
     @classmethod
-    def get_user_with_role(cls, user_id: int) -> Optional[UserInfo]:
-        with DBSession() as db:
-            db.execute("""
+    async def get_user_with_role(cls, user_id: int) -> Optional[UserInfo]:
+        cached = cls._user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        async with DBSession() as db:
+            await db.execute("""
                 SELECT u.id, u.username, u.full_name, r.name as role_name
                 FROM users u
                 JOIN roles r ON u.role_id = r.id
                 WHERE u.id = %s
             """, (user_id,))
             
-            result = db.fetchone()
+            result = await db.fetchone()
             if not result:
                 return None
             
             role_name = result['role_name']
             permissions = ROLE_PERMISSIONS.get(role_name, [])
             
-            return UserInfo(
+            user_info = UserInfo(
                 id=result['id'],
                 username=result['username'],
                 full_name=result['full_name'],
                 role_name=role_name,
                 permissions=permissions
             )
+            cls._user_cache.set(user_id, user_info)
+            return user_info
+
+    @classmethod
+    def invalidate_user(cls, user_id: int) -> None:
+        """
+        Удаляет пользователя из кеша. Вызывается после фиксации любого
+        изменения пользователя (через on_commit), чтобы роль и права
+        перечитывались из БД: сброс до фиксации позволил бы параллельному
+        запросу снова закешировать старые данные.
+        """
+        cls._user_cache.invalidate(user_id)
+
+    @classmethod
+    def get_cache_stats(cls) -> dict:
+        return cls._user_cache.stats()
     
     @classmethod
-    def get_current_user_from_token(cls, token: str) -> Optional[UserInfo]:
+    async def get_current_user_from_token(cls, token: str) -> Optional[UserInfo]:
         try:
             payload = verify_token(token)
             if not payload:
@@ -78,7 +111,7 @@ class AuthService:
             if not user_id:
                 return None
             
-            return cls.get_user_with_role(int(user_id))
+            return await cls.get_user_with_role(int(user_id))
             
         except Exception:
             return None
@@ -103,22 +136,23 @@ class AuthService:
             return False
     
     @classmethod
-    def change_password(cls, user_id: int, current_password: str, new_password: str) -> bool:
-        user = user_service.get_by_id(user_id)
+    async def change_password(cls, user_id: int, current_password: str, new_password: str) -> bool:
+        user = await user_service.get_by_id(user_id)
         if not user:
             raise ValueError("Пользователь не найден")
-        
-        if not verify_password(current_password, user.hashed_password):
+
+        await release_connection()
+        if not await password_hasher.verify(current_password, user.hashed_password):
             raise ValueError("Неверный текущий пароль")
         
-        from app.utils.security import get_password_hash
-        
-        with DBSession() as db:
-            hashed_new_password = get_password_hash(new_password)
-            db.execute(
+        hashed_new_password = await password_hasher.hash(new_password)
+
+        async with DBSession() as db:
+            await db.execute(
                 "UPDATE users SET hashed_password = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
                 (hashed_new_password, user_id)
             )
+            on_commit(lambda: cls.invalidate_user(user_id))
             return db.rowcount > 0
 
 
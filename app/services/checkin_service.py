@@ -2,81 +2,216 @@ from typing import List, Optional
 from datetime import date, datetime
 from app.models.checkin import (
     CheckIn, CheckInCreate, CheckInUpdate, CheckInWithDetails,
-    CheckOutRequest, CurrentGuestView, CheckInStatus
+    CheckOutRequest, CurrentGuestView, CheckInStatus,
+    BulkCheckInRequest, BulkCheckInResponse, BulkCheckInResult,
+    BulkCheckOutRequest, BulkCheckOutSummary
 )
-from app.db.database import DBSession
+from app.models.action_log import ActionType
+from app.db.database import DBSession, current_user_id
+from app.services.room_service import RoomService
+from app.utils.pagination import Keyset
 
 
 class CheckInService:
+    list_keyset: Keyset = Keyset(("ci.check_in_date", "ci.id"), (date, int), descending=True)
     
     @classmethod
-    def check_in_guest(cls, guest_id: int, room_id: int, check_in_date: Optional[date] = None) -> CheckIn:
+    async def check_in_guest(
+        cls,
+        guest_id: int,
+        room_id: int,
+        check_in_date: Optional[date] = None,
+        check_out_date: Optional[date] = None
+    ) -> CheckIn:
+        """
+        Заселение постояльца. check_out_date - плановая дата выезда: по ней
+        заселение закрывает групповое выселение (bulk_check_out); без нее
+        заселение бессрочно и закрывается только выселением постояльца.
+
+        Строки постояльца и номера блокируются (всегда в этом порядке), после
+        чего проверки и вставка выполняются одним запросом. Все три запроса
+        отправляются одним пакетом (pipeline), поэтому заселение занимает
+        один обмен с сервером, а одновременные заселения в номер не превышают
+        его вместимость.
+        """
         if check_in_date is None:
             check_in_date = date.today()
-            
-        with DBSession() as db:
-            db.execute("SELECT id FROM guests WHERE id = %s", (guest_id,))
-            if not db.fetchone():
+        if check_out_date is not None and check_out_date <= check_in_date:
+            raise ValueError("Плановая дата выезда должна быть позже даты заселения")
+
+        check_in_data = CheckInCreate(
+            guest_id=guest_id,
+            room_id=room_id,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            status=CheckInStatus.ACTIVE
+        )
+        active = CheckInStatus.ACTIVE.value
+
+        async with DBSession() as db:
+            async with db.connection.pipeline():
+                await db.execute("SELECT id FROM guests WHERE id = %s FOR NO KEY UPDATE", (guest_id,))
+                await db.execute("SELECT id FROM rooms WHERE id = %s FOR NO KEY UPDATE", (room_id,))
+                await db.execute(
+                    """
+                    WITH room AS (
+                        SELECT capacity, is_available FROM rooms WHERE id = %s
+                    ),
+                    checks AS (
+                        SELECT CASE
+                            WHEN NOT EXISTS (SELECT 1 FROM guests WHERE id = %s) THEN 'guest_not_found'
+                            WHEN NOT EXISTS (SELECT 1 FROM room) THEN 'room_not_found'
+                            WHEN NOT (SELECT is_available FROM room) THEN 'room_unavailable'
+                            WHEN EXISTS (SELECT 1 FROM check_ins WHERE guest_id = %s AND status = %s) THEN 'guest_checked_in'
+                            WHEN (SELECT COUNT(*) FROM check_ins WHERE room_id = %s AND status = %s)
+                                 >= (SELECT capacity FROM room) THEN 'room_full'
+                        END AS error
+                    ),
+                    inserted AS (
+                        INSERT INTO check_ins (guest_id, room_id, check_in_date, check_out_date, status)
+                        SELECT %s, %s, %s, %s, %s FROM checks WHERE error IS NULL
+                        RETURNING *
+                    )
+                    SELECT checks.error, inserted.*
+                    FROM checks LEFT JOIN inserted ON true
+                    """,
+                    (
+                        room_id, guest_id, guest_id, active, room_id, active,
+                        check_in_data.guest_id, check_in_data.room_id,
+                        check_in_data.check_in_date, check_in_data.check_out_date,
+                        check_in_data.status.value
+                    )
+                )
+            result = await db.fetchone()
+
+            error = result.pop("error")
+            if error == "guest_not_found":
                 raise ValueError(f"Постоялец с ID {guest_id} не найден")
-            
-            db.execute("SELECT capacity, is_available FROM rooms WHERE id = %s", (room_id,))
-            room_info = db.fetchone()
-            if not room_info:
+            if error == "room_not_found":
                 raise ValueError(f"Номер с ID {room_id} не найден")
-            
-            if not room_info['is_available']:
+            if error == "room_unavailable":
                 raise ValueError("Номер недоступен для заселения")
-            
-            db.execute(
-                "SELECT id FROM check_ins WHERE guest_id = %s AND status = %s",
-                (guest_id, CheckInStatus.ACTIVE.value)
-            )
-            if db.fetchone():
+            if error == "guest_checked_in":
                 raise ValueError("Постоялец уже заселен в другой номер")
-            
-            db.execute(
-                "SELECT COUNT(*) as current_guests FROM check_ins WHERE room_id = %s AND status = %s",
-                (room_id, CheckInStatus.ACTIVE.value)
-            )
-            current_guests = db.fetchone()['current_guests']
-            
-            if current_guests >= room_info['capacity']:
+            if error == "room_full":
                 raise ValueError("В номере нет свободных мест")
-            
-            check_in_data = CheckInCreate(
-                guest_id=guest_id,
-                room_id=room_id,
-                check_in_date=check_in_date,
-                status=CheckInStatus.ACTIVE
-            )
-            
-            db.execute(
-                """
-                INSERT INTO check_ins (guest_id, room_id, check_in_date, status)
-                VALUES (%s, %s, %s, %s)
-                RETURNING *
-                """,
-                (check_in_data.guest_id, check_in_data.room_id, 
-                 check_in_data.check_in_date, check_in_data.status.value)
-            )
-            result = db.fetchone()
+
+            RoomService.track_check_in(result)
             return CheckIn(**result)
 
     @classmethod
-    def check_out_guest(cls, check_out_request: CheckOutRequest) -> CheckIn:
-        with DBSession() as db:
-            db.execute(
+    async def bulk_check_in(cls, request: BulkCheckInRequest) -> BulkCheckInResponse:
+        """
+        Групповое заселение (туристическая группа, участники конференции).
+
+        В одной транзакции: блокируются строки всех постояльцев и номеров
+        (в порядке id, как и при одиночном заселении - сначала постояльцы),
+        одним запросом читается состояние всех пар, затем места
+        распределяются по порядку пар, а принятые пары вставляются одним
+        многострочным INSERT. Для каждой пары возвращается заселение или
+        причина отказа (те же сообщения, что и при одиночном заселении).
+        """
+        items = request.items
+        guest_ids = [item.guest_id for item in items]
+        room_ids = [item.room_id for item in items]
+        active = CheckInStatus.ACTIVE.value
+
+        async with DBSession() as db:
+            async with db.connection.pipeline():
+                await db.execute(
+                    "SELECT id FROM guests WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE",
+                    (sorted(set(guest_ids)),)
+                )
+                await db.execute(
+                    "SELECT id FROM rooms WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE",
+                    (sorted(set(room_ids)),)
+                )
+                await db.execute(
+                    """
+                    WITH items AS (
+                        SELECT * FROM unnest(%s::int[], %s::int[]) WITH ORDINALITY AS t(guest_id, room_id, position)
+                    )
+                    SELECT i.guest_id, i.room_id,
+                           g.id IS NOT NULL AS guest_exists,
+                           r.id IS NOT NULL AS room_exists,
+                           r.capacity, r.is_available,
+                           EXISTS (SELECT 1 FROM check_ins ci WHERE ci.guest_id = i.guest_id AND ci.status = %s) AS guest_checked_in,
+                           (SELECT COUNT(*) FROM check_ins ci WHERE ci.room_id = i.room_id AND ci.status = %s) AS room_guests
+                    FROM items i
+                    LEFT JOIN guests g ON g.id = i.guest_id
+                    LEFT JOIN rooms r ON r.id = i.room_id
+                    ORDER BY i.position
+                    """,
+                    (guest_ids, room_ids, active, active)
+                )
+            rows = await db.fetchall()
+
+            results: List[BulkCheckInResult] = []
+            free_places: dict = {}
+            accepted_guests: set = set()
+            for row in rows:
+                guest_id, room_id = row["guest_id"], row["room_id"]
+                if row["room_exists"]:
+                    free_places.setdefault(room_id, row["capacity"] - row["room_guests"])
+
+                error = None
+                if not row["guest_exists"]:
+                    error = f"Постоялец с ID {guest_id} не найден"
+                elif not row["room_exists"]:
+                    error = f"Номер с ID {room_id} не найден"
+                elif not row["is_available"]:
+                    error = "Номер недоступен для заселения"
+                elif row["guest_checked_in"] or guest_id in accepted_guests:
+                    error = "Постоялец уже заселен в другой номер"
+                elif free_places[room_id] <= 0:
+                    error = "В номере нет свободных мест"
+                else:
+                    free_places[room_id] -= 1
+                    accepted_guests.add(guest_id)
+                results.append(BulkCheckInResult(guest_id=guest_id, room_id=room_id, error=error))
+
+            accepted = [result for result in results if result.error is None]
+            if accepted:
+                await db.execute(
+                    """
+                    INSERT INTO check_ins (guest_id, room_id, check_in_date, check_out_date, status)
+                    SELECT guest_id, room_id, %s, %s, %s
+                    FROM unnest(%s::int[], %s::int[]) AS t(guest_id, room_id)
+                    RETURNING *
+                    """,
+                    (
+                        request.check_in_date, request.check_out_date, active,
+                        [result.guest_id for result in accepted],
+                        [result.room_id for result in accepted]
+                    )
+                )
+                inserted = {row["guest_id"]: row for row in await db.fetchall()}
+                for result in accepted:
+                    row = inserted[result.guest_id]
+                    RoomService.track_check_in(row)
+                    result.check_in = CheckIn(**row)
+
+            return BulkCheckInResponse(
+                checked_in=len(accepted),
+                failed=len(results) - len(accepted),
+                results=results
+            )
+
+    @classmethod
+    async def check_out_guest(cls, check_out_request: CheckOutRequest) -> CheckIn:
+        async with DBSession() as db:
+            await db.execute(
                 "SELECT * FROM check_ins WHERE id = %s AND status = %s",
                 (check_out_request.check_in_id, CheckInStatus.ACTIVE.value)
             )
-            check_in_record = db.fetchone()
+            check_in_record = await db.fetchone()
             if not check_in_record:
                 raise ValueError("Активное заселение не найдено")
             
             if check_out_request.check_out_date < check_in_record['check_in_date']:
                 raise ValueError("Дата выселения не может быть раньше даты заселения")
             
-            db.execute(
+            await db.execute(
                 """
                 UPDATE check_ins 
                 SET check_out_date = %s, status = %s, updated_at = CURRENT_TIMESTAMP
@@ -86,20 +221,78 @@ class CheckInService:
                 (check_out_request.check_out_date, CheckInStatus.COMPLETED.value, 
                  check_out_request.check_in_id)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
+            RoomService.track_check_in(result)
             return CheckIn(**result)
 
     @classmethod
-    def get_by_id(cls, check_in_id: int) -> Optional[CheckIn]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM check_ins WHERE id = %s", (check_in_id,))
-            result = db.fetchone()
+    async def bulk_check_out(cls, request: BulkCheckOutRequest) -> BulkCheckOutSummary:
+        """
+        Выселение всех активных заселений с плановой датой выезда
+        (check_out_date, задается при заселении или изменении заселения)
+        не позже указанной. Заселения без плановой даты выезда не
+        закрываются. Как и при выселении постояльца, check_out_date
+        становится фактической датой выезда - указанной датой.
+
+        Одним UPDATE закрываются все такие заселения, и в action_logs
+        добавляется одна сводная запись CHECK_OUT вместо построчных записей
+        триггера (app.skip_row_audit, миграция m0007). Запросы отправляются
+        одним пакетом (pipeline).
+        """
+        async with DBSession() as db:
+            async with db.connection.pipeline():
+                await db.execute("SELECT set_config('app.skip_row_audit', 'on', true)")
+                await db.execute(
+                    """
+                    WITH closed AS (
+                        UPDATE check_ins
+                        SET check_out_date = %s, status = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE status = %s AND check_out_date <= %s
+                        RETURNING id, guest_id, room_id, check_in_date, check_out_date, status
+                    ),
+                    logged AS (
+                        INSERT INTO action_logs (user_id, action_type, table_name, new_values)
+                        SELECT %s, %s, 'check_ins',
+                               jsonb_build_object(
+                                   'check_out_date', %s::date,
+                                   'checked_out', COUNT(*),
+                                   'check_in_ids', jsonb_agg(id ORDER BY id)
+                               )
+                        FROM closed
+                        HAVING COUNT(*) > 0
+                    )
+                    SELECT * FROM closed ORDER BY id
+                    """,
+                    (
+                        request.check_out_date, CheckInStatus.COMPLETED.value,
+                        CheckInStatus.ACTIVE.value, request.check_out_date,
+                        current_user_id.get(), ActionType.CHECK_OUT.value, request.check_out_date
+                    )
+                )
+                await db.connection.execute("SELECT set_config('app.skip_row_audit', 'off', true)")
+            closed = await db.fetchall()
+
+        for row in closed:
+            RoomService.track_check_in(row)
+
+        return BulkCheckOutSummary(
+            check_out_date=request.check_out_date,
+            checked_out=len(closed),
+            rooms=len({row["room_id"] for row in closed}),
+            check_in_ids=[row["id"] for row in closed]
+        )
+
+    @classmethod
+    async def get_by_id(cls, check_in_id: int) -> Optional[CheckIn]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM check_ins WHERE id = %s", (check_in_id,))
+            result = await db.fetchone()
             return CheckIn(**result) if result else None
 
     @classmethod
-    def get_with_details(cls, check_in_id: int) -> Optional[CheckInWithDetails]:
-        with DBSession() as db:
-            db.execute(
+    async def get_with_details(cls, check_in_id: int) -> Optional[CheckInWithDetails]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT ci.*, 
                        g.passport_number as guest_passport,
@@ -115,20 +308,20 @@ class CheckInService:
                 """,
                 (check_in_id,)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return CheckInWithDetails(**result) if result else None
 
     @classmethod
-    def get_current_guests(cls) -> List[CurrentGuestView]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM view_current_guests ORDER BY room_number")
-            results = db.fetchall()
+    async def get_current_guests(cls) -> List[CurrentGuestView]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM view_current_guests ORDER BY room_number")
+            results = await db.fetchall()
             return [CurrentGuestView(**row) for row in results]
 
     @classmethod
-    def get_guest_check_ins(cls, guest_id: int) -> List[CheckInWithDetails]:
-        with DBSession() as db:
-            db.execute(
+    async def get_guest_check_ins(cls, guest_id: int) -> List[CheckInWithDetails]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT ci.*, 
                        g.passport_number as guest_passport,
@@ -145,13 +338,13 @@ class CheckInService:
                 """,
                 (guest_id,)
             )
-            results = db.fetchall()
+            results = await db.fetchall()
             return [CheckInWithDetails(**row) for row in results]
 
     @classmethod
-    def get_room_check_ins(cls, room_id: int) -> List[CheckInWithDetails]:
-        with DBSession() as db:
-            db.execute(
+    async def get_room_check_ins(cls, room_id: int) -> List[CheckInWithDetails]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT ci.*, 
                        g.passport_number as guest_passport,
@@ -168,19 +361,20 @@ class CheckInService:
                 """,
                 (room_id,)
             )
-            results = db.fetchall()
+            results = await db.fetchall()
             return [CheckInWithDetails(**row) for row in results]
 
     @classmethod
-    def get_all_check_ins(
+    async def get_all_check_ins(
         cls, 
         status: Optional[CheckInStatus] = None,
         date_from: Optional[date] = None,
         date_to: Optional[date] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[CheckInWithDetails]:
-        with DBSession() as db:
+        async with DBSession() as db:
             conditions = []
             params = []
             
@@ -195,6 +389,11 @@ class CheckInService:
             if date_to:
                 conditions.append("ci.check_in_date <= %s")
                 params.append(date_to)
+
+            after_cursor, cursor_params = cls.list_keyset.condition(cursor)
+            if after_cursor:
+                conditions.append(after_cursor)
+                params.extend(cursor_params)
             
             where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
             
@@ -210,23 +409,23 @@ class CheckInService:
                 JOIN rooms r ON ci.room_id = r.id
                 JOIN room_types rt ON r.type_id = rt.id
                 {where_clause}
-                ORDER BY ci.check_in_date DESC
+                ORDER BY {cls.list_keyset.order_by()}
                 LIMIT %s OFFSET %s
             """
             
-            params.extend([limit, skip])
-            db.execute(query, tuple(params))
-            results = db.fetchall()
+            params.extend([limit, cls.list_keyset.offset(cursor, skip)])
+            await db.execute(query, tuple(params))
+            results = await db.fetchall()
             return [CheckInWithDetails(**row) for row in results]
 
     @classmethod
-    def update(cls, check_in_id: int, check_in_data: CheckInUpdate) -> Optional[CheckIn]:
+    async def update(cls, check_in_id: int, check_in_data: CheckInUpdate) -> Optional[CheckIn]:
         if not any(v is not None for v in check_in_data.dict().values()):
             return None
             
-        with DBSession() as db:
-            db.execute("SELECT * FROM check_ins WHERE id = %s", (check_in_id,))
-            existing = db.fetchone()
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM check_ins WHERE id = %s", (check_in_id,))
+            existing = await db.fetchone()
             if not existing:
                 return None
                 
@@ -255,17 +454,20 @@ class CheckInService:
             """
             values.append(check_in_id)
             
-            db.execute(query, tuple(values))
-            result = db.fetchone()
-            return CheckIn(**result) if result else None
+            await db.execute(query, tuple(values))
+            result = await db.fetchone()
+            if not result:
+                return None
+            RoomService.track_check_in(result)
+            return CheckIn(**result)
 
     @classmethod
-    def cancel_check_in(cls, check_in_id: int) -> Optional[CheckIn]:
-        return cls.update(check_in_id, CheckInUpdate(status=CheckInStatus.CANCELLED))
+    async def cancel_check_in(cls, check_in_id: int) -> Optional[CheckIn]:
+        return await cls.update(check_in_id, CheckInUpdate(status=CheckInStatus.CANCELLED))
 
     @classmethod
-    def get_occupancy_statistics(cls, date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
-        with DBSession() as db:
+    async def get_occupancy_statistics(cls, date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
+        async with DBSession() as db:
             date_conditions = []
             date_params = []
             
@@ -279,7 +481,7 @@ class CheckInService:
             
             date_where = "AND " + " AND ".join(date_conditions) if date_conditions else ""
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT 
                     COUNT(*) as total_checkins,
                     COUNT(CASE WHEN status = 'Активно' THEN 1 END) as active_checkins,
@@ -292,7 +494,7 @@ class CheckInService:
                 FROM check_ins ci
                 WHERE 1=1 {date_where}
             """, tuple(date_params))
-            stats = db.fetchone()
+            stats = await db.fetchone()
             
             return {
                 "total_checkins": stats['total_checkins'] or 0,
@@ -1,18 +1,86 @@
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Tuple
 from datetime import datetime, date
-from app.models.guest import Guest, GuestCreate, GuestUpdate, GuestSearchResult, GuestWithRoom
-from app.db.database import DBSession
+from app.config import settings
+from app.models.guest import Guest, GuestAutocompleteItem, GuestCreate, GuestUpdate, GuestSearchResult, GuestWithRoom
+from app.db.database import DBSession, on_commit
+from app.utils.pagination import Keyset
+from app.utils.prefix_index import PrefixIndex
 
 
 class GuestService:
+    list_keyset: Keyset = Keyset(("created_at", "id"), (datetime, int), descending=True)
+    # Число результатов нечеткого поиска по умолчанию.
+    FUZZY_SEARCH_LIMIT: int = 50
+    # Индекс автодополнения: фамилия, имя, паспорт (с дефисом и без).
+    # Строится при старте, обновляется после фиксации изменений постояльцев
+    # и периодически перечитывается (изменения, сделанные другими
+    # процессами приложения).
+    _name_index: PrefixIndex = PrefixIndex()
+    _name_index_lock: asyncio.Lock = asyncio.Lock()
+
+    @classmethod
+    def _index_entry(cls, guest: dict) -> tuple:
+        keys = (
+            guest["last_name"],
+            guest["first_name"],
+            guest["passport_number"],
+            guest["passport_number"].replace("-", ""),
+        )
+        payload = (guest["id"], guest["passport_number"], guest["last_name"], guest["first_name"], guest["middle_name"])
+        return guest["id"], keys, payload
+
+    @classmethod
+    async def build_name_index(cls, max_age: Optional[float] = None) -> None:
+        """
+        Загрузка индекса автодополнения из таблицы guests. С max_age индекс
+        перечитывается, только если он старше max_age секунд (проверка под
+        блокировкой, как у индекса занятости номеров).
+        """
+        async with cls._name_index_lock:
+            if max_age is not None and not cls._name_index.is_stale(max_age):
+                return
+            async with DBSession() as db:
+                await db.execute("SELECT id, passport_number, last_name, first_name, middle_name FROM guests")
+                results = await db.fetchall()
+            cls._name_index.build(cls._index_entry(row) for row in results)
+        if max_age is None:
+            print(f"✅ Индекс автодополнения постояльцев построен: {len(results)} записей")
+
+    @classmethod
+    def _reindex_after_commit(cls, guest: dict) -> None:
+        on_commit(lambda: cls._name_index.add(*cls._index_entry(guest)))
+
+    @classmethod
+    async def autocomplete(cls, query: str, limit: int = 10) -> List[GuestAutocompleteItem]:
+        """
+        Подсказки при вводе: постояльцы, у которых фамилия, имя или номер
+        паспорта начинаются с введенного текста. Обращается к базе данных,
+        только если индекс старше GUEST_INDEX_REFRESH_SECONDS.
+        """
+        if cls._name_index.is_stale(settings.GUEST_INDEX_REFRESH_SECONDS):
+            await cls.build_name_index(settings.GUEST_INDEX_REFRESH_SECONDS)
+
+        return [
+            GuestAutocompleteItem(
+                id=guest_id, passport_number=passport_number,
+                last_name=last_name, first_name=first_name, middle_name=middle_name
+            )
+            for guest_id, passport_number, last_name, first_name, middle_name in cls._name_index.search(query, limit)
+        ]
+
     @classmethod
-    def create(cls, guest_data: GuestCreate) -> Guest:
-        with DBSession() as db:
-            existing_guest = cls.get_by_passport(guest_data.passport_number)
+    def get_name_index_stats(cls) -> dict:
+        return cls._name_index.stats()
+
+    @classmethod
+    async def create(cls, guest_data: GuestCreate) -> Guest:
+        async with DBSession() as db:
+            existing_guest = await cls.get_by_passport(guest_data.passport_number)
             if existing_guest:
                 raise ValueError(f"Постоялец с паспортом {guest_data.passport_number} уже существует")
 
-            db.execute(
+            await db.execute(
                 """
                 INSERT INTO guests (passport_number, last_name, first_name, middle_name, 
                                   birth_year, gender, registration_address, phone, 
@@ -27,83 +95,175 @@ class GuestService:
                     guest_data.purpose_of_visit, guest_data.how_heard_about_us
                 )
             )
-            result = db.fetchone()
+            result = await db.fetchone()
+            cls._reindex_after_commit(result)
             return Guest(**result)
 
     @classmethod
-    def get_by_id(cls, guest_id: int) -> Optional[Guest]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM guests WHERE id = %s", (guest_id,))
-            result = db.fetchone()
+    async def get_by_id(cls, guest_id: int) -> Optional[Guest]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM guests WHERE id = %s", (guest_id,))
+            result = await db.fetchone()
             return Guest(**result) if result else None
 
     @classmethod
-    def get_by_passport(cls, passport_number: str) -> Optional[Guest]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM view_guest_by_passport WHERE passport_number = %s", (passport_number,))
-            result = db.fetchone()
+    async def get_by_passport(cls, passport_number: str) -> Optional[Guest]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM view_guest_by_passport WHERE passport_number = %s", (passport_number,))
+            result = await db.fetchone()
             if result:
                 return GuestWithRoom(**result)
             return None
 
     @classmethod
-    def search_by_name(cls, last_name: Optional[str] = None, first_name: Optional[str] = None, middle_name: Optional[str] = None) -> List[GuestSearchResult]:
+    async def search_by_name(
+        cls,
+        last_name: Optional[str] = None,
+        first_name: Optional[str] = None,
+        middle_name: Optional[str] = None,
+        fuzzy: bool = False,
+        limit: Optional[int] = None
+    ) -> List[GuestSearchResult]:
         """
         Поиск постояльца по ФИО.
         Результаты поиска: ФИО, Серия и номер паспорта.
+
+        Обычный режим ищет подстроку, нечеткий (fuzzy) - похожие по триграммам
+        написания (pg_trgm) и сортирует результаты по убыванию сходства.
+        Оба режима используют GIN-индексы по LOWER(last_name/first_name/middle_name).
+        Без limit обычный режим возвращает все совпадения, нечеткий -
+        FUZZY_SEARCH_LIMIT самых похожих.
         """
-        with DBSession() as db:
-            conditions = []
-            params = []
-            
-            if last_name:
-                conditions.append("LOWER(last_name) LIKE LOWER(%s)")
-                params.append(f"%{last_name}%")
-            
-            if first_name:
-                conditions.append("LOWER(first_name) LIKE LOWER(%s)")
-                params.append(f"%{first_name}%")
-                
-            if middle_name:
-                conditions.append("LOWER(middle_name) LIKE LOWER(%s)")
-                params.append(f"%{middle_name}%")
-            
-            if not conditions:
-                return []
-            
+        fields = [
+            (column, value)
+            for column, value in (("last_name", last_name), ("first_name", first_name), ("middle_name", middle_name))
+            if value
+        ]
+        if not fields:
+            return []
+
+        if fuzzy:
+            return await cls._search_by_name_similarity(fields, limit or cls.FUZZY_SEARCH_LIMIT)
+
+        async with DBSession() as db:
+            conditions = [f"LOWER({column}) LIKE LOWER(%s)" for column, _ in fields]
+            params = [f"%{value}%" for _, value in fields]
+
             query = f"""
-                SELECT id, last_name, first_name, middle_name, passport_number,
-                       room_number, check_in_date, check_out_date
+                SELECT id, last_name, first_name, middle_name, passport_number, phone,
+                       room_number, booking_status, check_in_date, check_out_date
                 FROM view_guest_by_name 
                 WHERE {' AND '.join(conditions)}
                 ORDER BY last_name, first_name
+                LIMIT %s
             """
             
-            db.execute(query, tuple(params))
-            results = db.fetchall()
+            # LIMIT NULL - без ограничения.
+            await db.execute(query, (*params, limit))
+            results = await db.fetchall()
+            return [GuestSearchResult(**row) for row in results]
+
+    @classmethod
+    async def _search_by_name_similarity(cls, fields: List[Tuple[str, str]], limit: int) -> List[GuestSearchResult]:
+        """
+        Нечеткий поиск: строка запроса похожа на часть значения поля
+        (оператор <% и порог pg_trgm.word_similarity_threshold).
+        Сходство результата - среднее word_similarity по указанным полям.
+        """
+        values = [value.lower() for _, value in fields]
+        conditions = [f"%s <%% LOWER({column})" for column, _ in fields]
+        scores = [f"word_similarity(%s, LOWER({column}))" for column, _ in fields]
+
+        async with DBSession() as db:
+            await db.execute(
+                f"""
+                SELECT id, last_name, first_name, middle_name, passport_number, phone,
+                       room_number, booking_status, check_in_date, check_out_date,
+                       ({' + '.join(scores)}) / {len(scores)} AS similarity
+                FROM view_guest_by_name
+                WHERE {' AND '.join(conditions)}
+                ORDER BY similarity DESC, last_name, first_name
+                LIMIT %s
+                """,
+                (*values, *values, limit)
+            )
+            results = await db.fetchall()
+            return [GuestSearchResult(**row) for row in results]
+
+    @classmethod
+    async def search_transliterated(cls, query: str, phonetic: bool = False, limit: int = 50) -> List[GuestSearchResult]:
+        """
+        Поиск постояльца по ФИО на кириллице или латинице.
+
+        Каждое слово запроса приводится функцией guest_translit к тому же
+        ключу, что хранится в guests.name_translit, и ищется как подстрока.
+        С phonetic дополнительно находятся постояльцы, у которых совпадают
+        фонетические коды всех слов (guest_phonetic): "Cvetkova" -> "Цветкова".
+        Результаты сортируются по сходству ключей.
+
+        Слова без букв и цифр (например, "-" или "ь") дают пустой ключ,
+        который совпал бы с любым постояльцем; такие слова отбрасываются,
+        а запрос только из них ничего не находит.
+        """
+        words = query.split()
+        if not words:
+            return []
+
+        async with DBSession() as db:
+            await db.execute(
+                "SELECT DISTINCT guest_translit(word) AS key FROM unnest(%s::text[]) AS word",
+                (words,)
+            )
+            keys = [row['key'] for row in await db.fetchall() if row['key']]
+            if not keys:
+                return []
+
+            conditions = " AND ".join(["g.name_translit LIKE %s"] * len(keys))
+            params = [f"%{key}%" for key in keys]
+            if phonetic:
+                conditions = f"({conditions}) OR g.name_phonetic @> guest_phonetic(%s)"
+                params.append(query)
+
+            await db.execute(
+                f"""
+                SELECT v.id, v.last_name, v.first_name, v.middle_name, v.passport_number, v.phone,
+                       v.room_number, v.booking_status, v.check_in_date, v.check_out_date,
+                       similarity(g.name_translit, guest_translit(%s)) AS similarity
+                FROM guests g
+                JOIN view_guest_by_name v ON v.id = g.id
+                WHERE {conditions}
+                ORDER BY similarity DESC, v.last_name, v.first_name
+                LIMIT %s
+                """,
+                (query, *params, limit)
+            )
+            results = await db.fetchall()
             return [GuestSearchResult(**row) for row in results]
 
     @classmethod
-    def get_all(cls, skip: int = 0, limit: int = 100) -> List[Guest]:
+    async def get_all(cls, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Guest]:
         """Получение списка всех зарегистрированных постояльцев."""
-        with DBSession() as db:
-            db.execute(
-                "SELECT * FROM guests ORDER BY created_at DESC LIMIT %s OFFSET %s", 
-                (limit, skip)
+        after_cursor, params = cls.list_keyset.condition(cursor)
+        where_clause = f"WHERE {after_cursor}" if after_cursor else ""
+
+        async with DBSession() as db:
+            await db.execute(
+                f"SELECT * FROM guests {where_clause} ORDER BY {cls.list_keyset.order_by()} LIMIT %s OFFSET %s", 
+                (*params, limit, cls.list_keyset.offset(cursor, skip))
             )
-            results = db.fetchall()
+            results = await db.fetchall()
             return [Guest(**row) for row in results]
 
     @classmethod
-    def get_current_guests(cls) -> List[GuestWithRoom]:
+    async def get_current_guests(cls) -> List[GuestWithRoom]:
         """Получение списка текущих постояльцев в отеле."""
-        with DBSession() as db:
-            db.execute("SELECT * FROM view_current_guests ORDER BY room_number")
-            results = db.fetchall()
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM view_current_guests ORDER BY room_number")
+            results = await db.fetchall()
             return [GuestWithRoom(**row) for row in results]
 
     @classmethod
-    def filter_guests(
+    async def filter_guests(
         cls, 
         room_number: Optional[str] = None,
         check_in_date: Optional[date] = None,
@@ -117,7 +277,7 @@ class GuestService:
         - Дате поселения  
         - Паспортным данным
         """
-        with DBSession() as db:
+        async with DBSession() as db:
             conditions = []
             params = []
             
@@ -145,25 +305,25 @@ class GuestService:
             """
             
             params.extend([limit, skip])
-            db.execute(query, tuple(params))
-            results = db.fetchall()
+            await db.execute(query, tuple(params))
+            results = await db.fetchall()
             return [GuestSearchResult(**row) for row in results]
 
     @classmethod
-    def update(cls, guest_id: int, guest_data: GuestUpdate) -> Optional[Guest]:
+    async def update(cls, guest_id: int, guest_data: GuestUpdate) -> Optional[Guest]:
         """Обновление данных постояльца."""
         if not any(v is not None for v in guest_data.dict().values()):
             return None
             
-        with DBSession() as db:
-            db.execute("SELECT id FROM guests WHERE id = %s", (guest_id,))
-            if not db.fetchone():
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM guests WHERE id = %s", (guest_id,))
+            if not await db.fetchone():
                 return None
                 
             if guest_data.passport_number:
-                db.execute("SELECT id FROM guests WHERE passport_number = %s AND id != %s", 
+                await db.execute("SELECT id FROM guests WHERE passport_number = %s AND id != %s", 
                           (guest_data.passport_number, guest_id))
-                if db.fetchone():
+                if await db.fetchone():
                     raise ValueError(f"Постоялец с паспортом {guest_data.passport_number} уже существует")
                 
             set_parts = []
@@ -187,44 +347,50 @@ class GuestService:
             """
             values.append(guest_id)
             
-            db.execute(query, tuple(values))
-            result = db.fetchone()
-            return Guest(**result) if result else None
+            await db.execute(query, tuple(values))
+            result = await db.fetchone()
+            if not result:
+                return None
+            cls._reindex_after_commit(result)
+            return Guest(**result)
 
     @classmethod
-    def delete(cls, guest_id: int) -> bool:
+    async def delete(cls, guest_id: int) -> bool:
         """
         Удаление данных о постояльце.
         """
-        with DBSession() as db:
-            db.execute(
+        async with DBSession() as db:
+            await db.execute(
                 "SELECT id FROM check_ins WHERE guest_id = %s AND status = 'Активно'", 
                 (guest_id,)
             )
-            if db.fetchone():
+            if await db.fetchone():
                 raise ValueError("Нельзя удалить постояльца с активным заселением")
             
-            db.execute("DELETE FROM guests WHERE id = %s", (guest_id,))
-            return db.rowcount > 0
+            await db.execute("DELETE FROM guests WHERE id = %s", (guest_id,))
+            if db.rowcount == 0:
+                return False
+            on_commit(lambda: cls._name_index.remove(guest_id))
+            return True
 
     @classmethod
-    def get_guest_statistics(cls) -> dict:
+    async def get_guest_statistics(cls) -> dict:
         """Получение статистики по постояльцам."""
-        with DBSession() as db:
-            db.execute("SELECT COUNT(*) as total FROM guests")
-            total_guests = db.fetchone()['total']
+        async with DBSession() as db:
+            await db.execute("SELECT COUNT(*) as total FROM guests")
+            total_guests = (await db.fetchone())['total']
             
-            db.execute("SELECT COUNT(*) as current FROM view_current_guests")
-            current_guests = db.fetchone()['current']
+            await db.execute("SELECT COUNT(*) as current FROM view_current_guests")
+            current_guests = (await db.fetchone())['current']
             
-            db.execute("""
+            await db.execute("""
                 SELECT how_heard_about_us, COUNT(*) as count 
                 FROM guests 
                 WHERE how_heard_about_us IS NOT NULL 
                 GROUP BY how_heard_about_us 
                 ORDER BY count DESC
             """)
-            sources = db.fetchall()
+            sources = await db.fetchall()
             
             return {
                 "total_guests": total_guests,
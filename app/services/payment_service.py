@@ -7,13 +7,17 @@ from app.models.payment import (
     PaymentStatus, PaymentMethod, PaymentSummary
 )
 from app.db.database import DBSession
+from app.utils.db_utils import date_range_conditions
+from app.utils.pagination import Keyset
 
 
 class PaymentService:    
+    room_payments_keyset: Keyset = Keyset(("rp.payment_date", "rp.id"), (datetime, int), descending=True)
+    service_payments_keyset: Keyset = Keyset(("sp.payment_date", "sp.id"), (datetime, int), descending=True)
     @classmethod
-    def create_room_payment(cls, payment_data: RoomPaymentCreate) -> RoomPayment:
-        with DBSession() as db:
-            db.execute(
+    async def create_room_payment(cls, payment_data: RoomPaymentCreate) -> RoomPayment:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT ci.*, r.room_number, r.price_per_night
                 FROM check_ins ci
@@ -22,7 +26,7 @@ class PaymentService:
                 """,
                 (payment_data.check_in_id,)
             )
-            check_in_info = db.fetchone()
+            check_in_info = await db.fetchone()
             if not check_in_info:
                 raise ValueError(f"Заселение с ID {payment_data.check_in_id} не найдено")
             
@@ -30,7 +34,7 @@ class PaymentService:
                 calculated_amount = check_in_info['price_per_night'] * payment_data.days_count
                 payment_data.amount = calculated_amount
             
-            db.execute(
+            await db.execute(
                 """
                 INSERT INTO room_payments (check_in_id, days_count, amount, payment_method, status)
                 VALUES (%s, %s, %s, %s, %s)
@@ -41,20 +45,20 @@ class PaymentService:
                     payment_data.payment_method.value, payment_data.status.value
                 )
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return RoomPayment(**result)
 
     @classmethod
-    def get_room_payment_by_id(cls, payment_id: int) -> Optional[RoomPayment]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM room_payments WHERE id = %s", (payment_id,))
-            result = db.fetchone()
+    async def get_room_payment_by_id(cls, payment_id: int) -> Optional[RoomPayment]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM room_payments WHERE id = %s", (payment_id,))
+            result = await db.fetchone()
             return RoomPayment(**result) if result else None
 
     @classmethod
-    def get_room_payment_with_details(cls, payment_id: int) -> Optional[RoomPaymentWithDetails]:
-        with DBSession() as db:
-            db.execute(
+    async def get_room_payment_with_details(cls, payment_id: int) -> Optional[RoomPaymentWithDetails]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT rp.*, 
                        g.passport_number as guest_passport,
@@ -70,28 +74,28 @@ class PaymentService:
                 """,
                 (payment_id,)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return RoomPaymentWithDetails(**result) if result else None
 
     @classmethod
-    def get_room_payments_by_check_in(cls, check_in_id: int) -> List[RoomPayment]:
-        with DBSession() as db:
-            db.execute(
+    async def get_room_payments_by_check_in(cls, check_in_id: int) -> List[RoomPayment]:
+        async with DBSession() as db:
+            await db.execute(
                 "SELECT * FROM room_payments WHERE check_in_id = %s ORDER BY payment_date",
                 (check_in_id,)
             )
-            results = db.fetchall()
+            results = await db.fetchall()
             return [RoomPayment(**row) for row in results]
 
     @classmethod
-    def create_service_payment(cls, payment_data: ServicePaymentCreate) -> ServicePayment:
-        with DBSession() as db:
-            db.execute("SELECT id FROM guests WHERE id = %s", (payment_data.guest_id,))
-            if not db.fetchone():
+    async def create_service_payment(cls, payment_data: ServicePaymentCreate) -> ServicePayment:
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM guests WHERE id = %s", (payment_data.guest_id,))
+            if not await db.fetchone():
                 raise ValueError(f"Гость с ID {payment_data.guest_id} не найден")
             
-            db.execute("SELECT price FROM services WHERE id = %s", (payment_data.service_id,))
-            service_info = db.fetchone()
+            await db.execute("SELECT price FROM services WHERE id = %s", (payment_data.service_id,))
+            service_info = await db.fetchone()
             if not service_info:
                 raise ValueError(f"Услуга с ID {payment_data.service_id} не найдена")
             
@@ -99,7 +103,7 @@ class PaymentService:
                 calculated_amount = service_info['price'] * payment_data.quantity
                 payment_data.amount = calculated_amount
             
-            db.execute(
+            await db.execute(
                 """
                 INSERT INTO service_payments (guest_id, service_id, amount, quantity, payment_method, status)
                 VALUES (%s, %s, %s, %s, %s, %s)
@@ -110,20 +114,20 @@ class PaymentService:
                     payment_data.quantity, payment_data.payment_method.value, payment_data.status.value
                 )
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return ServicePayment(**result)
 
     @classmethod
-    def get_service_payment_by_id(cls, payment_id: int) -> Optional[ServicePayment]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM service_payments WHERE id = %s", (payment_id,))
-            result = db.fetchone()
+    async def get_service_payment_by_id(cls, payment_id: int) -> Optional[ServicePayment]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM service_payments WHERE id = %s", (payment_id,))
+            result = await db.fetchone()
             return ServicePayment(**result) if result else None
 
     @classmethod
-    def get_service_payment_with_details(cls, payment_id: int) -> Optional[ServicePaymentWithDetails]:
-        with DBSession() as db:
-            db.execute(
+    async def get_service_payment_with_details(cls, payment_id: int) -> Optional[ServicePaymentWithDetails]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT sp.*, 
                        g.passport_number as guest_passport,
@@ -138,49 +142,50 @@ class PaymentService:
                 """,
                 (payment_id,)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return ServicePaymentWithDetails(**result) if result else None
 
     @classmethod
-    def get_service_payments_by_guest(cls, guest_id: int) -> List[ServicePayment]:
-        with DBSession() as db:
-            db.execute(
+    async def get_service_payments_by_guest(cls, guest_id: int) -> List[ServicePayment]:
+        async with DBSession() as db:
+            await db.execute(
                 "SELECT * FROM service_payments WHERE guest_id = %s ORDER BY payment_date",
                 (guest_id,)
             )
-            results = db.fetchall()
+            results = await db.fetchall()
             return [ServicePayment(**row) for row in results]
 
     @classmethod
-    def update_room_payment_status(cls, payment_id: int, status: PaymentStatus) -> Optional[RoomPayment]:
-        with DBSession() as db:
-            db.execute(
+    async def update_room_payment_status(cls, payment_id: int, status: PaymentStatus) -> Optional[RoomPayment]:
+        async with DBSession() as db:
+            await db.execute(
                 "UPDATE room_payments SET status = %s WHERE id = %s RETURNING *",
                 (status.value, payment_id)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return RoomPayment(**result) if result else None
 
     @classmethod
-    def update_service_payment_status(cls, payment_id: int, status: PaymentStatus) -> Optional[ServicePayment]:
-        with DBSession() as db:
-            db.execute(
+    async def update_service_payment_status(cls, payment_id: int, status: PaymentStatus) -> Optional[ServicePayment]:
+        async with DBSession() as db:
+            await db.execute(
                 "UPDATE service_payments SET status = %s WHERE id = %s RETURNING *",
                 (status.value, payment_id)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return ServicePayment(**result) if result else None
 
     @classmethod
-    def get_all_room_payments(
+    async def get_all_room_payments(
         cls, 
         status: PaymentStatus = None,
         date_from: date = None,
         date_to: date = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[RoomPaymentWithDetails]:
-        with DBSession() as db:
+        async with DBSession() as db:
             conditions = []
             params = []
             
@@ -188,13 +193,14 @@ class PaymentService:
                 conditions.append("rp.status = %s")
                 params.append(status.value)
             
-            if date_from:
-                conditions.append("DATE(rp.payment_date) >= %s")
-                params.append(date_from)
-                
-            if date_to:
-                conditions.append("DATE(rp.payment_date) <= %s")
-                params.append(date_to)
+            date_conditions, date_params = date_range_conditions("rp.payment_date", date_from, date_to)
+            conditions.extend(date_conditions)
+            params.extend(date_params)
+
+            after_cursor, cursor_params = cls.room_payments_keyset.condition(cursor)
+            if after_cursor:
+                conditions.append(after_cursor)
+                params.extend(cursor_params)
             
             where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
             
@@ -210,25 +216,26 @@ class PaymentService:
                 JOIN guests g ON ci.guest_id = g.id
                 JOIN rooms r ON ci.room_id = r.id
                 {where_clause}
-                ORDER BY rp.payment_date DESC
+                ORDER BY {cls.room_payments_keyset.order_by()}
                 LIMIT %s OFFSET %s
             """
             
-            params.extend([limit, skip])
-            db.execute(query, tuple(params))
-            results = db.fetchall()
+            params.extend([limit, cls.room_payments_keyset.offset(cursor, skip)])
+            await db.execute(query, tuple(params))
+            results = await db.fetchall()
             return [RoomPaymentWithDetails(**row) for row in results]
 
     @classmethod
-    def get_all_service_payments(
+    async def get_all_service_payments(
         cls, 
         status: PaymentStatus = None,
         date_from: date = None,
         date_to: date = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[ServicePaymentWithDetails]:
-        with DBSession() as db:
+        async with DBSession() as db:
             conditions = []
             params = []
             
@@ -236,13 +243,14 @@ class PaymentService:
                 conditions.append("sp.status = %s")
                 params.append(status.value)
             
-            if date_from:
-                conditions.append("DATE(sp.payment_date) >= %s")
-                params.append(date_from)
-                
-            if date_to:
-                conditions.append("DATE(sp.payment_date) <= %s")
-                params.append(date_to)
+            date_conditions, date_params = date_range_conditions("sp.payment_date", date_from, date_to)
+            conditions.extend(date_conditions)
+            params.extend(date_params)
+
+            after_cursor, cursor_params = cls.service_payments_keyset.condition(cursor)
+            if after_cursor:
+                conditions.append(after_cursor)
+                params.extend(cursor_params)
             
             where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
             
@@ -257,54 +265,40 @@ class PaymentService:
                 JOIN services s ON sp.service_id = s.id
                 JOIN service_types st ON s.type_id = st.id
                 {where_clause}
-                ORDER BY sp.payment_date DESC
+                ORDER BY {cls.service_payments_keyset.order_by()}
                 LIMIT %s OFFSET %s
             """
             
-            params.extend([limit, skip])
-            db.execute(query, tuple(params))
-            results = db.fetchall()
+            params.extend([limit, cls.service_payments_keyset.offset(cursor, skip)])
+            await db.execute(query, tuple(params))
+            results = await db.fetchall()
             return [ServicePaymentWithDetails(**row) for row in results]
 
     @classmethod
-    def get_payment_summary(
+    async def get_payment_summary(
         cls, 
         date_from: date = None, 
         date_to: date = None
     ) -> PaymentSummary:
-        with DBSession() as db:
-            date_conditions = []
-            date_params = []
-            
-            if date_from:
-                date_conditions.append("DATE(payment_date) >= %s")
-                date_params.append(date_from)
-            
-            if date_to:
-                date_conditions.append("DATE(payment_date) <= %s")
-                date_params.append(date_to)
+        """Итоги оплаченных платежей за период (по дневным итогам revenue_daily)."""
+        async with DBSession() as db:
+            date_conditions, date_params = date_range_conditions("day", date_from, date_to)
             
-            date_where = "WHERE " + " AND ".join(date_conditions) if date_conditions else ""
-            
-            db.execute(f"""
-                SELECT 
-                    COALESCE(SUM(amount), 0) as total_revenue,
-                    COUNT(*) as payments_count,
-                    COALESCE(AVG(amount), 0) as avg_payment
-                FROM room_payments
-                {date_where} AND status = 'Оплачено'
-            """, tuple(date_params))
-            room_stats = db.fetchone()
+            date_where = "AND " + " AND ".join(date_conditions) if date_conditions else ""
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT 
+                    source,
                     COALESCE(SUM(amount), 0) as total_revenue,
-                    COUNT(*) as payments_count,
-                    COALESCE(AVG(amount), 0) as avg_payment
-                FROM service_payments
-                {date_where} AND status = 'Оплачено'
-            """, tuple(date_params))
-            service_stats = db.fetchone()
+                    COALESCE(SUM(payments_count), 0) as payments_count
+                FROM revenue_daily
+                WHERE status = %s {date_where}
+                GROUP BY source
+            """, (PaymentStatus.PAID.value, *date_params))
+            stats = {row['source']: row for row in await db.fetchall()}
+
+            room_stats = stats.get('room', {'total_revenue': 0, 'payments_count': 0})
+            service_stats = stats.get('service', {'total_revenue': 0, 'payments_count': 0})
             
             total_room_revenue = Decimal(str(room_stats['total_revenue']))
             total_service_revenue = Decimal(str(service_stats['total_revenue']))
@@ -315,49 +309,54 @@ class PaymentService:
                 total_revenue=total_room_revenue + total_service_revenue,
                 room_payments_count=room_stats['payments_count'],
                 service_payments_count=service_stats['payments_count'],
-                average_room_payment=Decimal(str(room_stats['avg_payment'])),
-                average_service_payment=Decimal(str(service_stats['avg_payment']))
+                average_room_payment=cls._average(total_room_revenue, room_stats['payments_count']),
+                average_service_payment=cls._average(total_service_revenue, service_stats['payments_count'])
             )
 
+    @staticmethod
+    def _average(total: Decimal, count: int) -> Decimal:
+        return (total / count).quantize(Decimal("0.01")) if count else Decimal(0)
+
     @classmethod
-    def get_revenue_by_room(
+    async def get_revenue_by_room(
         cls, 
         date_from: date = None, 
         date_to: date = None
     ) -> List[dict]:
-        with DBSession() as db:
-            date_conditions = []
-            date_params = []
+        """Выручка по номерам за период (по дневным итогам revenue_daily)."""
+        async with DBSession() as db:
+            date_conditions, date_params = date_range_conditions("d.day", date_from, date_to)
             
-            if date_from:
-                date_conditions.append("DATE(rp.payment_date) >= %s")
-                date_params.append(date_from)
+            date_on = "AND " + " AND ".join(date_conditions) if date_conditions else ""
             
-            if date_to:
-                date_conditions.append("DATE(rp.payment_date) <= %s")
-                date_params.append(date_to)
-            
-            date_where = "AND " + " AND ".join(date_conditions) if date_conditions else ""
-            
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT 
                     r.room_number,
                     rt.name as room_type,
-                    COALESCE(SUM(rp.amount), 0) as total_revenue,
-                    COUNT(rp.id) as payments_count,
-                    COALESCE(AVG(rp.amount), 0) as avg_payment,
-                    SUM(rp.days_count) as total_days_sold
+                    COALESCE(SUM(d.amount), 0) as total_revenue,
+                    COALESCE(SUM(d.payments_count), 0) as payments_count,
+                    COALESCE(SUM(d.amount) / NULLIF(SUM(d.payments_count), 0), 0) as avg_payment,
+                    SUM(d.days_sold) as total_days_sold
                 FROM rooms r
-                LEFT JOIN check_ins ci ON r.id = ci.room_id
-                LEFT JOIN room_payments rp ON ci.id = rp.check_in_id AND rp.status = 'Оплачено'
+                LEFT JOIN revenue_daily d ON d.room_id = r.id AND d.source = 'room' AND d.status = %s {date_on}
                 LEFT JOIN room_types rt ON r.type_id = rt.id
-                WHERE 1=1 {date_where}
                 GROUP BY r.id, r.room_number, rt.name
                 ORDER BY total_revenue DESC
-            """, tuple(date_params))
+            """, (PaymentStatus.PAID.value, *date_params))
             
-            results = db.fetchall()
+            results = await db.fetchall()
             return [dict(row) for row in results]
 
+    @classmethod
+    async def rebuild_revenue_rollup(cls) -> dict:
+        """
+        Полный пересчет дневных итогов revenue_daily по таблицам платежей.
+        На время пересчета изменение платежей блокируется.
+        """
+        async with DBSession() as db:
+            await db.execute("SELECT revenue_daily_rebuild()")
+            await db.execute("SELECT COUNT(*) AS rows, MIN(day) AS first_day, MAX(day) AS last_day FROM revenue_daily")
+            return dict(await db.fetchone())
+
 
 payment_service = PaymentService()
\ No newline at end of file
@@ -1,45 +1,94 @@
+import asyncio
+from itertools import accumulate
 from typing import List, Optional
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from app.models.room import Room, RoomCreate, RoomUpdate, RoomType, RoomWithType, RoomAvailability
-from app.db.database import DBSession
+from app.config import settings
+from app.models.checkin import CheckInStatus
+from app.models.room import (
+    Room, RoomCreate, RoomUpdate, RoomType, RoomWithType, RoomAvailability,
+    AvailabilityCalendar, CalendarSpan, RoomCalendar, RoomDayStatus
+)
+from app.db.database import DBSession, on_commit
+from app.utils.availability import AvailabilityIndex
+from app.utils.pagination import Keyset
 
 
 class RoomService:
+    list_keyset: Keyset = Keyset(("r.room_number", "r.id"), (str, int))
+    # Занятость номеров в памяти: загружается при старте, обновляется после
+    # фиксации изменений номеров и заселений и периодически перечитывается
+    # (изменения, сделанные другими процессами приложения).
+    _availability: AvailabilityIndex = AvailabilityIndex(CheckInStatus.ACTIVE.value)
+    _availability_lock: asyncio.Lock = asyncio.Lock()
+
+    @classmethod
+    async def load_availability(cls, max_age: Optional[float] = None) -> None:
+        """
+        Загрузка индекса занятости из rooms, room_types и активных check_ins.
+        С max_age индекс перечитывается, только если он старше max_age секунд:
+        проверка выполняется под блокировкой, поэтому запросы, ждавшие
+        блокировку, не перечитывают индекс, только что загруженный другим.
+        """
+        async with cls._availability_lock:
+            if max_age is not None and not cls._availability.is_stale(max_age):
+                return
+            async with DBSession() as db:
+                await db.execute("SELECT id, name FROM room_types")
+                room_types = await db.fetchall()
+                await db.execute("SELECT id, room_number, type_id, capacity, price_per_night, is_available FROM rooms")
+                rooms = await db.fetchall()
+                await db.execute(
+                    "SELECT id, room_id, check_in_date, check_out_date, status FROM check_ins WHERE status = %s",
+                    (CheckInStatus.ACTIVE.value,)
+                )
+                check_ins = await db.fetchall()
+            cls._availability.build(room_types, rooms, check_ins)
+
+    @classmethod
+    def track_check_in(cls, check_in: dict) -> None:
+        """Учесть в индексе занятости созданное или измененное заселение (после фиксации)."""
+        check_in = dict(check_in)
+        on_commit(lambda: cls._availability.upsert_stay(check_in))
+
+    @classmethod
+    def get_availability_stats(cls) -> dict:
+        return cls._availability.stats()
     
     @classmethod
-    def create_room_type(cls, code: str, name: str, description: str = None) -> RoomType:
-        with DBSession() as db:
-            db.execute("SELECT id FROM room_types WHERE code = %s", (code.upper(),))
-            if db.fetchone():
+    async def create_room_type(cls, code: str, name: str, description: str = None) -> RoomType:
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM room_types WHERE code = %s", (code.upper(),))
+            if await db.fetchone():
                 raise ValueError(f"Тип номера с кодом {code} уже существует")
                 
-            db.execute(
+            await db.execute(
                 "INSERT INTO room_types (code, name, description) VALUES (%s, %s, %s) RETURNING *",
                 (code.upper(), name, description)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
+            on_commit(lambda: cls._availability.set_room_type(result["id"], result["name"]))
             return RoomType(**result)
 
     @classmethod
-    def get_room_types(cls) -> List[RoomType]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM room_types ORDER BY code")
-            results = db.fetchall()
+    async def get_room_types(cls) -> List[RoomType]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM room_types ORDER BY code")
+            results = await db.fetchall()
             return [RoomType(**row) for row in results]
 
     @classmethod
-    def create_room(cls, room_data: RoomCreate) -> Room:
-        with DBSession() as db:
-            existing_room = cls.get_by_number(room_data.room_number)
+    async def create_room(cls, room_data: RoomCreate) -> Room:
+        async with DBSession() as db:
+            existing_room = await cls.get_by_number(room_data.room_number)
             if existing_room:
                 raise ValueError(f"Номер {room_data.room_number} уже существует")
 
-            db.execute("SELECT id FROM room_types WHERE id = %s", (room_data.type_id,))
-            if not db.fetchone():
+            await db.execute("SELECT id FROM room_types WHERE id = %s", (room_data.type_id,))
+            if not await db.fetchone():
                 raise ValueError(f"Тип номера с ID {room_data.type_id} не существует")
 
-            db.execute(
+            await db.execute(
                 """
                 INSERT INTO rooms (room_number, type_id, capacity, room_count, 
                                  price_per_night, has_bathroom, equipment, is_available)
@@ -52,103 +101,156 @@ class RoomService:
                     room_data.equipment, room_data.is_available
                 )
             )
-            result = db.fetchone()
+            result = await db.fetchone()
+            on_commit(lambda: cls._availability.upsert_room(result))
             return Room(**result)
 
     @classmethod
-    def get_by_id(cls, room_id: int) -> Optional[Room]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM rooms WHERE id = %s", (room_id,))
-            result = db.fetchone()
+    async def get_by_id(cls, room_id: int) -> Optional[Room]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM rooms WHERE id = %s", (room_id,))
+            result = await db.fetchone()
             return Room(**result) if result else None
 
     @classmethod
-    def get_by_number(cls, room_number: str) -> Optional[Room]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM rooms WHERE room_number = %s", (room_number,))
-            result = db.fetchone()
+    async def get_by_number(cls, room_number: str) -> Optional[Room]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM rooms WHERE room_number = %s", (room_number,))
+            result = await db.fetchone()
             return Room(**result) if result else None
 
     @classmethod
-    def get_all(cls, skip: int = 0, limit: int = 100) -> List[RoomWithType]:
-        with DBSession() as db:
-            db.execute(
-                """
+    async def get_all(cls, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[RoomWithType]:
+        after_cursor, params = cls.list_keyset.condition(cursor)
+        where_clause = f"WHERE {after_cursor}" if after_cursor else ""
+
+        async with DBSession() as db:
+            await db.execute(
+                f"""
                 SELECT r.*, rt.code as type_code, rt.name as type_name, rt.description as type_description
                 FROM rooms r
                 LEFT JOIN room_types rt ON r.type_id = rt.id
-                ORDER BY r.room_number
+                {where_clause}
+                ORDER BY {cls.list_keyset.order_by()}
                 LIMIT %s OFFSET %s
                 """,
-                (limit, skip)
+                (*params, limit, cls.list_keyset.offset(cursor, skip))
             )
-            results = db.fetchall()
+            results = await db.fetchall()
             return [RoomWithType(**row) for row in results]
 
     @classmethod
-    def get_available_rooms(cls, check_in_date: date = None, check_out_date: date = None) -> List[RoomAvailability]:
-        with DBSession() as db:
-            if check_in_date and check_out_date:
-                query = """
-                    SELECT r.id as room_id, r.room_number, rt.name as type_name, 
-                           r.capacity, r.price_per_night, r.is_available,
-                           COALESCE(current_guests.guest_count, 0) as current_guest_count
-                    FROM rooms r
-                    LEFT JOIN room_types rt ON r.type_id = rt.id
-                    LEFT JOIN (
-                        SELECT room_id, COUNT(*) as guest_count
-                        FROM check_ins ci
-                        WHERE ci.status = 'Активно'
-                        AND ci.check_in_date <= %s
-                        AND (ci.check_out_date IS NULL OR ci.check_out_date >= %s)
-                        GROUP BY room_id
-                    ) current_guests ON r.id = current_guests.room_id
-                    WHERE r.is_available = true
-                    AND r.id NOT IN (
-                        SELECT DISTINCT room_id
-                        FROM check_ins ci
-                        WHERE ci.status = 'Активно'
-                        AND ci.check_in_date < %s
-                        AND (ci.check_out_date IS NULL OR ci.check_out_date > %s)
-                    )
-                    ORDER BY r.room_number
+    async def get_available_rooms(cls, check_in_date: date = None, check_out_date: date = None) -> List[RoomAvailability]:
+        """
+        Доступные номера. С периодом [check_in_date, check_out_date) - номера,
+        где на весь период остаются свободные места с учетом вместимости.
+        Ответ строится по индексу занятости в памяти, без запросов к базе данных.
+        """
+        if cls._availability.is_stale(settings.AVAILABILITY_REFRESH_SECONDS):
+            await cls.load_availability(settings.AVAILABILITY_REFRESH_SECONDS)
+
+        return [RoomAvailability(**room) for room in cls._availability.available(check_in_date, check_out_date)]
+
+    @classmethod
+    async def get_availability_calendar(cls, date_from: date, days: int) -> AvailabilityCalendar:
+        """
+        Шахматка: состояние каждого номера по дням периода [date_from, date_from + days).
+
+        Одним запросом выбираются номера и их активные и завершенные заселения, обрезанные
+        по периоду (в днях от начала периода). Занятость по дням считается
+        через массив разностей и накопленную сумму, после чего дни с
+        одинаковым состоянием сворачиваются в интервалы.
+        """
+        date_to = date_from + timedelta(days=days)
+
+        async with DBSession() as db:
+            await db.execute(
                 """
-                db.execute(query, (check_out_date, check_in_date, check_out_date, check_in_date))
+                SELECT r.id AS room_id, r.room_number, rt.name AS type_name, r.capacity, r.is_available,
+                       ci.id AS check_in_id,
+                       GREATEST(ci.check_in_date, %s) - %s AS start_day,
+                       CASE WHEN ci.check_out_date IS NULL THEN %s
+                            ELSE LEAST(GREATEST(ci.check_out_date, ci.check_in_date + 1), %s)
+                       END - %s AS end_day
+                FROM rooms r
+                LEFT JOIN room_types rt ON rt.id = r.type_id
+                LEFT JOIN check_ins ci ON ci.room_id = r.id
+                    AND ci.status IN (%s, %s)
+                    AND ci.check_in_date < %s
+                    AND (ci.check_out_date IS NULL OR GREATEST(ci.check_out_date, ci.check_in_date + 1) > %s)
+                ORDER BY r.room_number
+                """,
+                (
+                    date_from, date_from, date_to, date_to, date_from,
+                    CheckInStatus.ACTIVE.value, CheckInStatus.COMPLETED.value, date_to, date_from
+                )
+            )
+            results = await db.fetchall()
+
+        rooms: dict = {}
+        for row in results:
+            room = rooms.get(row["room_id"])
+            if room is None:
+                room = rooms[row["room_id"]] = {"info": row, "diff": [0] * (days + 1)}
+            if row["check_in_id"] is not None:
+                room["diff"][row["start_day"]] += 1
+                room["diff"][row["end_day"]] -= 1
+
+        calendar = []
+        for room in rooms.values():
+            info = room["info"]
+            occupancy = list(accumulate(room["diff"][:days]))
+            calendar.append(RoomCalendar(
+                room_id=info["room_id"],
+                room_number=info["room_number"],
+                type_name=info["type_name"],
+                capacity=info["capacity"],
+                spans=cls._calendar_spans(date_from, occupancy, info["capacity"], info["is_available"])
+            ))
+
+        return AvailabilityCalendar(date_from=date_from, date_to=date_to, rooms=calendar)
+
+    @staticmethod
+    def _calendar_spans(date_from: date, occupancy: List[int], capacity: int, is_available: bool) -> List[CalendarSpan]:
+        spans: List[CalendarSpan] = []
+        start = 0
+        for day in range(1, len(occupancy) + 1):
+            if day < len(occupancy) and occupancy[day] == occupancy[start]:
+                continue
+
+            guests = occupancy[start]
+            if not is_available:
+                day_status = RoomDayStatus.MAINTENANCE
+            elif guests == 0:
+                day_status = RoomDayStatus.FREE
+            elif guests < capacity:
+                day_status = RoomDayStatus.PARTIAL
             else:
-                query = """
-                    SELECT r.id as room_id, r.room_number, rt.name as type_name, 
-                           r.capacity, r.price_per_night, r.is_available,
-                           COALESCE(current_guests.guest_count, 0) as current_guest_count
-                    FROM rooms r
-                    LEFT JOIN room_types rt ON r.type_id = rt.id
-                    LEFT JOIN (
-                        SELECT room_id, COUNT(*) as guest_count
-                        FROM check_ins ci
-                        WHERE ci.status = 'Активно'
-                        GROUP BY room_id
-                    ) current_guests ON r.id = current_guests.room_id
-                    WHERE r.is_available = true
-                    ORDER BY r.room_number
-                """
-                db.execute(query)
-            
-            results = db.fetchall()
-            return [RoomAvailability(**row) for row in results]
+                day_status = RoomDayStatus.OCCUPIED
+
+            spans.append(CalendarSpan(
+                start=date_from + timedelta(days=start),
+                end=date_from + timedelta(days=day),
+                status=day_status,
+                guests=guests
+            ))
+            start = day
+        return spans
 
     @classmethod
-    def update(cls, room_id: int, room_data: RoomUpdate) -> Optional[Room]:
+    async def update(cls, room_id: int, room_data: RoomUpdate) -> Optional[Room]:
         if not any(v is not None for v in room_data.dict().values()):
             return None
             
-        with DBSession() as db:
-            db.execute("SELECT id FROM rooms WHERE id = %s", (room_id,))
-            if not db.fetchone():
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM rooms WHERE id = %s", (room_id,))
+            if not await db.fetchone():
                 return None
                 
             if room_data.room_number:
-                db.execute("SELECT id FROM rooms WHERE room_number = %s AND id != %s", 
+                await db.execute("SELECT id FROM rooms WHERE room_number = %s AND id != %s", 
                           (room_data.room_number, room_id))
-                if db.fetchone():
+                if await db.fetchone():
                     raise ValueError(f"Номер {room_data.room_number} уже существует")
                 
             set_parts = []
@@ -172,27 +274,33 @@ class RoomService:
             """
             values.append(room_id)
             
-            db.execute(query, tuple(values))
-            result = db.fetchone()
-            return Room(**result) if result else None
+            await db.execute(query, tuple(values))
+            result = await db.fetchone()
+            if not result:
+                return None
+            on_commit(lambda: cls._availability.upsert_room(result))
+            return Room(**result)
 
     @classmethod
-    def delete(cls, room_id: int) -> bool:
-        with DBSession() as db:
-            db.execute(
+    async def delete(cls, room_id: int) -> bool:
+        async with DBSession() as db:
+            await db.execute(
                 "SELECT id FROM check_ins WHERE room_id = %s AND status = 'Активно'", 
                 (room_id,)
             )
-            if db.fetchone():
+            if await db.fetchone():
                 raise ValueError("Нельзя удалить номер с активными заселениями")
             
-            db.execute("DELETE FROM rooms WHERE id = %s", (room_id,))
-            return db.rowcount > 0
+            await db.execute("DELETE FROM rooms WHERE id = %s", (room_id,))
+            if db.rowcount == 0:
+                return False
+            on_commit(lambda: cls._availability.remove_room(room_id))
+            return True
 
     @classmethod
-    def set_availability(cls, room_id: int, is_available: bool) -> Optional[Room]:
-        with DBSession() as db:
-            db.execute(
+    async def set_availability(cls, room_id: int, is_available: bool) -> Optional[Room]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 UPDATE rooms 
                 SET is_available = %s, updated_at = CURRENT_TIMESTAMP
@@ -201,13 +309,16 @@ class RoomService:
                 """,
                 (is_available, room_id)
             )
-            result = db.fetchone()
-            return Room(**result) if result else None
+            result = await db.fetchone()
+            if not result:
+                return None
+            on_commit(lambda: cls._availability.upsert_room(result))
+            return Room(**result)
 
     @classmethod
-    def get_room_statistics(cls) -> dict:
-        with DBSession() as db:
-            db.execute("""
+    async def get_room_statistics(cls) -> dict:
+        async with DBSession() as db:
+            await db.execute("""
                 SELECT 
                     COUNT(*) as total_rooms,
                     SUM(capacity) as total_capacity,
@@ -216,18 +327,18 @@ class RoomService:
                     SUM(CASE WHEN is_available = true THEN capacity END) as available_capacity
                 FROM rooms
             """)
-            stats = db.fetchone()
+            stats = await db.fetchone()
             
-            db.execute("""
+            await db.execute("""
                 SELECT 
                     COUNT(DISTINCT ci.room_id) as occupied_rooms,
                     COUNT(ci.id) as occupied_capacity
                 FROM check_ins ci
                 WHERE ci.status = 'Активно'
             """)
-            occupancy = db.fetchone()
+            occupancy = await db.fetchone()
             
-            db.execute("""
+            await db.execute("""
                 SELECT rt.name, rt.code, COUNT(r.id) as count, 
                        AVG(r.price_per_night) as avg_price
                 FROM room_types rt
@@ -235,7 +346,7 @@ class RoomService:
                 GROUP BY rt.id, rt.name, rt.code
                 ORDER BY rt.code
             """)
-            types_stats = db.fetchall()
+            types_stats = await db.fetchall()
             
             total_rooms = stats['total_rooms'] or 0
             available_rooms = stats['available_rooms'] or 0
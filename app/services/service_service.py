@@ -7,38 +7,39 @@ from app.models.service import (
     ServiceUsageStats, ServiceRevenueReport
 )
 from app.db.database import DBSession
+from app.utils.db_utils import date_range_conditions
 
 
 class ServiceService:
     @classmethod
-    def create_service_type(cls, service_type_data: ServiceTypeCreate) -> ServiceType:
-        with DBSession() as db:
-            db.execute("SELECT id FROM service_types WHERE name = %s", (service_type_data.name,))
-            if db.fetchone():
+    async def create_service_type(cls, service_type_data: ServiceTypeCreate) -> ServiceType:
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM service_types WHERE name = %s", (service_type_data.name,))
+            if await db.fetchone():
                 raise ValueError(f"Тип услуги '{service_type_data.name}' уже существует")
                 
-            db.execute(
+            await db.execute(
                 "INSERT INTO service_types (name, description) VALUES (%s, %s) RETURNING *",
                 (service_type_data.name, service_type_data.description)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return ServiceType(**result)
 
     @classmethod
-    def get_service_types(cls) -> List[ServiceType]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM service_types ORDER BY name")
-            results = db.fetchall()
+    async def get_service_types(cls) -> List[ServiceType]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM service_types ORDER BY name")
+            results = await db.fetchall()
             return [ServiceType(**row) for row in results]
 
     @classmethod
-    def update_service_type(cls, type_id: int, service_type_data: ServiceTypeUpdate) -> Optional[ServiceType]:
+    async def update_service_type(cls, type_id: int, service_type_data: ServiceTypeUpdate) -> Optional[ServiceType]:
         if not any(v is not None for v in service_type_data.dict().values()):
             return None
             
-        with DBSession() as db:
-            db.execute("SELECT id FROM service_types WHERE id = %s", (type_id,))
-            if not db.fetchone():
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM service_types WHERE id = %s", (type_id,))
+            if not await db.fetchone():
                 return None
                 
             set_parts = []
@@ -60,35 +61,35 @@ class ServiceService:
             """
             values.append(type_id)
             
-            db.execute(query, tuple(values))
-            result = db.fetchone()
+            await db.execute(query, tuple(values))
+            result = await db.fetchone()
             return ServiceType(**result) if result else None
 
     @classmethod
-    def delete_service_type(cls, type_id: int) -> bool:
-        with DBSession() as db:
-            db.execute("SELECT id FROM services WHERE type_id = %s", (type_id,))
-            if db.fetchone():
+    async def delete_service_type(cls, type_id: int) -> bool:
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM services WHERE type_id = %s", (type_id,))
+            if await db.fetchone():
                 raise ValueError("Нельзя удалить тип услуги, который используется")
             
-            db.execute("DELETE FROM service_types WHERE id = %s", (type_id,))
+            await db.execute("DELETE FROM service_types WHERE id = %s", (type_id,))
             return db.rowcount > 0
 
     @classmethod
-    def create_service(cls, service_data: ServiceCreate) -> Service:
-        with DBSession() as db:
-            db.execute("SELECT id FROM service_types WHERE id = %s", (service_data.type_id,))
-            if not db.fetchone():
+    async def create_service(cls, service_data: ServiceCreate) -> Service:
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM service_types WHERE id = %s", (service_data.type_id,))
+            if not await db.fetchone():
                 raise ValueError(f"Тип услуги с ID {service_data.type_id} не существует")
 
-            db.execute(
+            await db.execute(
                 "SELECT id FROM services WHERE name = %s AND type_id = %s", 
                 (service_data.name, service_data.type_id)
             )
-            if db.fetchone():
+            if await db.fetchone():
                 raise ValueError(f"Услуга '{service_data.name}' уже существует в данном типе")
 
-            db.execute(
+            await db.execute(
                 """
                 INSERT INTO services (type_id, name, description, price, is_available)
                 VALUES (%s, %s, %s, %s, %s)
@@ -99,20 +100,20 @@ class ServiceService:
                     service_data.price, service_data.is_available
                 )
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return Service(**result)
 
     @classmethod
-    def get_by_id(cls, service_id: int) -> Optional[Service]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM services WHERE id = %s", (service_id,))
-            result = db.fetchone()
+    async def get_by_id(cls, service_id: int) -> Optional[Service]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM services WHERE id = %s", (service_id,))
+            result = await db.fetchone()
             return Service(**result) if result else None
 
     @classmethod
-    def get_service_with_type(cls, service_id: int) -> Optional[ServiceWithType]:
-        with DBSession() as db:
-            db.execute(
+    async def get_service_with_type(cls, service_id: int) -> Optional[ServiceWithType]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT s.*, st.name as type_name, st.description as type_description
                 FROM services s
@@ -121,18 +122,18 @@ class ServiceService:
                 """,
                 (service_id,)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return ServiceWithType(**result) if result else None
 
     @classmethod
-    def get_all_services(
+    async def get_all_services(
         cls, 
         type_id: int = None,
         is_available: bool = None,
         skip: int = 0,
         limit: int = 100
     ) -> List[ServiceWithType]:
-        with DBSession() as db:
+        async with DBSession() as db:
             conditions = []
             params = []
             
@@ -156,14 +157,14 @@ class ServiceService:
             """
             
             params.extend([limit, skip])
-            db.execute(query, tuple(params))
-            results = db.fetchall()
+            await db.execute(query, tuple(params))
+            results = await db.fetchall()
             return [ServiceWithType(**row) for row in results]
 
     @classmethod
-    def get_services_by_type(cls, type_name: str) -> List[ServiceWithType]:
-        with DBSession() as db:
-            db.execute(
+    async def get_services_by_type(cls, type_name: str) -> List[ServiceWithType]:
+        async with DBSession() as db:
+            await db.execute(
                 """
                 SELECT s.*, st.name as type_name, st.description as type_description
                 FROM services s
@@ -173,17 +174,17 @@ class ServiceService:
                 """,
                 (f"%{type_name}%",)
             )
-            results = db.fetchall()
+            results = await db.fetchall()
             return [ServiceWithType(**row) for row in results]
 
     @classmethod
-    def update(cls, service_id: int, service_data: ServiceUpdate) -> Optional[Service]:
+    async def update(cls, service_id: int, service_data: ServiceUpdate) -> Optional[Service]:
         if not any(v is not None for v in service_data.dict().values()):
             return None
             
-        with DBSession() as db:
-            db.execute("SELECT id FROM services WHERE id = %s", (service_id,))
-            if not db.fetchone():
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM services WHERE id = %s", (service_id,))
+            if not await db.fetchone():
                 return None
                 
             set_parts = []
@@ -205,51 +206,42 @@ class ServiceService:
             """
             values.append(service_id)
             
-            db.execute(query, tuple(values))
-            result = db.fetchone()
+            await db.execute(query, tuple(values))
+            result = await db.fetchone()
             return Service(**result) if result else None
 
     @classmethod
-    def delete(cls, service_id: int) -> bool:
-        with DBSession() as db:
-            db.execute("SELECT id FROM service_payments WHERE service_id = %s", (service_id,))
-            if db.fetchone():
+    async def delete(cls, service_id: int) -> bool:
+        async with DBSession() as db:
+            await db.execute("SELECT id FROM service_payments WHERE service_id = %s", (service_id,))
+            if await db.fetchone():
                 raise ValueError("Нельзя удалить услугу, за которую есть платежи")
             
-            db.execute("DELETE FROM services WHERE id = %s", (service_id,))
+            await db.execute("DELETE FROM services WHERE id = %s", (service_id,))
             return db.rowcount > 0
 
     @classmethod
-    def set_availability(cls, service_id: int, is_available: bool) -> Optional[Service]:
-        with DBSession() as db:
-            db.execute(
+    async def set_availability(cls, service_id: int, is_available: bool) -> Optional[Service]:
+        async with DBSession() as db:
+            await db.execute(
                 "UPDATE services SET is_available = %s WHERE id = %s RETURNING *",
                 (is_available, service_id)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return Service(**result) if result else None
 
     @classmethod
-    def get_service_usage_stats(
+    async def get_service_usage_stats(
         cls, 
         date_from: date = None, 
         date_to: date = None
     ) -> List[ServiceUsageStats]:
-        with DBSession() as db:
-            date_conditions = []
-            date_params = []
-            
-            if date_from:
-                date_conditions.append("DATE(sp.payment_date) >= %s")
-                date_params.append(date_from)
-            
-            if date_to:
-                date_conditions.append("DATE(sp.payment_date) <= %s")
-                date_params.append(date_to)
+        async with DBSession() as db:
+            date_conditions, date_params = date_range_conditions("sp.payment_date", date_from, date_to)
             
             date_where = "AND " + " AND ".join(date_conditions) if date_conditions else ""
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT 
                     s.id as service_id,
                     s.name as service_name,
@@ -265,60 +257,51 @@ class ServiceService:
                 ORDER BY total_revenue DESC
             """, tuple(date_params))
             
-            results = db.fetchall()
+            results = await db.fetchall()
             return [ServiceUsageStats(**row) for row in results]
 
     @classmethod
-    def get_service_revenue_report(
+    async def get_service_revenue_report(
         cls, 
         date_from: date = None, 
         date_to: date = None
     ) -> List[ServiceRevenueReport]:
-        with DBSession() as db:
-            date_conditions = []
-            date_params = []
-            
-            if date_from:
-                date_conditions.append("DATE(sp.payment_date) >= %s")
-                date_params.append(date_from)
-            
-            if date_to:
-                date_conditions.append("DATE(sp.payment_date) <= %s")
-                date_params.append(date_to)
+        """Выручка по типам услуг за период (по дневным итогам revenue_daily)."""
+        async with DBSession() as db:
+            date_conditions, date_params = date_range_conditions("d.day", date_from, date_to)
             
-            date_where = "AND " + " AND ".join(date_conditions) if date_conditions else ""
+            date_on = "AND " + " AND ".join(date_conditions) if date_conditions else ""
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT COALESCE(SUM(amount), 0) as total_revenue
-                FROM service_payments
-                WHERE status = 'Оплачено' {date_where}
+                FROM revenue_daily d
+                WHERE d.source = 'service' AND d.status = 'Оплачено' {date_on}
             """, tuple(date_params))
-            total_revenue = db.fetchone()['total_revenue'] or 0
+            total_revenue = (await db.fetchone())['total_revenue'] or 0
             
-            db.execute(f"""
+            await db.execute(f"""
                 SELECT 
                     st.name as service_type,
-                    COALESCE(SUM(sp.amount), 0) as total_revenue,
-                    COUNT(sp.id) as orders_count,
+                    COALESCE(SUM(d.amount), 0) as total_revenue,
+                    COALESCE(SUM(d.payments_count), 0) as orders_count,
                     CASE 
-                        WHEN %s > 0 THEN (COALESCE(SUM(sp.amount), 0) * 100.0 / %s)
+                        WHEN %s > 0 THEN (COALESCE(SUM(d.amount), 0) * 100.0 / %s)
                         ELSE 0 
                     END as percentage_of_total
                 FROM service_types st
                 LEFT JOIN services s ON st.id = s.type_id
-                LEFT JOIN service_payments sp ON s.id = sp.service_id AND sp.status = 'Оплачено'
-                WHERE 1=1 {date_where}
+                LEFT JOIN revenue_daily d ON d.service_id = s.id AND d.source = 'service' AND d.status = 'Оплачено' {date_on}
                 GROUP BY st.id, st.name
                 ORDER BY total_revenue DESC
             """, [total_revenue, total_revenue] + date_params)
             
-            results = db.fetchall()
+            results = await db.fetchall()
             return [ServiceRevenueReport(**row) for row in results]
 
     @classmethod
-    def get_popular_services(cls, limit: int = 10) -> List[dict]:
-        with DBSession() as db:
-            db.execute("""
+    async def get_popular_services(cls, limit: int = 10) -> List[dict]:
+        async with DBSession() as db:
+            await db.execute("""
                 SELECT 
                     s.name,
                     st.name as service_type,
@@ -332,7 +315,7 @@ class ServiceService:
                 LIMIT %s
             """, (limit,))
             
-            results = db.fetchall()
+            results = await db.fetchall()
             return [dict(row) for row in results]
 
 
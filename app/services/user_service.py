@@ -1,26 +1,26 @@
 from typing import List, Optional
-from app.models.user import User, UserInDB
-from app.db.database import DBSession
+from app.models.user import UserInDB
+from app.db.database import DBSession, on_commit
 
 class UserService:
     @classmethod
-    def create(
+    async def create(
         cls,
         username: str,
         password: str,
         role_id: int,
         full_name: Optional[str] = None
     ) -> UserInDB:
-        from app.utils.security import get_password_hash
+        from app.utils.security import password_hasher
 
-        with DBSession() as db:
-            existing_user = cls.get_by_username(username)
-            if existing_user:
-                raise ValueError(f"Пользователь с именем {username} уже существует")
+        existing_user = await cls.get_by_username(username)
+        if existing_user:
+            raise ValueError(f"Пользователь с именем {username} уже существует")
 
-            hashed_password = get_password_hash(password)
-            
-            db.execute(
+        hashed_password = await password_hasher.hash(password)
+
+        async with DBSession() as db:
+            await db.execute(
                 """
                 INSERT INTO users (username, hashed_password, role_id, full_name)
                 VALUES (%s, %s, %s, %s)
@@ -28,36 +28,36 @@ class UserService:
                 """,
                 (username, hashed_password, role_id, full_name)
             )
-            result = db.fetchone()
+            result = await db.fetchone()
             return UserInDB(**result)
 
     @classmethod
-    def get_by_id(cls, user_id: int) -> Optional[UserInDB]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-            result = db.fetchone()
+    async def get_by_id(cls, user_id: int) -> Optional[UserInDB]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+            result = await db.fetchone()
             return UserInDB(**result) if result else None
 
     @classmethod
-    def get_by_username(cls, username: str) -> Optional[UserInDB]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM users WHERE username = %s", (username,))
-            result = db.fetchone()
+    async def get_by_username(cls, username: str) -> Optional[UserInDB]:
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM users WHERE username = %s", (username,))
+            result = await db.fetchone()
             return UserInDB(**result) if result else None
 
     @classmethod
-    def get_all(
+    async def get_all(
         cls,
         skip: int = 0,
         limit: int = 100
     ) -> List[UserInDB]:
-        with DBSession() as db:
-            db.execute("SELECT * FROM users ORDER BY id LIMIT %s OFFSET %s", (limit, skip))
-            results = db.fetchall()
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM users ORDER BY id LIMIT %s OFFSET %s", (limit, skip))
+            results = await db.fetchall()
             return [UserInDB(**row) for row in results]
 
     @classmethod
-    def update(
+    async def update(
         cls,
         user_id: int,
         **kwargs
@@ -65,9 +65,9 @@ class UserService:
         if not kwargs:
             return None
             
-        with DBSession() as db:
-            db.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-            if not db.fetchone():
+        async with DBSession() as db:
+            await db.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+            if not await db.fetchone():
                 return None
                 
             set_parts = []
@@ -89,14 +89,22 @@ class UserService:
             """
             values.append(user_id)
             
-            db.execute(query, tuple(values))
-            result = db.fetchone()
+            await db.execute(query, tuple(values))
+            result = await db.fetchone()
+
+            from app.services.auth_service import auth_service
+            on_commit(lambda: auth_service.invalidate_user(user_id))
+
             return UserInDB(**result) if result else None
 
     @classmethod
-    def delete(cls, user_id: int) -> bool:
-        with DBSession() as db:
-            db.execute("DELETE FROM users WHERE id = %s", (user_id,))
+    async def delete(cls, user_id: int) -> bool:
+        async with DBSession() as db:
+            await db.execute("DELETE FROM users WHERE id = %s", (user_id,))
+
+            from app.services.auth_service import auth_service
+            on_commit(lambda: auth_service.invalidate_user(user_id))
+
             return db.rowcount > 0
 
 user_service = UserService()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Внутрипроцессный индекс занятости номеров.
+
+Для каждого номера хранится упорядоченный по дате заезда список активных
+заселений - полуоткрытых интервалов [заезд, выезд) в днях (date.toordinal()).
+Заселение без даты выезда занимает номер бессрочно. Ответ на вопрос
+"какие номера свободны на [from, to)" считается без обращения к базе данных.
+"""
+import time
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.metrics import Counter, Histogram
+
+OPEN_END = date.max.toordinal() + 1
+
+
+def _stay_interval(check_in: dict) -> Tuple[int, int]:
+    start = check_in["check_in_date"].toordinal()
+    check_out = check_in.get("check_out_date")
+    end = check_out.toordinal() if check_out else OPEN_END
+    # Выезд в день заезда все равно занимает номер на этот день.
+    return start, max(end, start + 1)
+
+
+class AvailabilityIndex:
+    """
+    Номера (вместимость, доступность, цена, тип) и интервалы их активных
+    заселений. Предназначен для использования из одного потока (цикла событий).
+    """
+
+    def __init__(self, active_status: str) -> None:
+        self.active_status: str = active_status
+        self._rooms: Dict[int, dict] = {}
+        self._room_types: Dict[int, str] = {}
+        self._stays: Dict[int, List[Tuple[int, int, int]]] = {}
+        self._stay_rooms: Dict[int, int] = {}
+        self.loaded_at: Optional[float] = None
+        self.lookups = Counter()
+        self.lookup_ms = Histogram()
+
+    def build(self, room_types: Iterable[dict], rooms: Iterable[dict], check_ins: Iterable[dict]) -> None:
+        self._room_types = {row["id"]: row["name"] for row in room_types}
+        self._rooms = {}
+        self._stays = {}
+        self._stay_rooms = {}
+        for room in rooms:
+            self.upsert_room(room)
+        for check_in in check_ins:
+            self.upsert_stay(check_in)
+        self.loaded_at = time.monotonic()
+
+    def is_stale(self, max_age: float) -> bool:
+        if self.loaded_at is None:
+            return True
+        return max_age > 0 and time.monotonic() - self.loaded_at > max_age
+
+    def set_room_type(self, type_id: int, name: str) -> None:
+        self._room_types[type_id] = name
+
+    def upsert_room(self, room: dict) -> None:
+        self._rooms[room["id"]] = {
+            "room_id": room["id"],
+            "room_number": room["room_number"],
+            "type_id": room["type_id"],
+            "capacity": room["capacity"],
+            "price_per_night": room["price_per_night"],
+            "is_available": room["is_available"],
+        }
+
+    def remove_room(self, room_id: int) -> None:
+        self._rooms.pop(room_id, None)
+        for _, _, check_in_id in self._stays.pop(room_id, []):
+            self._stay_rooms.pop(check_in_id, None)
+
+    def upsert_stay(self, check_in: dict) -> None:
+        """Учитывает заселение, если оно активно, иначе убирает его из индекса."""
+        self.remove_stay(check_in["id"])
+        if check_in["status"] != self.active_status:
+            return
+
+        start, end = _stay_interval(check_in)
+        insort(self._stays.setdefault(check_in["room_id"], []), (start, end, check_in["id"]))
+        self._stay_rooms[check_in["id"]] = check_in["room_id"]
+
+    def remove_stay(self, check_in_id: int) -> None:
+        room_id = self._stay_rooms.pop(check_in_id, None)
+        if room_id is None:
+            return
+
+        stays = self._stays[room_id]
+        for index, (_, _, stay_id) in enumerate(stays):
+            if stay_id == check_in_id:
+                del stays[index]
+                break
+
+    def peak_occupancy(self, room_id: int, start: int, end: int) -> int:
+        """Наибольшее число одновременно проживающих в номере на [start, end)."""
+        stays = self._stays.get(room_id)
+        if not stays:
+            return 0
+
+        events: List[Tuple[int, int]] = []
+        for stay_start, stay_end, _ in stays[:bisect_left(stays, (end,))]:
+            if stay_end > start:
+                events.append((max(stay_start, start), 1))
+                events.append((min(stay_end, end), -1))
+        # При равной дате выезд (-1) обрабатывается раньше заезда.
+        events.sort()
+
+        peak = current = 0
+        for _, delta in events:
+            current += delta
+            peak = max(peak, current)
+        return peak
+
+    def available(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[dict]:
+        """
+        Доступные номера с числом проживающих. С периодом [date_from, date_to)
+        возвращаются только номера, где на весь период есть свободные места,
+        а число проживающих - наибольшее за период; без периода - все
+        доступные номера и число активных заселений.
+        """
+        started = time.perf_counter()
+        results: List[dict] = []
+        for room_id, room in self._rooms.items():
+            if not room["is_available"]:
+                continue
+
+            if date_from and date_to:
+                guests = self.peak_occupancy(room_id, date_from.toordinal(), date_to.toordinal())
+                if guests >= room["capacity"]:
+                    continue
+            else:
+                guests = len(self._stays.get(room_id, ()))
+
+            results.append({
+                **room,
+                "type_name": self._room_types.get(room["type_id"]),
+                "current_guest_count": guests,
+                "free_places": max(room["capacity"] - guests, 0),
+            })
+        results.sort(key=lambda room: room["room_number"])
+
+        self.lookups.inc()
+        self.lookup_ms.observe((time.perf_counter() - started) * 1000)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self._rooms),
+            "active_stays": len(self._stay_rooms),
+            "loaded_seconds_ago": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            "lookups": self.lookups.value,
+            "lookup_ms": self.lookup_ms.snapshot(),
+        }
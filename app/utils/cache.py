@@ -0,0 +1,72 @@
+"""
+Внутрипроцессный кеш с ограничением размера (LRU) и временем жизни записей (TTL).
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.metrics import Counter
+
+
+class TTLCache:
+    """
+    Кеш фиксированного размера: при переполнении вытесняется запись,
+    к которой дольше всего не обращались; записи старше ttl секунд
+    считаются отсутствующими.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = Counter()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits.inc()
+                    return value
+                del self._data[key]
+        self.misses.inc()
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions.inc()
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, object]:
+        hits, misses = self.hits.value, self.misses.value
+        total = hits + misses
+        return {
+            "size": len(self._data),
+            "max_size": self.maxsize,
+            "ttl": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "evictions": self.evictions.value,
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+        }
@@ -1,18 +1,32 @@
-from app.db.database import DBSession
-
-def safe_db_execute(query: str, params: tuple):
-    with DBSession() as db:
-        if db is None:
-            raise Exception("Подключение к базе данных не установлено")
-        if params:
-            db.execute(query, params)
-        else:
-            db.execute(query)
-        return db
-
-
-def get_db_cursor():
-    with DBSession() as db:
-        if db is None:
-            raise Exception("Подключение к базе данных не установлено")
-        return db
\ No newline at end of file
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+
+def _as_date(value: date) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def date_range_conditions(
+    column: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> Tuple[List[str], list]:
+    """
+    Условия фильтрации столбца-метки времени по диапазону дат (включительно).
+
+    Диапазон строится как полуоткрытый интервал [date_from, date_to + 1 день),
+    без функций над столбцом (в отличие от ``DATE(column) <= %s``), поэтому
+    запрос использует индекс по столбцу. Значения datetime приводятся к дате.
+    """
+    conditions = []
+    params = []
+
+    if date_from:
+        conditions.append(f"{column} >= %s")
+        params.append(_as_date(date_from))
+
+    if date_to:
+        conditions.append(f"{column} < %s")
+        params.append(_as_date(date_to) + timedelta(days=1))
+
+    return conditions, params
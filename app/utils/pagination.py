@@ -0,0 +1,129 @@
+"""
+Постраничная выборка по ключу (keyset/cursor pagination).
+
+Вместо OFFSET следующая страница начинается строго после последней строки
+предыдущей: ``WHERE (created_at, id) < (%s, %s) ORDER BY created_at DESC, id DESC``.
+Такой запрос использует индекс по столбцам сортировки, и глубокие страницы
+стоят столько же, сколько первая.
+
+Курсор - непрозрачная для клиента строка (base64 от JSON со значениями
+столбцов сортировки последней строки страницы). С курсором OFFSET не
+применяется: параметр skip действует только для первой страницы.
+
+Столбцы сортировки должны быть NOT NULL: сравнение кортежей с NULL не
+истинно, и такие строки выпадали бы из выборки.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from fastapi import Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Курсор поврежден или получен для другого списка."""
+
+    def __init__(self) -> None:
+        super().__init__("Некорректный курсор")
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+        raise InvalidCursorError()
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    # Ошибки base64, JSON и разбора дат - подклассы ValueError.
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            raise InvalidCursorError()
+        return [_decode_value(value) for value in values]
+    except (TypeError, ValueError):
+        raise InvalidCursorError() from None
+
+
+class Keyset:
+    """
+    Порядок сортировки списка: столбцы SQL (NOT NULL, последний - уникальный,
+    обычно id), типы их значений в Python и общее направление. Имена полей
+    в результатах берутся из имен столбцов без псевдонима таблицы
+    (``rp.payment_date`` -> ``payment_date``).
+    """
+
+    def __init__(self, columns: Sequence[str], types: Sequence[Type], descending: bool = False) -> None:
+        if len(columns) != len(types):
+            raise ValueError("Для каждого столбца сортировки нужен тип значения")
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.types: Tuple[Type, ...] = tuple(types)
+        self.fields: Tuple[str, ...] = tuple(column.split(".")[-1] for column in self.columns)
+        self.descending: bool = descending
+
+    def order_by(self) -> str:
+        direction = " DESC" if self.descending else ""
+        return ", ".join(column + direction for column in self.columns)
+
+    def condition(self, cursor: Optional[str]) -> Tuple[Optional[str], list]:
+        """Условие WHERE для строк после курсора и его параметры."""
+        if not cursor:
+            return None, []
+
+        values = decode_cursor(cursor)
+        if len(values) != len(self.columns):
+            raise InvalidCursorError()
+        # Точное совпадение типа: bool - подкласс int, datetime - подкласс date.
+        if any(type(value) is not expected for value, expected in zip(values, self.types)):
+            raise InvalidCursorError()
+
+        operator = "<" if self.descending else ">"
+        placeholders = ", ".join(["%s"] * len(values))
+        return f"({', '.join(self.columns)}) {operator} ({placeholders})", values
+
+    @staticmethod
+    def offset(cursor: Optional[str], skip: int) -> int:
+        """OFFSET запроса: с курсором страница начинается сразу после него."""
+        return 0 if cursor else skip
+
+    def next_cursor(self, items: Sequence[Any], limit: int) -> Optional[str]:
+        """Курсор следующей страницы или None, если страница последняя."""
+        if not items or len(items) < limit:
+            return None
+
+        last = items[-1]
+        if isinstance(last, dict):
+            return encode_cursor([last[field] for field in self.fields])
+        return encode_cursor([getattr(last, field) for field in self.fields])
+
+
+def set_next_cursor(response: Response, keyset: Keyset, items: Sequence[Any], limit: int) -> None:
+    """Передает курсор следующей страницы в заголовке X-Next-Cursor."""
+    cursor = keyset.next_cursor(items, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,141 @@
+"""
+Внутрипроцессный индекс для поиска по началу строки (автодополнение).
+
+Ключи хранятся в отсортированном списке, поиск по префиксу - двоичный
+поиск (bisect) начала диапазона и просмотр ключей, пока они начинаются
+с префикса. Поиск не обращается к базе данных.
+"""
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.metrics import Counter, Histogram
+
+
+def normalize_key(value: str) -> str:
+    """Ключ без учета регистра; "ё" не отличается от "е"."""
+    return value.strip().casefold().replace("ё", "е")
+
+
+class PrefixIndex:
+    """
+    Индекс записей по нескольким ключам (например, фамилия, имя, паспорт).
+
+    Каждой записи (id) соответствуют ключи и данные, которые возвращает
+    поиск. Ключи и id хранятся в двух параллельных массивах, упорядоченных
+    по (ключ, id). Предназначен для использования из одного потока
+    (цикла событий).
+    """
+
+    def __init__(self) -> None:
+        self._keys: List[str] = []
+        self._ids: array = array("q")
+        self._entries: Dict[int, Tuple[Tuple[str, ...], Any]] = {}
+        self.ready: bool = False
+        self.loaded_at: Optional[float] = None
+        self.lookups = Counter()
+        self.lookup_ms = Histogram()
+        self.build_ms: float = 0.0
+
+    def build(self, items: Iterable[Tuple[int, Sequence[str], Any]]) -> None:
+        """Строит индекс заново из (id, ключи, данные)."""
+        started = time.perf_counter()
+        entries: Dict[int, Tuple[Tuple[str, ...], Any]] = {}
+        pairs: List[Tuple[str, int]] = []
+        for item_id, keys, payload in items:
+            normalized = self._normalize_keys(keys)
+            entries[item_id] = (normalized, payload)
+            pairs.extend((key, item_id) for key in normalized)
+        pairs.sort()
+
+        self._keys = [key for key, _ in pairs]
+        self._ids = array("q", (item_id for _, item_id in pairs))
+        self._entries = entries
+        self.ready = True
+        self.loaded_at = time.monotonic()
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    def is_stale(self, max_age: float) -> bool:
+        if self.loaded_at is None:
+            return True
+        return max_age > 0 and time.monotonic() - self.loaded_at > max_age
+
+    def add(self, item_id: int, keys: Sequence[str], payload: Any) -> None:
+        """Добавляет запись или заменяет ключи и данные существующей."""
+        self.remove(item_id)
+        normalized = self._normalize_keys(keys)
+        self._entries[item_id] = (normalized, payload)
+        for key in normalized:
+            index = bisect_left(self._keys, key)
+            while index < len(self._keys) and self._keys[index] == key and self._ids[index] < item_id:
+                index += 1
+            self._keys.insert(index, key)
+            self._ids.insert(index, item_id)
+
+    def remove(self, item_id: int) -> None:
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+
+        for key in entry[0]:
+            index = bisect_left(self._keys, key)
+            while index < len(self._keys) and self._keys[index] == key:
+                if self._ids[index] == item_id:
+                    del self._keys[index]
+                    del self._ids[index]
+                    break
+                index += 1
+
+    def search(self, query: str, limit: int) -> List[Any]:
+        """
+        Записи, у которых каждое слово запроса - начало одного из ключей.
+        Просматривается диапазон самого длинного слова, остальные слова
+        проверяются по ключам найденных записей.
+        """
+        started = time.perf_counter()
+        tokens = [normalize_key(token) for token in query.split()]
+        tokens = [token for token in tokens if token]
+        if not tokens:
+            return []
+
+        scan = max(tokens, key=len)
+        rest = list(tokens)
+        rest.remove(scan)
+
+        results: List[Any] = []
+        seen = set()
+        index = bisect_left(self._keys, scan)
+        while index < len(self._keys) and len(results) < limit:
+            if not self._keys[index].startswith(scan):
+                break
+
+            item_id = self._ids[index]
+            index += 1
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+
+            keys, payload = self._entries[item_id]
+            if all(any(key.startswith(token) for key in keys) for token in rest):
+                results.append(payload)
+
+        self.lookups.inc()
+        self.lookup_ms.observe((time.perf_counter() - started) * 1000)
+        return results
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "ready": self.ready,
+            "records": len(self._entries),
+            "keys": len(self._keys),
+            "build_ms": round(self.build_ms, 3),
+            "loaded_seconds_ago": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            "lookups": self.lookups.value,
+            "lookup_ms": self.lookup_ms.snapshot(),
+        }
+
+    @staticmethod
+    def _normalize_keys(keys: Sequence[str]) -> Tuple[str, ...]:
+        normalized = (normalize_key(key) for key in keys if key)
+        return tuple(dict.fromkeys(key for key in normalized if key))
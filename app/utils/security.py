@@ -1,17 +1,23 @@
 """
 Утилиты для безопасности и аутентификации
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from passlib.context import CryptContext
 try:
     import jwt
 except ImportError:
     import PyJWT as jwt
 from app.config import settings
+from app.core.metrics import Counter, Histogram
 
+# Хеши bcrypt (прежняя схема) проверяются, но считаются устаревшими
+# и при входе пользователя пересчитываются в argon2.
 pwd_context = CryptContext(
-    schemes=["argon2"], 
+    schemes=["argon2", "bcrypt"], 
     deprecated="auto",
     argon2__rounds=4,
     argon2__memory_cost=65536,
@@ -31,6 +37,85 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """
+    Хеширование и проверка паролей в отдельном пуле потоков.
+
+    argon2 занимает ~64 МиБ памяти и десятки миллисекунд процессора на
+    каждый хеш, поэтому вызовы не выполняются в цикле событий. argon2 и
+    bcrypt освобождают GIL, так что потоков достаточно. Число
+    одновременных вычислений ограничено PASSWORD_HASH_WORKERS, остальные
+    запросы ждут в очереди пула.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers: int = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.queue_wait_ms = Histogram()
+        self.hash_ms = Histogram()
+        self.pending = Counter()
+        self.rehashes = Counter()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def _run(self, func, *args):
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            self.queue_wait_ms.observe((started - submitted) * 1000)
+            try:
+                return func(*args)
+            finally:
+                self.hash_ms.observe((time.perf_counter() - started) * 1000)
+
+        self.pending.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            self.pending.inc(-1)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Проверяет пароль и, если хеш построен по устаревшей схеме или
+        с другими параметрами, возвращает новый хеш для сохранения.
+        """
+        valid, new_hash = await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+        if valid and new_hash:
+            self.rehashes.inc()
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending.value,
+            "rehashes": self.rehashes.value,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "hash_ms": self.hash_ms.snapshot(),
+        }
+
+
+password_hasher = PasswordHasher(max_workers=settings.PASSWORD_HASH_WORKERS)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,66 @@
+from datetime import date
+
+from app.utils.availability import AvailabilityIndex
+
+ACTIVE = "Активно"
+
+
+def _index() -> AvailabilityIndex:
+    index = AvailabilityIndex(ACTIVE)
+    index.build(
+        [{"id": 1, "name": "Люкс"}],
+        [
+            {"id": 10, "room_number": "Л101", "type_id": 1, "capacity": 2, "price_per_night": 1500, "is_available": True},
+            {"id": 11, "room_number": "Л102", "type_id": 1, "capacity": 1, "price_per_night": 1000, "is_available": False},
+        ],
+        [
+            {"id": 100, "room_id": 10, "check_in_date": date(2026, 10, 1), "check_out_date": date(2026, 10, 5), "status": ACTIVE},
+            {"id": 101, "room_id": 10, "check_in_date": date(2026, 10, 5), "check_out_date": date(2026, 10, 8), "status": ACTIVE},
+        ],
+    )
+    return index
+
+
+def _ordinal(day: int) -> int:
+    return date(2026, 10, day).toordinal()
+
+
+def test_half_open_intervals_do_not_overlap_on_departure_day():
+    index = _index()
+
+    assert index.peak_occupancy(10, _ordinal(1), _ordinal(10)) == 1
+    assert index.peak_occupancy(10, _ordinal(8), _ordinal(10)) == 0
+    assert index.peak_occupancy(10, _ordinal(4), _ordinal(6)) == 1
+
+
+def test_overlapping_stays_are_counted_together():
+    index = _index()
+    index.upsert_stay({"id": 102, "room_id": 10, "check_in_date": date(2026, 10, 3), "check_out_date": None, "status": ACTIVE})
+
+    assert index.peak_occupancy(10, _ordinal(1), _ordinal(3)) == 1
+    assert index.peak_occupancy(10, _ordinal(4), _ordinal(5)) == 2
+    assert index.peak_occupancy(10, _ordinal(20), _ordinal(21)) == 1
+    assert index.available(date(2026, 10, 4), date(2026, 10, 6)) == []
+
+
+def test_available_skips_unavailable_rooms_and_full_periods():
+    index = _index()
+
+    rooms = index.available(date(2026, 10, 2), date(2026, 10, 3))
+    assert [(room["room_number"], room["current_guest_count"], room["free_places"]) for room in rooms] == [("Л101", 1, 1)]
+    assert rooms[0]["type_name"] == "Люкс"
+
+
+def test_completed_stay_is_removed():
+    index = _index()
+    index.upsert_stay({"id": 100, "room_id": 10, "check_in_date": date(2026, 10, 1), "check_out_date": date(2026, 10, 5), "status": "Завершено"})
+
+    assert index.peak_occupancy(10, _ordinal(1), _ordinal(5)) == 0
+    assert index.stats()["active_stays"] == 1
+
+
+def test_same_day_check_out_still_occupies_the_day():
+    index = _index()
+    index.upsert_stay({"id": 103, "room_id": 10, "check_in_date": date(2026, 10, 20), "check_out_date": date(2026, 10, 20), "status": ACTIVE})
+
+    assert index.peak_occupancy(10, _ordinal(20), _ordinal(21)) == 1
@@ -0,0 +1,43 @@
+from app.utils.cache import TTLCache
+
+
+def _clock(monkeypatch, now: float) -> None:
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache = TTLCache(maxsize=10, ttl=60)
+    _clock(monkeypatch, 1000.0)
+    cache.set("user", 1)
+
+    _clock(monkeypatch, 1059.0)
+    assert cache.get("user") == 1
+
+    _clock(monkeypatch, 1060.0)
+    assert cache.get("user") is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits.value, cache.misses.value) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.evictions.value == 1
+
+
+def test_invalidate_and_disabled_cache():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+    disabled = TTLCache(maxsize=0, ttl=60)
+    disabled.set(1, "a")
+    assert disabled.get(1) is None
@@ -0,0 +1,21 @@
+from datetime import date, datetime
+
+from app.utils.db_utils import date_range_conditions
+
+
+def test_half_open_date_range():
+    conditions, params = date_range_conditions("rp.payment_date", date(2026, 10, 1), date(2026, 10, 31))
+
+    assert conditions == ["rp.payment_date >= %s", "rp.payment_date < %s"]
+    assert params == [date(2026, 10, 1), date(2026, 11, 1)]
+
+
+def test_datetime_bounds_are_truncated_to_dates():
+    _, params = date_range_conditions("created_at", datetime(2026, 10, 1, 15, 30), datetime(2026, 12, 31, 23, 59))
+
+    assert params == [date(2026, 10, 1), date(2027, 1, 1)]
+
+
+def test_open_ended_ranges():
+    assert date_range_conditions("created_at") == ([], [])
+    assert date_range_conditions("created_at", date_to=date(2026, 10, 1)) == (["created_at < %s"], [date(2026, 10, 2)])
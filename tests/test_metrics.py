@@ -0,0 +1,39 @@
+from app.core.metrics import Histogram, HistogramFamily
+
+
+def test_histogram_percentiles():
+    histogram = Histogram(buckets=(1, 10, 100))
+    for value in [0.5] * 50 + [5] * 45 + [50] * 4 + [500]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["max"] == 500
+    assert (snapshot["p50"], snapshot["p95"], snapshot["p99"]) == (1, 10, 100)
+    assert snapshot["buckets"] == {"le_1": 50, "le_10": 45, "le_100": 4, "le_inf": 1}
+
+
+def test_percentile_above_last_bucket_is_unbounded():
+    histogram = Histogram(buckets=(1, 10))
+    histogram.observe(20)
+
+    assert histogram.snapshot()["p50"] is None
+
+
+def test_empty_histogram():
+    snapshot = Histogram().snapshot()
+
+    assert snapshot["count"] == 0
+    assert snapshot["avg"] == 0.0
+    assert snapshot["p99"] is None
+
+
+def test_histogram_family_keeps_one_histogram_per_label():
+    family = HistogramFamily(buckets=(1, 10))
+    family.labels("GET /b").observe(5)
+    family.labels("GET /a").observe(0.5)
+    family.labels("GET /b").observe(5)
+
+    snapshot = family.snapshot()
+    assert list(snapshot) == ["GET /a", "GET /b"]
+    assert snapshot["GET /b"]["count"] == 2
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.utils.pagination import InvalidCursorError, Keyset, decode_cursor, encode_cursor
+
+
+def _raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    values = [datetime(2026, 10, 1, 12, 30, tzinfo=timezone.utc), date(2026, 10, 2), Decimal("1500.50"), "Л101", 7]
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+@pytest.mark.parametrize("cursor", ["zzz", "!!!", _raw_cursor({"a": 1}), _raw_cursor([{"x": 1}]), _raw_cursor([{"d": "2026-13-01"}])])
+def test_decode_rejects_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_condition_and_order():
+    keyset = Keyset(("g.created_at", "g.id"), (datetime, int), descending=True)
+    created_at = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+    condition, params = keyset.condition(encode_cursor([created_at, 5]))
+
+    assert condition == "(g.created_at, g.id) < (%s, %s)"
+    assert params == [created_at, 5]
+    assert keyset.order_by() == "g.created_at DESC, g.id DESC"
+    assert keyset.condition(None) == (None, [])
+
+
+@pytest.mark.parametrize("values", [
+    [1],
+    [{"dt": "2026-10-01T00:00:00+00:00"}, "5"],
+    [{"dt": "2026-10-01T00:00:00+00:00"}, True],
+    [{"d": "2026-10-01"}, 5],
+    [None, 5],
+])
+def test_condition_rejects_wrong_length_or_types(values):
+    keyset = Keyset(("created_at", "id"), (datetime, int))
+    with pytest.raises(InvalidCursorError):
+        keyset.condition(_raw_cursor(values))
+
+
+def test_offset_is_ignored_after_cursor():
+    assert Keyset.offset(None, 20) == 20
+    assert Keyset.offset("cursor", 20) == 0
+
+
+def test_next_cursor():
+    keyset = Keyset(("r.room_number", "r.id"), (str, int))
+    items = [{"room_number": "Л101", "id": 1}, {"room_number": "Л102", "id": 2}]
+
+    assert keyset.next_cursor(items, limit=3) is None
+    assert decode_cursor(keyset.next_cursor(items, limit=2)) == ["Л102", 2]
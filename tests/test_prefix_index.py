@@ -0,0 +1,62 @@
+from app.utils.prefix_index import PrefixIndex, normalize_key
+
+
+def _index() -> PrefixIndex:
+    index = PrefixIndex()
+    index.build([
+        (1, ("Иванов", "Иван", "1234-567890"), "ivanov"),
+        (2, ("Петров", "Пётр", "1234-567891"), "petrov"),
+        (3, ("Иванова", "Мария", "4321-000001"), "ivanova"),
+    ])
+    return index
+
+
+def test_normalize_key():
+    assert normalize_key("  Пётр ") == "петр"
+
+
+def test_prefix_lookup():
+    index = _index()
+
+    assert index.search("иван", 10) == ["ivanov", "ivanova"]
+    assert index.search("ПЕТР", 10) == ["petrov"]
+    assert index.search("1234-56789", 10) == ["ivanov", "petrov"]
+    assert index.search("иван", 1) == ["ivanov"]
+    assert index.search("сидоров", 10) == []
+    assert index.search("   ", 10) == []
+
+
+def test_every_word_must_match():
+    index = _index()
+
+    assert index.search("иванова мар", 10) == ["ivanova"]
+    assert index.search("иван петр", 10) == []
+
+
+def test_add_replaces_and_remove_deletes():
+    index = _index()
+
+    index.add(2, ("Сидоров", "Пётр", "1234-567891"), "sidorov")
+    assert index.search("петров", 10) == []
+    assert index.search("сид", 10) == ["sidorov"]
+
+    index.add(4, ("Иваненко", "Олег", "5555-000000"), "ivanenko")
+    assert index.search("иван", 10) == ["ivanov", "ivanenko", "ivanova"]
+
+    index.remove(1)
+    index.remove(99)
+    assert index.search("иван", 10) == ["ivanenko", "ivanova"]
+    assert index.stats()["records"] == 3
+
+
+def test_is_stale(monkeypatch):
+    index = PrefixIndex()
+    assert index.is_stale(60)
+
+    monkeypatch.setattr("app.utils.prefix_index.time.monotonic", lambda: 1000.0)
+    index.build([])
+    assert not index.is_stale(60)
+
+    monkeypatch.setattr("app.utils.prefix_index.time.monotonic", lambda: 1061.0)
+    assert index.is_stale(60)
+    assert not index.is_stale(0)
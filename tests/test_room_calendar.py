@@ -0,0 +1,29 @@
+from datetime import date
+
+from app.models.room import RoomDayStatus
+from app.services.room_service import RoomService
+
+
+def _spans(occupancy, capacity=2, is_available=True):
+    spans = RoomService._calendar_spans(date(2026, 10, 1), occupancy, capacity, is_available)
+    return [(span.start.day, span.end.day, span.status, span.guests) for span in spans]
+
+
+def test_equal_days_are_merged_into_spans():
+    assert _spans([0, 0, 1, 1, 2, 0]) == [
+        (1, 3, RoomDayStatus.FREE, 0),
+        (3, 5, RoomDayStatus.PARTIAL, 1),
+        (5, 6, RoomDayStatus.OCCUPIED, 2),
+        (6, 7, RoomDayStatus.FREE, 0),
+    ]
+
+
+def test_single_span_covers_the_whole_period():
+    assert _spans([1, 1, 1], capacity=1) == [(1, 4, RoomDayStatus.OCCUPIED, 1)]
+
+
+def test_unavailable_room_is_under_maintenance():
+    assert _spans([0, 1], is_available=False) == [
+        (1, 2, RoomDayStatus.MAINTENANCE, 0),
+        (2, 3, RoomDayStatus.MAINTENANCE, 1),
+    ]